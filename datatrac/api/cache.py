@@ -0,0 +1,169 @@
+# datatrac/api/cache.py
+"""
+In-process cache of serialized metadata responses (dataset details and
+lineage graphs), so dashboard polls neither query the database nor
+serialize the same payload again.
+
+Entries are bounded in number (least recently used are evicted) and in
+age (TTL). Each entry is tagged with the dataset hashes its body depends
+on; writes made through `DataManager` emit events that drop every entry
+tagged with the affected hashes. Writes made by other processes are picked
+up when entries expire.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from datatrac.core import events
+from datatrac.core.config import METADATA_MAX_AGE_SECONDS, RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL_SECONDS
+from .serving import etag_matches
+
+# Metadata can change (download counts, deregistration), so clients cache it
+# but revalidate with If-None-Match
+METADATA_CACHE_CONTROL = (
+    f"public, max-age={METADATA_MAX_AGE_SECONDS}, must-revalidate" if METADATA_MAX_AGE_SECONDS else "no-cache"
+)
+
+
+def weak_etag(version: str) -> str:
+    return f'W/"{version}"'
+
+
+def body_etag(body: bytes) -> str:
+    """Weak ETag for a payload without a natural version (e.g. a lineage graph)."""
+    return weak_etag(hashlib.blake2b(body, digest_size=12).hexdigest())
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    tags: tuple[str, ...]
+    expires_at: float
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._keys_by_tag: dict[str, set[str]] = {}
+        # Bumped by every invalidation; a response computed before one is not stored
+        self._generation = 0
+        self._subscribed = False
+        self.counters = {"hits": 0, "misses": 0, "not_modified": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def generation(self) -> int:
+        """Take this before reading the database; pass it to `put`."""
+        return self._generation
+
+    def get(self, key: str) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.counters["expirations"] += 1
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return entry
+
+    def put(self, key: str, body: bytes, etag: str, tags, generation: int) -> CachedResponse:
+        """Stores a response, unless something was invalidated since `generation`."""
+        entry = CachedResponse(body, etag, tuple(tags), time.monotonic() + self.ttl)
+        with self._lock:
+            if self.max_entries <= 0 or generation != self._generation:
+                return entry
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            for tag in entry.tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.counters["evictions"] += 1
+        return entry
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def invalidate(self, *file_hashes: str):
+        with self._lock:
+            self._generation += 1
+            for file_hash in file_hashes:
+                for key in list(self._keys_by_tag.get(file_hash, ())):
+                    self._remove(key)
+                    self.counters["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._keys_by_tag.clear()
+
+    def record_not_modified(self):
+        with self._lock:
+            self.counters["not_modified"] += 1
+
+    def subscribe(self):
+        """Drops affected entries whenever this process writes to the registry."""
+        if self._subscribed:
+            return
+        events.subscribe("dataset_changed", self._on_dataset_event)
+        events.subscribe("dataset_deleted", self._on_dataset_event)
+        events.subscribe("lineage_created", self._on_lineage_created)
+        self._subscribed = True
+
+    def _on_dataset_event(self, file_hash: str):
+        self.invalidate(file_hash)
+
+    def _on_lineage_created(self, parent_hash: str, child_hash: str):
+        # Any cached graph that reaches the new edge contains one of its ends
+        self.invalidate(parent_hash, child_hash)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hit_ratio": round(self.counters["hits"] / lookups, 4) if lookups else None,
+            }
+
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """A 304 response if the client already has `etag`, else None."""
+    if not etag_matches(request.headers.get("if-none-match"), etag):
+        return None
+    response_cache.record_not_modified()
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": METADATA_CACHE_CONTROL})
+
+
+def cached_json_response(request: Request, entry: CachedResponse) -> Response:
+    return not_modified(request, entry.etag) or Response(
+        content=entry.body,
+        media_type="application/json",
+        headers={"ETag": entry.etag, "Cache-Control": METADATA_CACHE_CONTROL},
+    )
+
+
+# Shared by the dataset routes and the system stats endpoint
+response_cache = ResponseCache()
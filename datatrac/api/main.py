@@ -1,15 +1,110 @@
+from contextlib import asynccontextmanager
+import logging
+import threading
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 import os
 
-from .routers import datasets
+from datatrac.core import events, models, search
+from datatrac.core.config import DOWNLOAD_STATS_FLUSH_SECONDS, JOBS_IN_PROCESS, LINEAGE_INDEX_POLL_SECONDS, METRICS_ENABLED
+from datatrac.core.db import SessionLocal, dispose_async_engine
+from datatrac.core.lineage_index import lineage_index
+from datatrac.core.stats import download_counter
+from .cache import response_cache
+from .metrics import MetricsMiddleware
+from .routers import datasets, jobs, metrics, registry, system
+
+logger = logging.getLogger(__name__)
+
+
+def _dataset_name(file_hash: str) -> str | None:
+    with SessionLocal() as db:
+        dataset = db.get(models.Dataset, file_hash)
+        return dataset.name if dataset else None
+
+
+def _poll_lineage_index(stop: threading.Event):
+    # Picks up lineage and datasets written by other processes (e.g. the CLI)
+    while not stop.wait(LINEAGE_INDEX_POLL_SECONDS):
+        try:
+            with SessionLocal() as db:
+                lineage_index.refresh_if_changed(db)
+        except Exception:
+            logger.exception("Refreshing the lineage index failed")
+
+
+def _on_registry_imported(counts: dict):
+    # Bulk imports emit no per-row events: reload what depends on the rows
+    response_cache.clear()
+    try:
+        with SessionLocal() as db:
+            lineage_index.refresh_if_changed(db)
+    except Exception:
+        logger.exception("Refreshing the lineage index failed")
+
+
+def _flush_download_stats():
+    try:
+        with SessionLocal() as db:
+            download_counter.flush(db)
+    except Exception:
+        # The counts stay buffered and are retried on the next flush
+        logger.exception("Flushing download statistics failed")
+
+
+def _flush_download_stats_loop(stop: threading.Event):
+    while not stop.wait(DOWNLOAD_STATS_FLUSH_SECONDS):
+        _flush_download_stats()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # NEW: Load the lineage graph into memory once; lineage requests fall
+    # back to SQL if this fails (e.g. the database is unreachable)
+    stop = threading.Event()
+    try:
+        def _load():
+            with SessionLocal() as db:
+                lineage_index.load(db)
+        await run_in_threadpool(_load)
+        lineage_index.subscribe(name_lookup=_dataset_name)
+        if LINEAGE_INDEX_POLL_SECONDS > 0:
+            threading.Thread(target=_poll_lineage_index, args=(stop,), daemon=True).start()
+    except Exception:
+        logger.exception("Could not load the lineage index")
+    # NEW: SQLite searches are answered from an in-memory trigram index here
+    # (CLI processes use the persisted search table instead)
+    search.enable_memory_index()
+    # NEW: Writes through this server drop the cached responses they affect
+    response_cache.subscribe()
+    events.subscribe("registry_imported", _on_registry_imported)
+    # NEW: Roll buffered download counts up into the datasets table
+    threading.Thread(target=_flush_download_stats_loop, args=(stop,), daemon=True).start()
+    # NEW: Uploads and deletes are queued as jobs; run them here unless a
+    # separate `datatrac worker` does
+    job_pool = None
+    if JOBS_IN_PROCESS:
+        from datatrac.core.jobs import WorkerPool
+        job_pool = WorkerPool()
+        job_pool.start()
+    yield
+    if job_pool is not None:
+        # Jobs already running finish before the process exits; queued ones stay queued
+        await run_in_threadpool(job_pool.stop, False)
+    events.unsubscribe("registry_imported", _on_registry_imported)
+    stop.set()
+    await run_in_threadpool(_flush_download_stats)
+    await dispose_async_engine()
+
 
 app = FastAPI(
     title="DataTrac API",
     description="An API for discovering, managing, and tracing data files.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # CORS
@@ -21,8 +116,16 @@ app.add_middleware(
     allow_headers=["*"],  
 )
 
+# NEW: Request timings for /metrics (outermost, so CORS handling is included)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include dataset router
 app.include_router(datasets.router)
+app.include_router(registry.router)
+app.include_router(jobs.router)
+app.include_router(system.router)
+app.include_router(metrics.router)
 
 # Path to your React build
 frontend_path = os.path.join(os.path.dirname(__file__), "..", "frontend", "web")
@@ -0,0 +1,46 @@
+# datatrac/api/metrics.py
+"""
+Times every API request into `datatrac_http_request_seconds` and opens
+the span that the request's SQL statements, transfers and hashes nest in.
+
+Requests are labelled with the route template (`/datasets/{file_hash}`),
+not the raw path, so the number of series stays bounded.
+"""
+import time
+
+from datatrac.core import metrics
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: streamed responses are timed until their last byte."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def _send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        span = metrics.start_span("http", method=scope["method"], path=scope["path"])
+        error = None
+        try:
+            await self.app(scope, receive, _send)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            span.attrs.update(route=template, status=status)
+            metrics.HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - span.start, scope["method"], template, str(status)
+            )
+            metrics.finish_span(span, error)
@@ -1,13 +1,24 @@
 # datatrac/api/routers/datasets.py
-import shutil
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Header
-from sqlalchemy.orm import Session
+import mimetypes
+from pathlib import Path
+from typing import List, Literal
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Header, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timezone
 
-from datatrac.core.db import get_db
-from datatrac.core.manager import DataManager
+from datatrac.core import compression
+from datatrac.core.async_manager import AsyncDataManager
+from datatrac.core.db import get_async_db
+from datatrac.core.ingest import SpoolFile, UploadSession
+from datatrac.core.lineage_index import lineage_index
+from datatrac.core.stats import download_counter
 from .. import schemas
+from .jobs import submit_job
+from ..cache import body_etag, cached_json_response, not_modified, response_cache
+from ..serving import IMMUTABLE_CACHE_CONTROL, LocalObjectResponse, RangeNotSatisfiable, etag_matches, parse_range
 
 router = APIRouter(
     prefix="/datasets",
@@ -16,54 +27,282 @@ router = APIRouter(
 
 # Endpoint to list all available datasets
 @router.get("/", response_model=List[schemas.Dataset])
-def list_datasets(db: Session = Depends(get_db)):
+async def list_datasets(
+    request: Request,
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=1000, description="Page size. Omit to list everything."),
+    after: str | None = Query(None, description="Cursor from the X-Next-Cursor header of the previous page."),
+    name_prefix: str | None = None,
+    source: str | None = None,
+    active: bool | None = None,
+    min_size: int | None = Query(None, ge=0),
+    max_size: int | None = Query(None, ge=0),
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    db: AsyncSession | None = Depends(get_async_db),
+):
     """
-    Retrieve a list of all datasets visible to the user.
+    Retrieve datasets visible to the user, newest first.
     This mirrors the `datatrac fetch -a` command.
+
+    With `limit`, results are paginated: the cursor for the next page is
+    returned in the `X-Next-Cursor` header (and a `Link: rel="next"` header).
     """
-    manager = DataManager(db)
-    datasets = manager.find_all()
-    return datasets
+    manager = AsyncDataManager(db)
+    try:
+        rows, next_cursor = await manager.find_page(
+            limit=limit,
+            after=after,
+            name_prefix=name_prefix,
+            source=source,
+            active=active,
+            min_size=min_size,
+            max_size=max_size,
+            created_after=created_after,
+            created_before=created_before,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+        next_url = request.url.include_query_params(after=next_cursor)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return rows
+
+# Endpoint to search datasets by name or source
+# (declared before /{dataset_hash} so "search" is not taken for a hash)
+@router.get("/search", response_model=List[schemas.Dataset])
+async def search_datasets(
+    q: str = Query(..., min_length=1, description="Text to look for in dataset names and sources."),
+    limit: int = Query(20, ge=1, le=200),
+    db: AsyncSession | None = Depends(get_async_db),
+):
+    """
+    Find datasets whose name or source contains `q` (case-insensitive),
+    best matches first. Mirrors `datatrac search`.
+    """
+    return await AsyncDataManager(db).search(q, limit=limit)
 
 # Endpoint to get details for a single dataset
 @router.get("/{dataset_hash}", response_model=schemas.Dataset)
-def get_dataset_details(dataset_hash: str, db: Session = Depends(get_db)):
+async def get_dataset_details(dataset_hash: str, request: Request, db: AsyncSession | None = Depends(get_async_db)):
     """
-    Get detailed information for a single dataset by its hash.
-    Mirrors `datatrac fetch {hash}`.
+    Get detailed information for a single dataset by its hash or a unique
+    hash prefix. Mirrors `datatrac fetch {hash}`.
+
+    Responses carry a weak ETag that changes with the dataset; send it back
+    in `If-None-Match` to get an empty 304 when nothing changed.
     """
-    manager = DataManager(db)
-    dataset = manager.find_by_hash(dataset_hash)
+    # Prefixes are not cached: a new dataset can make one ambiguous
+    key = f"dataset:{dataset_hash}"
+    entry = response_cache.get(key)
+    if entry is not None:
+        return cached_json_response(request, entry)
+
+    generation = response_cache.generation()
+    manager = AsyncDataManager(db)
+    dataset = await manager.find_by_hash(dataset_hash)
     if not dataset:
-        raise HTTPException(status_code=404, detail="Dataset not found")
-    return dataset
+        try:
+            dataset = await manager.find_by_hash(await manager.resolve_hash(dataset_hash))
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Dataset not found")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    # Tagged by content: updated_at only has 1s resolution on SQLite, so two
+    # changes within a second would share a timestamp-based ETag
+    body = schemas.Dataset.model_validate(dataset).model_dump_json().encode()
+    etag = body_etag(body)
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    entry = response_cache.put(f"dataset:{dataset.hash}", body, etag, [dataset.hash], generation)
+    return cached_json_response(request, entry)
+
+# Uploads are read and written in 1 MiB pieces, off the event loop
+UPLOAD_READ_SIZE = 1024 * 1024
 
 # Endpoint to upload a new dataset
-@router.post("/upload", response_model=schemas.Dataset)
+@router.post("/upload", response_model=schemas.Job, status_code=202)
 async def upload_dataset(
+    response: Response,
     source: str = Form(None),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
 ):
     """
     Upload a new dataset file. Mirrors `datatrac push`.
-    The file is sent as multipart/form-data.
+    The file is sent as multipart/form-data. It is hashed while being
+    written to a unique spool file; pushing it to the registry runs as a
+    background job. Returns 202 with the job (see /jobs/{id}).
     """
-    # Save the uploaded file to a temporary path
-    temp_path = f"/tmp/{file.filename}"
-    with open(temp_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    manager = DataManager(db)
+    filename = Path(file.filename or "upload").name
+    spool = await run_in_threadpool(SpoolFile, Path(filename).suffix)
     try:
-        dataset, _ = manager.push_dataset(temp_path, source=source)
-        return dataset
+        while chunk := await file.read(UPLOAD_READ_SIZE):
+            await run_in_threadpool(spool.write, chunk)
+        file_hash = await run_in_threadpool(spool.finish)
+        params = {"path": str(spool.path), "file_hash": file_hash, "name": filename, "source": source}
+        # From here on the job owns the spool file
+        return await submit_job(response, "push", params)
     except Exception as e:
+        await run_in_threadpool(spool.discard)
         raise HTTPException(status_code=500, detail=str(e))
 
+def _get_upload_session(upload_id: str) -> UploadSession:
+    try:
+        return UploadSession(upload_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+def _session_status(session: UploadSession) -> schemas.UploadSessionStatus:
+    return schemas.UploadSessionStatus(
+        upload_id=session.id,
+        filename=session.meta["filename"],
+        offset=session.offset,
+        total_size=session.meta.get("total_size"),
+    )
+
+# Endpoints for large files: create a session, PUT the bytes in one or more
+# requests (resuming from the reported offset after a failure), then complete.
+@router.post("/uploads", response_model=schemas.UploadSessionStatus, status_code=201)
+def create_upload_session(body: schemas.UploadSessionCreate):
+    """Starts a resumable upload and returns its id."""
+    session = UploadSession.create(body.filename, source=body.source, total_size=body.size)
+    return _session_status(session)
+
+@router.get("/uploads/{upload_id}", response_model=schemas.UploadSessionStatus)
+def get_upload_session(upload_id: str):
+    """Reports how many bytes of an upload have been received."""
+    return _session_status(_get_upload_session(upload_id))
+
+@router.put("/uploads/{upload_id}", response_model=schemas.UploadSessionStatus)
+async def append_to_upload_session(upload_id: str, request: Request, offset: int = 0):
+    """
+    Appends the raw request body to an upload. `offset` must equal the number
+    of bytes already received; the body is streamed, never held in memory.
+    """
+    session = await run_in_threadpool(_get_upload_session, upload_id)
+    buffer = bytearray()
+    try:
+        async for piece in request.stream():
+            buffer += piece
+            if len(buffer) >= UPLOAD_READ_SIZE:
+                await run_in_threadpool(session.append, bytes(buffer), offset)
+                offset += len(buffer)
+                buffer.clear()
+        if buffer:
+            await run_in_threadpool(session.append, bytes(buffer), offset)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return await run_in_threadpool(_session_status, session)
+
+@router.post("/uploads/{upload_id}/complete", response_model=schemas.Job, status_code=202)
+async def complete_upload_session(upload_id: str, response: Response):
+    """
+    Queues a job that registers the uploaded file as a dataset. The session
+    is removed once the job succeeds; if it fails for good, the data is
+    kept so the completion can be retried.
+    """
+    session = await run_in_threadpool(_get_upload_session, upload_id)
+    try:
+        file_hash = await run_in_threadpool(session.finish)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    params = {
+        "path": str(session.data_path), "file_hash": file_hash, "name": session.meta["filename"],
+        "source": session.meta.get("source"), "upload_id": session.id,
+    }
+    return await submit_job(response, "push", params)
+
+@router.delete("/uploads/{upload_id}")
+def abort_upload_session(upload_id: str):
+    """Discards an unfinished upload."""
+    _get_upload_session(upload_id).discard()
+    return {"message": "Upload discarded."}
+
+# Endpoint to download the dataset's bytes
+@router.get("/{dataset_hash}/download")
+async def download_dataset_content(dataset_hash: str, request: Request, db: AsyncSession | None = Depends(get_async_db)):
+    """
+    Streams the stored dataset. Supports `Range`/`If-Range` for partial and
+    resumed transfers and `If-None-Match` against the hash-based ETag. Local
+    objects are sent with zero-copy sendfile when the server supports it;
+    remote objects are streamed block by block.
+
+    Compressed objects are sent as stored, with `Content-Encoding`, to
+    clients whose `Accept-Encoding` allows the codec (whole object only);
+    other clients get them decompressed on the fly.
+    """
+    manager = AsyncDataManager(db)
+    dataset = await manager.find_by_hash(dataset_hash)
+    if not dataset or not dataset.is_active:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    codec = dataset.codec
+    send_encoded = compression.accepts_encoding(request.headers.get("accept-encoding"), codec)
+    # The encoded and decoded representations need different ETags
+    etag = f'"{dataset.hash}.{codec}"' if send_encoded else f'"{dataset.hash}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Accept-Ranges": "none" if send_encoded else "bytes",
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(dataset.name)}",
+    }
+    if codec != compression.NONE:
+        headers["Vary"] = "Accept-Encoding"
+    if send_encoded:
+        headers["Content-Encoding"] = codec
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    size = dataset.stored_size_bytes if send_encoded else dataset.size_bytes
+    if size is None:
+        size = await manager.run_in_thread(manager.storage.size, dataset.registry_path)
+
+    # Ranges are only served on the decoded content
+    range_header = None if send_encoded else request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range is not None and if_range.strip() != etag:
+        # The client's partial copy is of something else; send everything
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+
+    if byte_range:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    else:
+        start, end = 0, size - 1
+        status_code = 200
+
+    # Resumed transfers should not count as new downloads. Counted in
+    # memory; the server flushes the totals to the database in batches.
+    if start == 0:
+        download_counter.record(dataset.hash)
+
+    media_type = mimetypes.guess_type(dataset.name)[0] or "application/octet-stream"
+    length = end - start + 1
+    local_path = None
+    if dataset.storage_format == "file" and (codec == compression.NONE or send_encoded):
+        local_path = manager.storage.local_path(dataset.registry_path)
+    if local_path:
+        return LocalObjectResponse(str(local_path), start, length, status_code, headers, media_type)
+
+    headers["Content-Length"] = str(length)
+    # The content iterator is synchronous; Starlette pulls it from a worker thread
+    if send_encoded:
+        content = await manager.iter_content(dataset, start, end, decode=False)
+    else:
+        content = await manager.iter_content(dataset, start, end)
+    return StreamingResponse(content, status_code=status_code, headers=headers, media_type=media_type)
+
 # Endpoint to trigger a download (updates stats)
 @router.post("/{dataset_hash}/download", response_model=schemas.Dataset)
-def trigger_download(dataset_hash: str, db: Session = Depends(get_db)):
+async def trigger_download(dataset_hash: str, db: AsyncSession | None = Depends(get_async_db)):
     """
     Triggers the download logic for a dataset, which increments its
     download count and updates the timestamp.
@@ -71,53 +310,100 @@ def trigger_download(dataset_hash: str, db: Session = Depends(get_db)):
     Note: This endpoint does not stream the file back. It simulates a
     download event and returns the updated dataset metadata.
     """
-    manager = DataManager(db)
-    try:
-        # The download_dataset method now handles stats updates
-        # We don't need the returned path in the API context
-        dataset = manager.find_by_hash(dataset_hash)
-        if not dataset:
-            raise HTTPException(status_code=404, detail="Dataset not found")
-            
-        dataset.download_count += 1
-        dataset.last_downloaded_at = datetime.now(timezone.utc)
-        db.commit()
-        db.refresh(dataset)
-        return dataset
-    except FileNotFoundError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-        
+    dataset = await AsyncDataManager(db).find_by_hash(dataset_hash)
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    # No read-modify-write on the row: the download is counted in memory and
+    # flushed with an atomic UPDATE. The response includes unflushed counts.
+    download_counter.record(dataset.hash)
+    result = schemas.Dataset.model_validate(dataset)
+    result.download_count += download_counter.pending(dataset.hash)
+    result.last_downloaded_at = datetime.now(timezone.utc)
+    return result
+
 # Endpoint to delete a dataset (Admin)
-@router.delete("/{dataset_hash}")
-def delete_dataset(
+@router.delete("/{dataset_hash}", response_model=schemas.Job, status_code=202)
+async def delete_dataset(
     dataset_hash: str,
+    response: Response,
     x_admin_password: str = Header(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession | None = Depends(get_async_db),
 ):
     """
     Deregisters a dataset from the registry. Requires an admin password
-    passed in the 'X-Admin-Password' header.
+    passed in the 'X-Admin-Password' header. Removing the stored object runs
+    as a background job; returns 202 with the job (see /jobs/{id}).
     """
     from datatrac.cli.commands.delete import ADMIN_PASSWORD # Reuse password
     if x_admin_password != ADMIN_PASSWORD:
         raise HTTPException(status_code=403, detail="Invalid admin password")
-        
-    manager = DataManager(db)
-    success, message = manager.delete_dataset(dataset_hash)
-    if not success:
-        raise HTTPException(status_code=404, detail=message)
-    return {"message": message}
+
+    # Obvious mistakes are still reported right away
+    dataset = await AsyncDataManager(db).find_by_hash(dataset_hash)
+    if not dataset:
+        raise HTTPException(status_code=404, detail=f"Dataset with hash {dataset_hash} not found.")
+    if not dataset.is_active:
+        raise HTTPException(status_code=404, detail="This dataset has already been deregistered.")
+    return await submit_job(response, "delete", {"file_hash": dataset_hash})
+
+@router.post("/{dataset_hash}/verify", response_model=schemas.Job, status_code=202)
+async def verify_dataset(dataset_hash: str, response: Response, db: AsyncSession | None = Depends(get_async_db)):
+    """
+    Queues a job that reads the stored object back and checks it against
+    the dataset hash. Returns 202 with the job (see /jobs/{id}).
+    """
+    dataset = await AsyncDataManager(db).find_by_hash(dataset_hash)
+    if not dataset or not dataset.is_active:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    return await submit_job(response, "verify", {"file_hash": dataset_hash})
 
 @router.get("/{dataset_hash}/lineage", response_model=schemas.LineageResponse)
-def get_dataset_lineage(dataset_hash: str, db: Session = Depends(get_db)):
+async def get_dataset_lineage(
+    dataset_hash: str,
+    request: Request,
+    depth: int = Query(1, ge=0, le=100, description="How many links to follow (0 = the dataset alone)."),
+    direction: Literal["up", "down", "both"] = "both",
+    db: AsyncSession | None = Depends(get_async_db),
+):
     """
-    Get the parent and child lineage for a specific dataset.
+    Get the lineage graph of a dataset: its ancestors (`up`), descendants
+    (`down`) or both, up to `depth` links away. Supports `If-None-Match`
+    like the details endpoint.
     """
-    manager = DataManager(db)
+    key = f"lineage:{dataset_hash}:{depth}:{direction}"
+    entry = response_cache.get(key)
+    if entry is not None:
+        return cached_json_response(request, entry)
+
+    generation = response_cache.generation()
     try:
-        lineage_data = manager.get_lineage(dataset_hash)
-        return lineage_data
+        # NEW: Answer from the in-memory index when the server has loaded it
+        if lineage_index.loaded and dataset_hash in lineage_index:
+            graph = lineage_index.walk(dataset_hash, depth=depth, direction=direction)
+        else:
+            graph = await AsyncDataManager(db).get_lineage_graph(dataset_hash, depth=depth, direction=direction)
     except FileNotFoundError as e:
-        raise HTTPException(status_code=404, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=404, detail=str(e))
+    lineage = schemas.LineageResponse(
+        **graph,
+        parents=[n for n in graph["nodes"] if n["depth"] == -1],
+        children=[n for n in graph["nodes"] if n["depth"] == 1],
+    )
+    body = lineage.model_dump_json().encode()
+    # Tagged with every dataset in the graph: a rename or a new link touching
+    # any of them changes the response
+    tags = [graph["root"], *(n["hash"] for n in graph["nodes"])]
+    entry = response_cache.put(key, body, body_etag(body), tags, generation)
+    return cached_json_response(request, entry)
+
+@router.post("/lineage:batch", response_model=schemas.LineageBatchResult)
+async def create_lineage_batch(batch: schemas.LineageBatch, db: AsyncSession | None = Depends(get_async_db)):
+    """
+    Creates many lineage links in one request, e.g. everything a pipeline
+    run produced. Links that already exist are skipped, so retrying a batch
+    is safe. Links to unknown datasets or that would create a cycle are
+    returned under `rejected`; the others are still created.
+    """
+    links = [(link.parent_hash, link.child_hash) for link in batch.links]
+    return await AsyncDataManager(db).create_lineage_batch(links)
@@ -0,0 +1,46 @@
+# datatrac/api/routers/jobs.py
+from typing import List, Literal
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+
+from datatrac.core import jobs
+from datatrac.core.db import SessionLocal
+from .. import schemas
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"],
+)
+
+async def submit_job(response: Response, kind: str, params: dict) -> dict:
+    """Queues a job for the endpoints that answer 202; points Location at its status."""
+    def _submit():
+        with SessionLocal() as db:
+            return jobs.job_status(jobs.submit(db, kind, params))
+    status = await run_in_threadpool(_submit)
+    response.status_code = 202
+    response.headers["Location"] = f"/jobs/{status['id']}"
+    return status
+
+@router.get("/", response_model=List[schemas.Job])
+def list_jobs(
+    status: Literal["queued", "running", "succeeded", "failed"] | None = None,
+    kind: str | None = None,
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """Most recent jobs first."""
+    with SessionLocal() as db:
+        return [jobs.job_status(job) for job in jobs.list_jobs(db, status=status, kind=kind, limit=limit)]
+
+@router.get("/{job_id}", response_model=schemas.Job)
+def get_job(job_id: str):
+    """
+    Status of a job: attempts, bytes transferred so far, throughput, and
+    the result or error once it has finished. Poll until `status` is
+    "succeeded" or "failed".
+    """
+    with SessionLocal() as db:
+        job = jobs.get_job(db, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return jobs.job_status(job)
@@ -0,0 +1,14 @@
+# datatrac/api/routers/metrics.py
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from datatrac.core import metrics
+
+router = APIRouter(tags=["system"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Request, SQL, hashing and transfer timings in the Prometheus text format.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,82 @@
+# datatrac/api/routers/registry.py
+import json
+from typing import Literal
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from datatrac.core.db import SessionLocal
+from datatrac.core.registry_io import BATCH_SIZE, RegistryImporter, iter_ndjson, parse_tables, read_ndjson
+
+router = APIRouter(
+    prefix="/registry",
+    tags=["registry"],
+)
+
+def _check_admin(password: str):
+    from datatrac.cli.commands.delete import ADMIN_PASSWORD # Reuse password
+    if password != ADMIN_PASSWORD:
+        raise HTTPException(status_code=403, detail="Invalid admin password")
+
+@router.get("/export")
+def export_registry(
+    tables: str | None = Query(None, description="Comma-separated tables to export. Default: all."),
+    x_admin_password: str = Header(...),
+):
+    """
+    Streams registry metadata as NDJSON (the `datatrac export` format).
+    Rows come from a server-side cursor and are sent batch by batch.
+    Requires the admin password in the 'X-Admin-Password' header.
+    """
+    _check_admin(x_admin_password)
+    try:
+        names = parse_tables(tables.split(",") if tables else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def _generate():
+        # Starlette pulls this from a worker thread; the session lives as long as the stream
+        with SessionLocal() as db:
+            yield from iter_ndjson(db, names)
+
+    return StreamingResponse(
+        _generate(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="registry.ndjson"'},
+    )
+
+@router.post("/import")
+async def import_registry(
+    request: Request,
+    on_conflict: Literal["skip", "update"] = "skip",
+    x_admin_password: str = Header(...),
+):
+    """
+    Bulk loads an NDJSON export sent as the request body. The body is
+    parsed as it arrives and written in batches, never held in memory.
+    Requires the admin password in the 'X-Admin-Password' header.
+    """
+    _check_admin(x_admin_password)
+    db = await run_in_threadpool(SessionLocal)
+    try:
+        importer = await run_in_threadpool(RegistryImporter, db, on_conflict)
+
+        def _add(lines):
+            importer.add_many(read_ndjson(lines))
+
+        # Lines are parsed and written in worker threads, a batch at a time
+        pending, rest = [], b""
+        async for piece in request.stream():
+            *lines, rest = (rest + piece).split(b"\n")
+            pending.extend(lines)
+            if len(pending) >= BATCH_SIZE:
+                await run_in_threadpool(_add, pending)
+                pending = []
+        pending.append(rest)
+        await run_in_threadpool(_add, pending)
+        counts = await run_in_threadpool(importer.finish)
+    except (ValueError, json.JSONDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        await run_in_threadpool(db.close)
+    return {"imported": counts}
@@ -0,0 +1,24 @@
+# datatrac/api/routers/system.py
+from fastapi import APIRouter
+
+from datatrac.core.lineage_index import lineage_index
+from ..cache import response_cache
+
+router = APIRouter(
+    prefix="/system",
+    tags=["system"],
+)
+
+@router.get("/lineage-index")
+def get_lineage_index_stats():
+    """
+    Size and freshness of the in-memory lineage index.
+    """
+    return lineage_index.stats()
+
+@router.get("/cache")
+def get_response_cache_stats():
+    """
+    Hit/miss counters and size of the metadata response cache.
+    """
+    return response_cache.stats()
@@ -1,6 +1,6 @@
 # datatrac/api/schemas.py
 import datetime
-from typing import List
+from typing import Any, List
 from pydantic import BaseModel
 
 # Schema for creating a lineage link
@@ -19,6 +19,9 @@ class DatasetBase(BaseModel):
     size_bytes: int | None = None
     download_count: int
     last_downloaded_at: datetime.datetime | None = None
+    # Storage compression; size_bytes above is always the original size
+    codec: str = "none"
+    stored_size_bytes: int | None = None
 
 # Full schema for returning a dataset from the API
 # It includes orm_mode = True to work directly with SQLAlchemy models
@@ -32,7 +35,63 @@ class DatasetSummary(BaseModel):
     hash: str
     name: str
 
+# Node and edge of a transitive lineage graph
+class LineageNode(DatasetSummary):
+    depth: int  # < 0 for ancestors, > 0 for descendants
+
+class LineageEdge(BaseModel):
+    parent: str
+    child: str
+
 # NEW: The response model for the lineage endpoint
+# parents/children are the direct links; nodes/edges hold the whole walk
 class LineageResponse(BaseModel):
     parents: List[DatasetSummary]
-    children: List[DatasetSummary]
\ No newline at end of file
+    children: List[DatasetSummary]
+    root: str
+    nodes: List[LineageNode] = []
+    edges: List[LineageEdge] = []
+
+# Many lineage links in one request (POST /datasets/lineage:batch)
+class LineageBatch(BaseModel):
+    links: List[LineageCreate]
+
+class RejectedLink(LineageEdge):
+    reason: str
+
+class LineageBatchResult(BaseModel):
+    created: int
+    existing: int
+    rejected: List[RejectedLink]
+
+# Schemas for resumable, multi-request uploads
+class UploadSessionCreate(BaseModel):
+    filename: str
+    source: str | None = None
+    size: int | None = None
+
+class UploadSessionStatus(BaseModel):
+    upload_id: str
+    filename: str
+    offset: int
+    total_size: int | None = None
+
+# A background job (upload, delete, verify); returned with 202 by the
+# endpoints that queue one and by /jobs/{id}
+class Job(BaseModel):
+    id: str
+    kind: str
+    status: str
+    attempts: int
+    max_attempts: int
+    bytes_done: int
+    bytes_total: int | None = None
+    progress: float | None = None
+    elapsed_seconds: float | None = None
+    throughput_bytes_per_second: int | None = None
+    result: Any = None
+    error: str | None = None
+    created_at: datetime.datetime
+    run_after: datetime.datetime
+    started_at: datetime.datetime | None = None
+    finished_at: datetime.datetime | None = None
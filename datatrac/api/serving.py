@@ -0,0 +1,115 @@
+# datatrac/api/serving.py
+"""
+Helpers for serving dataset content over HTTP.
+
+Objects are immutable per hash, so the hash is a strong ETag and responses
+may be cached forever. Single byte ranges (`Range` / `If-Range`) are supported
+so clients can resume interrupted transfers.
+"""
+import os
+import re
+
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# Content never changes for a given hash
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+STREAM_BLOCK_SIZE = 1024 * 1024
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Parses a single `bytes=` range into an inclusive (start, end) pair.
+    Returns None when the whole object should be sent (no header, or a form
+    we do not support such as multiple ranges).
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison (W/ prefixes ignored) is what If-None-Match calls for
+    candidates = {_opaque_tag(tag.strip()) for tag in header.split(",")}
+    return _opaque_tag(etag) in candidates
+
+
+def _opaque_tag(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+class LocalObjectResponse(Response):
+    """
+    Sends (part of) a local file. Uses the ASGI zero-copy extension when the
+    server offers it (the kernel copies straight from the page cache to the
+    socket); otherwise reads blocks in a worker thread.
+    """
+
+    def __init__(self, path: str, start: int, length: int, status_code: int = 200,
+                 headers: dict | None = None, media_type: str | None = None):
+        super().__init__(content=None, status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.start = start
+        self.length = length
+        self.headers["content-length"] = str(length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        fd = await anyio.to_thread.run_sync(os.open, self.path, os.O_RDONLY)
+        try:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": fd,
+                    "offset": self.start,
+                    "count": self.length,
+                    "more_body": False,
+                })
+                return
+
+            offset = self.start
+            remaining = self.length
+            while remaining > 0:
+                block = await anyio.to_thread.run_sync(os.pread, fd, min(STREAM_BLOCK_SIZE, remaining), offset)
+                if not block:
+                    break
+                offset += len(block)
+                remaining -= len(block)
+                await send({"type": "http.response.body", "body": block, "more_body": remaining > 0})
+            if remaining > 0 or self.length == 0:
+                # Close the body even if the file turned out shorter than expected
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            os.close(fd)
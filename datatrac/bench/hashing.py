@@ -0,0 +1,77 @@
+# datatrac/bench/hashing.py
+"""
+Compares hashing throughput (MB/s) of `utils.hash_file` / `utils.hash_files`
+against the original 4 KiB read loop.
+
+    python -m datatrac.bench.hashing --size-mb 512 --files 4
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from datatrac.core import utils
+
+
+def legacy_hash_file(file_path: str) -> str:
+    """The original implementation, kept here as the baseline."""
+    sha256_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for byte_block in iter(lambda: f.read(4096), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
+def make_files(directory: Path, count: int, size_mb: int) -> list[str]:
+    paths = []
+    block = os.urandom(1024 * 1024)
+    for i in range(count):
+        path = directory / f"bench_{i}.bin"
+        with open(path, "wb") as f:
+            for _ in range(size_mb):
+                f.write(block)
+        paths.append(str(path))
+    return paths
+
+
+def _measure(label: str, fn, total_bytes: int) -> dict:
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    mb_per_s = total_bytes / (1024 * 1024) / elapsed if elapsed else float("inf")
+    return {"name": label, "seconds": round(elapsed, 4), "mb_per_s": round(mb_per_s, 1), "result": result}
+
+
+def run(size_mb: int = 256, files: int = 4, workers: int | None = None) -> list[dict]:
+    with tempfile.TemporaryDirectory(prefix="datatrac-bench-") as tmp:
+        paths = make_files(Path(tmp), files, size_mb)
+        total = size_mb * 1024 * 1024 * files
+
+        results = [
+            _measure("legacy_4k_loop", lambda: [legacy_hash_file(p) for p in paths], total),
+            _measure("hash_file", lambda: [utils.hash_file(p) for p in paths], total),
+            _measure("hash_files_parallel", lambda: list(utils.hash_files(paths, max_workers=workers).values()), total),
+        ]
+
+        # All implementations must agree, otherwise registry hashes would change
+        digests = {tuple(r.pop("result")) for r in results}
+        if len(digests) != 1:
+            raise RuntimeError("Hash mismatch between implementations!")
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=256, help="Size of each generated file in MiB.")
+    parser.add_argument("--files", type=int, default=4, help="Number of files to hash.")
+    parser.add_argument("--workers", type=int, default=None, help="Thread pool size for hash_files.")
+    args = parser.parse_args()
+
+    for r in run(args.size_mb, args.files, args.workers):
+        print(f"{r['name']:<22} {r['seconds']:>8.3f}s {r['mb_per_s']:>10.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
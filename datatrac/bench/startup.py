@@ -0,0 +1,98 @@
+# datatrac/bench/startup.py
+"""
+Measures CLI startup: wall-clock time of `datatrac --help` and
+`datatrac fetch <hash>`, plus the slowest imports from `python -X importtime`.
+
+Exits with status 1 if a limit is exceeded or `--help` imports the database
+layer, so it can guard startup time in CI:
+
+    python -m datatrac.bench.startup --runs 10 --max-help-ms 400
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# Modules that must not be loaded just to print help
+HELP_FORBIDDEN_IMPORTS = ("sqlalchemy", "datatrac.core.db", "datatrac.core.manager", "fastapi")
+
+
+def _cli(*args: str) -> list[str]:
+    return [sys.executable, "-m", "datatrac.cli.main", *args]
+
+
+def wall_clock(args: list[str], runs: int) -> dict:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(_cli(*args), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "command": "datatrac " + " ".join(args),
+        "min_ms": round(min(timings), 1),
+        "median_ms": round(statistics.median(timings), 1),
+    }
+
+
+def import_times(args: list[str]) -> dict[str, int]:
+    """Cumulative import time (microseconds) per module, from -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *_cli(*args)[1:]],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def run(runs: int = 5, file_hash: str = "0000") -> dict:
+    help_imports = import_times(["--help"])
+    return {
+        "help": wall_clock(["--help"], runs),
+        "fetch": wall_clock(["fetch", file_hash], runs),
+        "help_imports": help_imports,
+        "help_forbidden": sorted(
+            m for m in help_imports
+            if any(m == name or m.startswith(name + ".") for name in HELP_FORBIDDEN_IMPORTS)
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Invocations per command.")
+    parser.add_argument("--hash", default="0000", help="Hash (prefix) to fetch; needs a reachable registry.")
+    parser.add_argument("--max-help-ms", type=float, default=None, help="Fail if `--help` takes longer (median).")
+    parser.add_argument("--max-fetch-ms", type=float, default=None, help="Fail if `fetch` takes longer (median).")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to show.")
+    args = parser.parse_args()
+
+    results = run(args.runs, args.hash)
+    for key in ("help", "fetch"):
+        r = results[key]
+        print(f"{r['command']:<28} min {r['min_ms']:>7.1f} ms   median {r['median_ms']:>7.1f} ms")
+
+    print("\nSlowest imports for `datatrac --help` (cumulative):")
+    top_level = {m: t for m, t in results["help_imports"].items() if "." not in m or m.startswith("datatrac.")}
+    for module, micros in sorted(top_level.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {micros / 1000:>8.1f} ms  {module}")
+
+    failures = []
+    if results["help_forbidden"]:
+        failures.append(f"`--help` imports {', '.join(results['help_forbidden'][:5])}")
+    if args.max_help_ms is not None and results["help"]["median_ms"] > args.max_help_ms:
+        failures.append(f"`--help` median {results['help']['median_ms']} ms > {args.max_help_ms} ms")
+    if args.max_fetch_ms is not None and results["fetch"]["median_ms"] > args.max_fetch_ms:
+        failures.append(f"`fetch` median {results['fetch']['median_ms']} ms > {args.max_fetch_ms} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+# datatrac/bench/suite.py
+"""
+Benchmark suite: generates (or reuses) a synthetic registry, then times
+listing, lineage walks, pushes, API routes and CLI startup against it.
+Results are written as JSON so runs can be compared.
+
+    datatrac bench --datasets 100000 --lineage deep --output run.json
+    datatrac bench --compare run.json --max-regression 20
+    python -m datatrac.bench.suite --scenario lineage,api
+
+The suite runs in a child process whose environment points DataTrac at the
+benchmark registry (SQLite in the work directory unless --database-url
+names e.g. a local PostgreSQL) and at local-filesystem storage, so nothing
+touches the real registry or the SSH host.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+SCENARIOS = ("find_all", "lineage", "push", "api", "startup")
+DEFAULT_WORKDIR = Path.home() / ".datatrac" / "bench"
+# Set in the child process that actually runs the benchmarks
+_CHILD_MARKER = "DATATRAC_BENCH_CHILD"
+
+
+def bench_environment(workdir: Path, database_url: str | None, fingerprint: str) -> dict[str, str]:
+    """Environment for the benchmark process: its own home, registry and storage."""
+    env = dict(os.environ)
+    for name in ("DATATRAC_ASYNC_DATABASE_URL", "DATATRAC_OBJECT_CACHE_DIR"):
+        env.pop(name, None)
+    env.update({
+        _CHILD_MARKER: "1",
+        "DATATRAC_HOME": str(workdir / "home"),
+        "DATATRAC_DATABASE_URL": database_url or f"sqlite:///{workdir / f'registry-{fingerprint}.db'}",
+        "DATATRAC_STORAGE": "local",
+        "DATATRAC_LOCAL_STORAGE": str(workdir / "objects"),
+        "DATATRAC_REPLICA": "0",
+    })
+    return env
+
+
+def measure(scenario: str, name: str, fn, repeat: int, warmup: int = 1) -> dict:
+    """Times `fn` `repeat` times after `warmup` untimed calls; `fn` may return a dict of extra fields."""
+    for _ in range(warmup):
+        fn()
+    timings, extra = [], {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extra = fn() or {}
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "scenario": scenario,
+        "name": name,
+        "runs": repeat,
+        "min_ms": round(timings[0], 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        "max_ms": round(timings[-1], 3),
+        **extra,
+    }
+
+
+def _log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+# --- Scenarios ---
+
+def bench_find_all(spec, repeat: int) -> list[dict]:
+    from datatrac.core.db import SessionLocal
+    from datatrac.core.manager import DataManager, encode_cursor
+    from .synthetic import EPOCH
+
+    middle = spec.datasets // 2
+    middle_cursor = encode_cursor(EPOCH + timedelta(seconds=middle), spec.dataset_hash(middle))
+    with SessionLocal() as db:
+        manager = DataManager(db)
+
+        def _find_all():
+            rows = manager.find_all()
+            db.expunge_all()
+            return {"rows": len(rows)}
+
+        def _page(**filters):
+            return lambda: {"rows": len(manager.find_page(**filters)[0])}
+
+        return [
+            measure("find_all", "find_all", _find_all, repeat),
+            measure("find_all", "find_page first 100", _page(limit=100), repeat),
+            measure("find_all", "find_page 100 from the middle", _page(limit=100, after=middle_cursor), repeat),
+            measure("find_all", "find_page name prefix", _page(limit=100, name_prefix="dataset-00001"), repeat),
+        ]
+
+
+def bench_lineage(spec, repeat: int) -> list[dict]:
+    from datatrac.core.db import SessionLocal
+    from datatrac.core.manager import DataManager
+
+    results = []
+    with SessionLocal() as db:
+        manager = DataManager(db)
+        for label, file_hash in spec.samples().items():
+            if label in ("newest", "oldest"):
+                continue
+            results.append(measure(
+                "lineage", f"get_lineage {label}",
+                lambda h=file_hash: {"nodes": sum(map(len, manager.get_lineage(h).values()))}, repeat,
+            ))
+            results.append(measure(
+                "lineage", f"get_lineage_graph {label} depth=100",
+                lambda h=file_hash: {"nodes": len(manager.get_lineage_graph(h, depth=100)["nodes"])}, repeat,
+            ))
+    return results
+
+
+def _write_random_file(path: Path, size: int, rng: random.Random) -> str:
+    import hashlib
+
+    hasher = hashlib.sha256()
+    block_size = 1024 * 1024
+    with open(path, "wb") as f:
+        for offset in range(0, size, block_size):
+            block = rng.randbytes(min(block_size, size - offset))
+            hasher.update(block)
+            f.write(block)
+    return hasher.hexdigest()
+
+
+def _forget(db, hashes: list[str]):
+    """Removes benchmark pushes from the registry, so every run starts from the same state."""
+    from sqlalchemy import delete, select
+    from datatrac.core import models
+
+    chunk_hashes = set(db.scalars(
+        select(models.DatasetChunk.chunk_hash).where(models.DatasetChunk.dataset_hash.in_(hashes))
+    ))
+    db.execute(delete(models.LocalCopy).where(models.LocalCopy.dataset_hash.in_(hashes)))
+    db.execute(delete(models.DatasetChunk).where(models.DatasetChunk.dataset_hash.in_(hashes)))
+    db.execute(delete(models.Dataset).where(models.Dataset.hash.in_(hashes)))
+    if chunk_hashes:
+        still_used = set(db.scalars(
+            select(models.DatasetChunk.chunk_hash).where(models.DatasetChunk.chunk_hash.in_(chunk_hashes))
+        ))
+        db.execute(delete(models.Chunk).where(models.Chunk.hash.in_(chunk_hashes - still_used)))
+    db.commit()
+
+
+def bench_push(spec, repeat: int, files: int, size_mb: float, workdir: Path) -> list[dict]:
+    from datatrac.core.db import SessionLocal
+    from datatrac.core.manager import DataManager
+
+    size = int(size_mb * 1024 * 1024)
+    results = []
+    with SessionLocal() as db, tempfile.TemporaryDirectory(dir=workdir, prefix="push-") as tmp:
+        manager = DataManager(db)
+        for chunked in (False, True):
+            label = "chunked" if chunked else "whole file"
+            # New content for every run (a known hash is not uploaded
+            # again), but the same content on every invocation
+            rng = random.Random(f"{spec.seed}:{label}")
+            rounds = []
+            for run in range(repeat):
+                paths, hashes = [], []
+                for i in range(files):
+                    path = Path(tmp) / f"{label.replace(' ', '-')}-{run}-{i}.bin"
+                    hashes.append(_write_random_file(path, size, rng))
+                    paths.append(path)
+                rounds.append((paths, hashes))
+            all_hashes = [h for _, hashes in rounds for h in hashes]
+            _forget(db, all_hashes)
+            pending = iter(rounds)
+
+            def _push_round():
+                paths, _ = next(pending)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    for path in paths:
+                        manager.push_dataset(str(path), source="datatrac-bench", chunked=chunked)
+                return {}
+
+            try:
+                result = measure("push", f"push_dataset {files}x{size_mb:g} MiB ({label})", _push_round, repeat, warmup=0)
+            finally:
+                _forget(db, all_hashes)
+            result["mb_per_s"] = round(files * size / (1024 * 1024) / (result["median_ms"] / 1000), 1)
+            results.append(result)
+    return results
+
+
+def bench_api(spec, repeat: int) -> list[dict]:
+    from fastapi.testclient import TestClient
+    from datatrac.api.main import app
+    from datatrac.core.manager import encode_cursor
+    from .synthetic import EPOCH
+
+    samples = spec.samples()
+    middle = spec.datasets // 2
+    middle_cursor = encode_cursor(EPOCH + timedelta(seconds=middle), spec.dataset_hash(middle))
+    routes = [
+        ("list first page", "/datasets/?limit=100"),
+        ("list page from the middle", f"/datasets/?limit=100&after={middle_cursor}"),
+        ("dataset details", f"/datasets/{samples['newest']}"),
+        ("search", "/datasets/search?q=dataset-00042"),
+    ]
+    for label in ("deep_middle", "wide_hub", "random_node"):
+        if label in samples:
+            routes.append((f"lineage {label} depth=100", f"/datasets/{samples[label]}/lineage?depth=100"))
+
+    results = []
+    start = time.perf_counter()
+    with TestClient(app) as client:
+        # Loading the lineage index and starting the job workers
+        startup_ms = round((time.perf_counter() - start) * 1000, 3)
+        results.append({"scenario": "api", "name": "server startup", "runs": 1, "min_ms": startup_ms, "median_ms": startup_ms})
+
+        def _get(url: str):
+            response = client.get(url)
+            response.raise_for_status()
+            return {"bytes": len(response.content)}
+
+        for label, url in routes:
+            results.append(measure("api", f"GET {label}", lambda url=url: _get(url), repeat))
+    return results
+
+
+def bench_startup(spec, repeat: int) -> list[dict]:
+    from . import startup
+
+    results = []
+    for args in (["--help"], ["fetch", spec.samples()["newest"][:12]]):
+        timing = startup.wall_clock(args, repeat)
+        results.append({
+            "scenario": "startup", "name": timing["command"], "runs": repeat,
+            "min_ms": timing["min_ms"], "median_ms": timing["median_ms"],
+        })
+    return results
+
+
+# --- Running and comparing ---
+
+def _environment_info() -> dict:
+    from importlib.metadata import PackageNotFoundError, version
+    from datatrac.core.db import get_engine
+
+    try:
+        datatrac_version = version("datatrac")
+    except PackageNotFoundError:
+        datatrac_version = "unknown"
+    engine = get_engine()
+    with engine.connect() as connection:
+        server_version = ".".join(map(str, connection.dialect.server_version_info or ()))
+    return {
+        "datatrac": datatrac_version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "database": f"{engine.dialect.name} {server_version}".strip(),
+    }
+
+
+def run(spec, scenarios: list[str], repeat: int, push_files: int, push_size_mb: float, workdir: Path) -> dict:
+    """Runs the benchmarks in this process; DataTrac must already point at the benchmark registry."""
+    from datatrac.core import schema
+    from datatrac.core.db import SessionLocal
+    from datatrac.core.manager import get_current_user
+    from datatrac.core.storage import get_storage_backend
+    from . import synthetic
+
+    schema.upgrade()
+    _log(f"Preparing a registry of {spec.datasets:,} datasets ({spec.lineage} lineage)...")
+    with SessionLocal() as db:
+        # The current user is one of them, so find_all's local-copy rule has rows to match
+        users = [get_current_user()] + [f"user{i:04d}" for i in range(spec.users - 1)]
+        registry = synthetic.generate(db, spec, users, get_storage_backend().root)
+    _log("Reusing the registry generated earlier." if registry["reused"] else f"Generated in {registry['seconds']:.1f}s.")
+
+    runners = {
+        "find_all": lambda: bench_find_all(spec, repeat),
+        "lineage": lambda: bench_lineage(spec, repeat),
+        "push": lambda: bench_push(spec, repeat, push_files, push_size_mb, workdir),
+        "api": lambda: bench_api(spec, repeat),
+        "startup": lambda: bench_startup(spec, repeat),
+    }
+    results = []
+    for scenario in scenarios:
+        _log(f"Running {scenario}...")
+        for result in runners[scenario]():
+            results.append(result)
+            _log(f"  {result['name']:<48} median {result['median_ms']:>10.2f} ms")
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "environment": _environment_info(),
+        "spec": asdict(spec),
+        "fingerprint": spec.fingerprint(),
+        "registry": registry,
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict) -> list[dict]:
+    """Median change per benchmark present in both runs (positive = slower)."""
+    before = {(r["scenario"], r["name"]): r["median_ms"] for r in baseline.get("results", [])}
+    changes = []
+    for result in current["results"]:
+        key = (result["scenario"], result["name"])
+        if before.get(key):
+            changes.append({
+                "scenario": key[0], "name": key[1],
+                "baseline_ms": before[key], "median_ms": result["median_ms"],
+                "change_pct": round((result["median_ms"] / before[key] - 1) * 100, 1),
+            })
+    return changes
+
+
+def _parser() -> argparse.ArgumentParser:
+    from .synthetic import SHAPES
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--datasets", "-n", type=int, default=10_000, help="Datasets in the synthetic registry.")
+    parser.add_argument("--lineage", choices=SHAPES, default="mixed", help="Shape of the lineage graph.")
+    parser.add_argument("--depth", type=int, default=50, help="Chain length of deep lineage.")
+    parser.add_argument("--width", type=int, default=200, help="Children per hub of wide lineage.")
+    parser.add_argument("--users", type=int, default=20, help="Users with local copies.")
+    parser.add_argument("--copies-per-user", type=int, default=500, help="LocalCopy rows per user.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic registry and pushed files.")
+    parser.add_argument("--scenario", "-s", default=",".join(SCENARIOS), help=f"Comma-separated: {', '.join(SCENARIOS)}.")
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="Timed runs per benchmark.")
+    parser.add_argument("--push-files", type=int, default=4, help="Files per push run.")
+    parser.add_argument("--push-size-mb", type=float, default=16, help="Size of each pushed file in MiB.")
+    parser.add_argument("--database-url", default=None, help="Registry to use instead of SQLite in the work directory (must be empty or a registry generated from the same options).")
+    parser.add_argument("--workdir", type=Path, default=DEFAULT_WORKDIR, help="Where registries, objects and pushed files are kept.")
+    parser.add_argument("--output", "-o", default="-", help="JSON results file ('-' for stdout).")
+    parser.add_argument("--compare", default=None, help="Earlier JSON results to compare against.")
+    parser.add_argument("--max-regression", type=float, default=None, help="With --compare: fail if a median got slower by more than this many percent.")
+    return parser
+
+
+def launch(argv: list[str]) -> int:
+    """Runs the suite with `argv` in a child process pointed at the benchmark registry."""
+    args = _parser().parse_args(argv)
+    spec = _spec(args)
+    args.workdir.mkdir(parents=True, exist_ok=True)
+    env = bench_environment(args.workdir.resolve(), args.database_url, spec.fingerprint())
+    return subprocess.call([sys.executable, "-m", "datatrac.bench.suite", *argv], env=env)
+
+
+def _spec(args):
+    from .synthetic import RegistrySpec
+
+    return RegistrySpec(
+        datasets=args.datasets, lineage=args.lineage, depth=args.depth, width=args.width,
+        users=args.users, copies_per_user=args.copies_per_user, seed=args.seed,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if os.environ.get(_CHILD_MARKER) != "1":
+        return launch(argv)
+
+    args = _parser().parse_args(argv)
+    scenarios = [s.strip() for s in args.scenario.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        _log(f"Unknown scenario(s): {', '.join(sorted(unknown))}. Choose from: {', '.join(SCENARIOS)}")
+        return 2
+    report = run(_spec(args), scenarios, args.repeat, args.push_files, args.push_size_mb, args.workdir.resolve())
+
+    failed = False
+    if args.compare:
+        with open(args.compare) as f:
+            report["comparison"] = compare(report, json.load(f))
+        _log("\nChange against the baseline (median):")
+        for change in report["comparison"]:
+            _log(f"  {change['name']:<48} {change['baseline_ms']:>10.2f} -> {change['median_ms']:>10.2f} ms  {change['change_pct']:+6.1f}%")
+            if args.max_regression is not None and change["change_pct"] > args.max_regression:
+                failed = True
+
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        Path(args.output).write_text(text + "\n")
+        _log(f"Results written to {args.output}")
+    if failed:
+        _log(f"FAIL: at least one benchmark is more than {args.max_regression:g}% slower than the baseline.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+# datatrac/bench/synthetic.py
+"""
+Generates synthetic registries for the benchmarks: datasets, a lineage DAG
+of a chosen shape and LocalCopy rows for many users.
+
+Everything is derived from a `RegistrySpec` and its seed: hashes, names,
+timestamps and edges are the same on every run, so a generated registry can
+be reused and results from different runs compare like for like. The spec's
+fingerprint is stored in the `datatrac_bench` table of the target database;
+a database holding some other registry is never written to.
+
+Lineage shapes:
+
+- deep: chains of `depth` datasets (long ancestor/descendant walks)
+- wide: hubs with `width` children each (huge fan-out)
+- random: every dataset gets up to three parents among earlier datasets
+- mixed: a third of the datasets in each of the above
+- none: no lineage
+"""
+import hashlib
+import json
+import random
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+from sqlalchemy import Column, MetaData, String, Table, func, insert, select
+from sqlalchemy.orm import Session
+
+from datatrac.core import models
+
+SHAPES = ("deep", "wide", "random", "mixed", "none")
+INSERT_BATCH_SIZE = 10_000
+# Fixed so timestamps (and keyset cursors) are the same on every run
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+_bench_metadata = MetaData()
+bench_info = Table(
+    "datatrac_bench", _bench_metadata,
+    Column("key", String, primary_key=True),
+    Column("value", String, nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class RegistrySpec:
+    datasets: int = 10_000
+    lineage: str = "mixed"
+    # Chain length for "deep", fan-out for "wide"
+    depth: int = 50
+    width: int = 200
+    users: int = 20
+    copies_per_user: int = 500
+    inactive_fraction: float = 0.02
+    seed: int = 0
+
+    def __post_init__(self):
+        if self.lineage not in SHAPES:
+            raise ValueError(f"Unknown lineage shape '{self.lineage}'. Choose from: {', '.join(SHAPES)}")
+        if self.datasets < 1:
+            raise ValueError("A synthetic registry needs at least one dataset.")
+
+    def fingerprint(self) -> str:
+        return hashlib.sha1(json.dumps(asdict(self), sort_keys=True).encode()).hexdigest()[:12]
+
+    def dataset_hash(self, index: int) -> str:
+        return hashlib.sha256(f"datatrac-bench:{self.seed}:{index}".encode()).hexdigest()
+
+    def _segments(self) -> list[tuple[str, int, int]]:
+        """(shape, first index, end index) ranges of the dataset indexes."""
+        if self.lineage != "mixed":
+            return [(self.lineage, 0, self.datasets)]
+        third = self.datasets // 3
+        return [("deep", 0, third), ("wide", third, 2 * third), ("random", 2 * third, self.datasets)]
+
+    def iter_edges(self) -> Iterator[tuple[int, int]]:
+        """(parent index, child index); parents always come first, so the graph is acyclic."""
+        rng = random.Random(self.seed)
+        for shape, start, end in self._segments():
+            if shape == "deep":
+                for i in range(start, end):
+                    if (i - start) % self.depth:
+                        yield i - 1, i
+            elif shape == "wide":
+                for i in range(start, end):
+                    offset = (i - start) % (self.width + 1)
+                    if offset:
+                        yield i - offset, i
+            elif shape == "random":
+                for i in range(start + 1, end):
+                    for parent in {rng.randrange(start, i) for _ in range(rng.randint(0, 3))}:
+                        yield parent, i
+
+    def samples(self) -> dict[str, str]:
+        """Hashes of datasets worth looking at: the middle of a long chain, a hub, an ordinary node."""
+        samples = {"newest": self.dataset_hash(self.datasets - 1), "oldest": self.dataset_hash(0)}
+        for shape, start, end in self._segments():
+            if end <= start:
+                continue
+            if shape == "deep":
+                chain = min(self.depth, end - start)
+                samples["deep_middle"] = self.dataset_hash(start + chain // 2)
+            elif shape == "wide":
+                samples["wide_hub"] = self.dataset_hash(start)
+            elif shape == "random":
+                samples["random_node"] = self.dataset_hash((start + end) // 2)
+        return samples
+
+
+def _batches(rows: Iterator[dict], size: int = INSERT_BATCH_SIZE) -> Iterator[list[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _dataset_rows(spec: RegistrySpec, storage_root: str) -> Iterator[dict]:
+    rng = random.Random(spec.seed)
+    sources = [f"https://data.example.org/source-{i}" for i in range(50)]
+    for i in range(spec.datasets):
+        file_hash = spec.dataset_hash(i)
+        size = int(rng.lognormvariate(16, 2))
+        yield {
+            "hash": file_hash,
+            "name": f"dataset-{i:07d}.csv",
+            "source": sources[i % len(sources)],
+            "registry_path": f"{storage_root}/{file_hash}.csv",
+            "created_at": EPOCH + timedelta(seconds=i),
+            "is_active": rng.random() >= spec.inactive_fraction,
+            "size_bytes": size,
+            "download_count": rng.randrange(100),
+            "storage_format": "file",
+            "codec": "none",
+            "stored_size_bytes": size,
+        }
+
+
+def _copy_rows(spec: RegistrySpec, users: list[str]) -> Iterator[dict]:
+    rng = random.Random(spec.seed + 1)
+    per_user = min(spec.copies_per_user, spec.datasets)
+    for user in users:
+        for i in rng.sample(range(spec.datasets), per_user):
+            yield {
+                "dataset_hash": spec.dataset_hash(i),
+                "user_identifier": user,
+                "local_path": f"/home/{user}/data/dataset-{i:07d}.csv",
+            }
+
+
+def registry_state(db: Session) -> tuple[str | None, int]:
+    """(fingerprint of the synthetic registry, number of datasets) of the database."""
+    _bench_metadata.create_all(db.get_bind())
+    fingerprint = db.scalar(select(bench_info.c.value).where(bench_info.c.key == "fingerprint"))
+    return fingerprint, db.scalar(select(func.count()).select_from(models.Dataset))
+
+
+def generate(db: Session, spec: RegistrySpec, users: list[str], storage_root: str) -> dict:
+    """
+    Fills an empty registry (schema already migrated) according to `spec`.
+    Returns what was written and how long it took. Reuses the registry if it
+    was generated from the same spec before.
+    """
+    fingerprint, existing = registry_state(db)
+    if fingerprint == spec.fingerprint():
+        return {"reused": True, "datasets": existing, "seconds": 0.0}
+    if existing:
+        raise RuntimeError(
+            "The benchmark database already holds a different registry; point the benchmark at an empty database."
+        )
+
+    start = time.perf_counter()
+    counts = {"datasets": 0, "lineage": 0, "local_copies": 0}
+    tables = {
+        "datasets": (models.Dataset.__table__, _dataset_rows(spec, storage_root)),
+        "lineage": (models.Lineage.__table__, (
+            {"parent_hash": spec.dataset_hash(parent), "child_hash": spec.dataset_hash(child)}
+            for parent, child in spec.iter_edges()
+        )),
+        "local_copies": (models.LocalCopy.__table__, _copy_rows(spec, users)),
+    }
+    # One transaction: a failed run leaves the database empty, not half-filled
+    try:
+        for name, (table, rows) in tables.items():
+            for batch in _batches(rows):
+                db.execute(insert(table), batch)
+                counts[name] += len(batch)
+        db.execute(insert(bench_info), [
+            {"key": "fingerprint", "value": spec.fingerprint()},
+            {"key": "spec", "value": json.dumps(asdict(spec))},
+        ])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return {"reused": False, **counts, "seconds": round(time.perf_counter() - start, 3)}
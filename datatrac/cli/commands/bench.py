@@ -0,0 +1,49 @@
+# datatrac/cli/commands/bench.py
+from pathlib import Path
+from typing import Optional
+import typer
+from typing_extensions import Annotated
+
+app = typer.Typer(help="Benchmark listing, lineage, push, the API and CLI startup on a synthetic registry.")
+
+@app.callback(invoke_without_command=True)
+def bench(
+    datasets: Annotated[int, typer.Option("--datasets", "-n", min=1, help="Datasets in the synthetic registry (e.g. 10000 to 1000000).")] = 10_000,
+    lineage: Annotated[str, typer.Option("--lineage", help="Lineage shape: deep, wide, random, mixed or none.")] = "mixed",
+    depth: Annotated[int, typer.Option("--depth", min=2, help="Chain length of deep lineage.")] = 50,
+    width: Annotated[int, typer.Option("--width", min=1, help="Children per hub of wide lineage.")] = 200,
+    users: Annotated[int, typer.Option("--users", min=1, help="Users with local copies.")] = 20,
+    copies_per_user: Annotated[int, typer.Option("--copies-per-user", min=0, help="LocalCopy rows per user.")] = 500,
+    seed: Annotated[int, typer.Option("--seed", help="Seed of the synthetic registry and pushed files.")] = 0,
+    scenario: Annotated[str, typer.Option("--scenario", "-s", help="Comma-separated: find_all, lineage, push, api, startup.")] = "find_all,lineage,push,api,startup",
+    repeat: Annotated[int, typer.Option("--repeat", "-r", min=1, help="Timed runs per benchmark.")] = 5,
+    push_files: Annotated[int, typer.Option("--push-files", min=1, help="Files per push run.")] = 4,
+    push_size_mb: Annotated[float, typer.Option("--push-size-mb", help="Size of each pushed file in MiB.")] = 16,
+    database_url: Annotated[Optional[str], typer.Option("--database-url", help="Benchmark registry, e.g. a local PostgreSQL (default: SQLite in the work directory). Must be empty or generated with the same options.")] = None,
+    workdir: Annotated[Path, typer.Option("--workdir", help="Where generated registries, objects and pushed files are kept.")] = Path.home() / ".datatrac" / "bench",
+    output: Annotated[str, typer.Option("--output", "-o", help="JSON results file ('-' for stdout).")] = "-",
+    compare: Annotated[Optional[Path], typer.Option("--compare", help="Earlier JSON results to compare against.")] = None,
+    max_regression: Annotated[Optional[float], typer.Option("--max-regression", help="With --compare: exit 1 if a median is this many percent slower.")] = None,
+):
+    """
+    Generate a synthetic registry (reused by later runs with the same
+    options) and time DataTrac against it. Runs against local storage and
+    never touches the configured registry. Progress goes to stderr, the
+    JSON results to --output.
+    """
+    from datatrac.bench import suite
+
+    argv = [
+        "--datasets", str(datasets), "--lineage", lineage, "--depth", str(depth), "--width", str(width),
+        "--users", str(users), "--copies-per-user", str(copies_per_user), "--seed", str(seed),
+        "--scenario", scenario, "--repeat", str(repeat),
+        "--push-files", str(push_files), "--push-size-mb", str(push_size_mb),
+        "--workdir", str(workdir), "--output", output,
+    ]
+    if database_url:
+        argv += ["--database-url", database_url]
+    if compare:
+        argv += ["--compare", str(compare)]
+    if max_regression is not None:
+        argv += ["--max-regression", str(max_regression)]
+    raise typer.Exit(suite.launch(argv))
@@ -0,0 +1,45 @@
+# datatrac/cli/commands/cache.py
+from typing import Optional
+import typer
+from typing_extensions import Annotated
+from rich.console import Console
+from .fetch import format_size
+
+app = typer.Typer(help="Inspect and maintain the local dataset cache.")
+console = Console()
+
+
+def _cache():
+    from datatrac.core.object_cache import get_object_cache
+
+    cache = get_object_cache()
+    if cache is None:
+        console.print("The local cache is disabled (DATATRAC_OBJECT_CACHE=0).")
+        raise typer.Exit(1)
+    return cache
+
+@app.command()
+def info():
+    """Show where the cache is and how much it holds."""
+    stats = _cache().stats()
+    console.print(f"[cyan]Path:[/cyan] {stats['path']}")
+    console.print(f"[cyan]Objects:[/cyan] {stats['objects']}")
+    console.print(f"[cyan]Size:[/cyan] {format_size(stats['bytes'])} of {format_size(stats['max_bytes'])}")
+
+@app.command()
+def prune(
+    max_gb: Annotated[Optional[float], typer.Option("--max-gb", help="Shrink to this size (default: the configured limit).")] = None,
+):
+    """Evict least recently used objects until the cache fits."""
+    max_bytes = int(max_gb * 1024**3) if max_gb is not None else None
+    freed = _cache().evict(max_bytes)
+    console.print(f"✅ Freed {format_size(freed)}.")
+
+@app.command()
+def verify():
+    """Re-hash every cached object and drop corrupt ones."""
+    corrupt = _cache().verify()
+    if corrupt:
+        console.print(f"[yellow]Removed {len(corrupt)} corrupt object(s).[/yellow]")
+    else:
+        console.print("✅ All cached objects match their hashes.")
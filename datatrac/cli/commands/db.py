@@ -0,0 +1,54 @@
+# datatrac/cli/commands/db.py
+import typer
+from typing_extensions import Annotated
+from rich.console import Console
+
+app = typer.Typer(help="Manage the registry database schema.")
+console = Console()
+
+@app.command()
+def upgrade(
+    revision: Annotated[str, typer.Argument(help="Target revision.")] = "head",
+):
+    """
+    Create or migrate the registry tables. Run once after installing or
+    upgrading DataTrac.
+    """
+    from datatrac.core import schema
+
+    before, after = schema.upgrade(revision)
+    if before == after:
+        console.print(f"✅ Database schema is up to date (revision [cyan]{after}[/cyan]).")
+    else:
+        console.print(f"✅ Database schema upgraded: [yellow]{before or 'empty'}[/yellow] -> [cyan]{after}[/cyan].")
+
+@app.command()
+def current():
+    """Show the schema revision of the registry database."""
+    from datatrac.core import schema
+
+    revision, head = schema.current_revision(), schema.head_revision()
+    status = "[green]up to date[/green]" if revision == head else f"[yellow]run `datatrac db upgrade` (latest: {head})[/yellow]"
+    console.print(f"Revision: [cyan]{revision or 'none'}[/cyan] — {status}")
+
+@app.command()
+def sync(
+    full: Annotated[bool, typer.Option("--full", help="Discard the replica and copy everything again.")] = False,
+):
+    """Bring the local replica (DATATRAC_REPLICA=1) up to date with the registry."""
+    import time
+    from datatrac.core.db import SessionLocal
+    from datatrac.core.replica import get_replica
+
+    replica = get_replica()
+    if replica is None:
+        console.print("The local replica is disabled; set DATATRAC_REPLICA=1 to use it.")
+        raise typer.Exit(1)
+
+    start = time.perf_counter()
+    with SessionLocal() as central:
+        counts = replica.sync(central, full=full)
+    elapsed = time.perf_counter() - start
+    copied = ", ".join(f"{count} {table}" for table, count in counts.items())
+    console.print(f"✅ Replica synced in {elapsed:.2f}s ({copied}).")
+    console.print(f"   Path: [green]{replica.path}[/green]")
@@ -3,8 +3,6 @@ import typer
 from typing import Optional
 from typing_extensions import Annotated
 from rich.console import Console
-from datatrac.core.db import get_db
-from datatrac.core.manager import DataManager
 
 ADMIN_PASSWORD = "admin"
 app = typer.Typer(help="Delete a dataset remotely (admin) or locally.")
@@ -12,13 +10,22 @@ console = Console()
 
 @app.callback(invoke_without_command=True)
 def delete(
-    hash_to_delete: Annotated[str, typer.Argument(help="Full hash of the dataset to delete.")],
+    hash_to_delete: Annotated[str, typer.Argument(help="Hash of the dataset to delete, or a unique prefix of it.")],
     local: Annotated[bool, typer.Option("--local", "-l", help="Delete the dataset from the local machine only.")] = False,
     password: Annotated[Optional[str], typer.Option(help="Admin password for remote deletion.")] = None,
 ):
+    from datatrac.core.db import get_db
+    from datatrac.core.manager import DataManager
+
     db = next(get_db())
     manager = DataManager(db)
 
+    try:
+        hash_to_delete = manager.resolve_hash(hash_to_delete)
+    except (FileNotFoundError, ValueError) as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        raise typer.Exit(code=1)
+
     if local:
         success, message = manager.delete_local_copy(hash_to_delete)
         if success:
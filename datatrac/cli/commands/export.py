@@ -0,0 +1,36 @@
+# datatrac/cli/commands/export.py
+from typing import List, Optional
+import typer
+from typing_extensions import Annotated
+from rich.console import Console
+
+app = typer.Typer(help="Export registry metadata as NDJSON.")
+# The export itself may go to stdout
+console = Console(stderr=True)
+
+@app.callback(invoke_without_command=True)
+def export(
+    output: Annotated[str, typer.Argument(help="File to write (.gz/.zst are compressed), or - for stdout.")] = "-",
+    tables: Annotated[Optional[List[str]], typer.Option("--table", "-t", help="Table to export (repeatable). Default: all.")] = None,
+):
+    """
+    Stream datasets, chunks, lineage and local copies out of the registry,
+    e.g. to mirror it or to seed a test environment with `datatrac import`.
+    """
+    import time
+    from datatrac.core.db import SessionLocal
+    from datatrac.core.registry_io import iter_ndjson, open_export, parse_tables
+
+    try:
+        tables = parse_tables(tables)
+    except ValueError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        raise typer.Exit(1)
+
+    start = time.perf_counter()
+    written = 0
+    with SessionLocal() as db, open_export(output, "wb") as out:
+        for chunk in iter_ndjson(db, tables):
+            out.write(chunk)
+            written += len(chunk)
+    console.print(f"✅ Exported {', '.join(tables)} ({written / 1024**2:.1f} MB) in {time.perf_counter() - start:.1f}s.")
@@ -3,8 +3,6 @@ from typing import Annotated, Optional
 import typer
 from rich.console import Console
 from rich.table import Table
-from datatrac.core.db import get_db
-from datatrac.core.manager import DataManager, get_current_user
 
 app = typer.Typer(help="Fetch dataset information from the registry.")
 console = Console()
@@ -21,15 +19,43 @@ def format_size(size_bytes):
         return f"{size_bytes/1024**2:.2f} MB"
     return f"{size_bytes/1024**3:.2f} GB"
 
+
+def list_column_widths(total_width: int) -> dict[str, int]:
+    """
+    Column widths for `fetch --all` that fit the terminal. Size and Status
+    keep their full width; Name, Hash and Local Path share what is left.
+    """
+    size_width, status_width = 10, len("Deregistered (Local-Only)")
+    # box=None still pads every column by one space on each side
+    free = max(total_width - size_width - status_width - 2 * 5, 3 * 8)
+    hash_width = max(8, min(64, free // 2))
+    name_width = max(8, min(40, (free - hash_width) // 2))
+    path_width = max(8, free - hash_width - name_width)
+    return {"name": name_width, "size": size_width, "hash": hash_width, "path": path_width, "status": status_width}
+
 @app.callback(invoke_without_command=True)
 def fetch(
-    hash_prefix: Annotated[Optional[str], typer.Argument(help="The full hash of the dataset.")] = None,
+    hash_prefix: Annotated[Optional[str], typer.Argument(help="The hash of the dataset, or a unique prefix of it.")] = None,
     list_all: Annotated[bool, typer.Option("--all", "-a", help="List all datasets in the registry.")] = False,
     download: Annotated[bool, typer.Option("--download", help="Download the specified dataset.")] = False,
+    limit: Annotated[Optional[int], typer.Option("--limit", min=1, help="With --all, show at most this many datasets.")] = None,
+    after: Annotated[Optional[str], typer.Option("--after", help="With --all, continue from a cursor printed by --limit.")] = None,
 ):
-    db = next(get_db())
+    from datatrac.core.db import get_db
+    from datatrac.core.manager import DataManager, get_current_user
+    from datatrac.core.replica import get_read_db
+
+    # Downloads write to the registry; everything else may use the local replica
+    db = next(get_db() if download else get_read_db())
     manager = DataManager(db)
 
+    if hash_prefix:
+        try:
+            hash_prefix = manager.resolve_hash(hash_prefix)
+        except (FileNotFoundError, ValueError) as e:
+            console.print(f"[bold red]Error:[/bold red] {e}")
+            raise typer.Exit(code=1)
+
     if download:
         if not hash_prefix:
             console.print("[bold red]Error:[/bold red] You must provide a dataset hash to download.")
@@ -44,23 +70,43 @@ def fetch(
         return
 
     if list_all:
-        datasets = manager.find_all()
-        if not datasets:
-            console.print("No datasets found in the registry.")
-            return
-        
         console.print(f"Viewing as user: [bold yellow]{get_current_user()}[/bold yellow]")
-        # NEW: Added Size to the table view
-        table = Table("Name", "Size", "Hash", "Your Local Path", "Status")
-        for ds in datasets:
-            status = "[green]Active[/green]"
-            if not ds.is_active:
-                status = "[dim red]Deregistered[/dim red] (Local-Only)"
+        next_cursor = None
+        if limit or after:
+            try:
+                rows, next_cursor = manager.find_page(limit=limit or 100, after=after)
+            except ValueError as e:
+                console.print(f"[bold red]Error:[/bold red] {e}")
+                raise typer.Exit(code=1)
+            local_paths = manager.find_local_paths_for_user([row.hash for row in rows])
+            batches = [[(row, local_paths.get(row.hash)) for row in rows]] if rows else []
+        else:
+            batches = manager.iter_all_with_local_paths()
 
-            local_path = manager.find_local_path_for_user(ds.hash)
-            local_path_display = str(local_path) if local_path else "N/A (Remote)"
-            table.add_row(ds.name, format_size(ds.size_bytes), ds.hash, local_path_display, status)
-        console.print(table)
+        # Rows are printed batch by batch as they arrive, so every batch uses
+        # the same column widths, sized to the terminal once
+        widths = list_column_widths(console.width)
+        found_any = False
+        for batch in batches:
+            table = Table(box=None, show_header=not found_any, header_style="bold")
+            table.add_column("Name", width=widths["name"], no_wrap=True, overflow="ellipsis")
+            table.add_column("Size", width=widths["size"], no_wrap=True)
+            table.add_column("Hash", width=widths["hash"], no_wrap=True, overflow="ellipsis")
+            table.add_column("Your Local Path", width=widths["path"], no_wrap=True, overflow="ellipsis")
+            table.add_column("Status", width=widths["status"], no_wrap=True)
+            for ds, local_path in batch:
+                status = "[green]Active[/green]"
+                if not ds.is_active:
+                    status = "[dim red]Deregistered[/dim red] (Local-Only)"
+                local_path_display = str(local_path) if local_path else "N/A (Remote)"
+                table.add_row(ds.name, format_size(ds.size_bytes), ds.hash, local_path_display, status)
+            console.print(table)
+            found_any = True
+
+        if not found_any:
+            console.print("No datasets found in the registry.")
+        if next_cursor:
+            console.print(f"More results: [cyan]datatrac fetch --all --limit {limit or 100} --after {next_cursor}[/cyan]")
         return
     elif hash_prefix:
         dataset = manager.find_by_hash(hash_prefix)
@@ -75,6 +121,9 @@ def fetch(
         console.print(f"[bold]Dataset Details for [cyan]{dataset.name}[/cyan][/bold]")
         console.print(f"  [cyan]Full Hash:[/cyan] {dataset.hash}")
         console.print(f"  [cyan]Size:[/cyan] {format_size(dataset.size_bytes)}")
+        if dataset.codec != "none" and dataset.stored_size_bytes and dataset.size_bytes:
+            ratio = dataset.stored_size_bytes / dataset.size_bytes
+            console.print(f"  [cyan]Stored As:[/cyan] {format_size(dataset.stored_size_bytes)} ({dataset.codec}, {ratio:.0%} of original)")
         console.print(f"  [cyan]Source URL:[/cyan] {dataset.source or 'N/A'}")
         console.print(f"  [cyan]Your Local Path:[/cyan] {local_path_display}")
         console.print(f"  [cyan]Registry Path:[/cyan] {dataset.registry_path}")
@@ -0,0 +1,32 @@
+# datatrac/cli/commands/import_.py
+import typer
+from typing_extensions import Annotated
+from rich.console import Console
+
+app = typer.Typer(help="Import registry metadata exported with `datatrac export`.")
+console = Console()
+
+@app.callback(invoke_without_command=True)
+def import_(
+    source: Annotated[str, typer.Argument(help="Export file (.gz/.zst are decompressed), or - for stdin.")],
+    update: Annotated[bool, typer.Option("--update", help="Overwrite rows that already exist instead of skipping them.")] = False,
+):
+    """
+    Bulk load datasets, chunks, lineage and local copies. Rows are matched
+    by hash (and by dataset and user for local copies).
+    """
+    import json
+    import time
+    from datatrac.core.db import SessionLocal
+    from datatrac.core.registry_io import import_ndjson, open_export
+
+    start = time.perf_counter()
+    try:
+        with SessionLocal() as db, open_export(source, "rb") as f:
+            counts = import_ndjson(db, f, on_conflict="update" if update else "skip")
+    except (ValueError, json.JSONDecodeError, FileNotFoundError) as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        raise typer.Exit(1)
+    summary = ", ".join(f"{count} {table}" for table, count in counts.items() if count)
+    # Rows that already existed are counted too, whether skipped or updated
+    console.print(f"✅ Processed {summary or 'nothing'} in {time.perf_counter() - start:.1f}s.")
@@ -4,27 +4,47 @@ from typing import Optional
 from typing_extensions import Annotated
 from rich.console import Console
 from rich.tree import Tree
-from datatrac.core.db import get_db
-from datatrac.core.manager import DataManager
 
 app = typer.Typer(help="Create or view dataset lineage.")
 console = Console()
 
 @app.callback(invoke_without_command=True)
 def lineage(
-    hash_to_view: Annotated[Optional[str], typer.Argument(help="The hash of the dataset to view lineage for.")] = None,
+    hash_to_view: Annotated[Optional[str], typer.Argument(help="The hash (or a unique prefix) of the dataset to view lineage for.")] = None,
     parent: Annotated[Optional[str], typer.Option("--parent", help="Hash of the parent dataset.")] = None,
     child: Annotated[Optional[str], typer.Option("--child", help="Hash of the child (derived) dataset.")] = None,
+    depth: Annotated[int, typer.Option("--depth", "-d", min=0, max=100, help="How many lineage links to follow when viewing (0 = none).")] = 1,
+    direction: Annotated[str, typer.Option("--direction", help="View ancestors (up), descendants (down) or both.")] = "both",
+    from_file: Annotated[Optional[str], typer.Option("--from-file", help="CSV of parent,child hashes to link in one batch (- for stdin).")] = None,
 ):
     """
     View lineage for a dataset OR create a new lineage link.
 
-    - To VIEW: datatrac lineage <hash>
+    - To VIEW: datatrac lineage --depth N --direction down <hash>
     - To CREATE: datatrac lineage --parent <hash1> --child <hash2>
+    - To CREATE MANY: datatrac lineage --from-file edges.csv
     """
-    db = next(get_db())
+    if from_file:
+        _create_from_file(from_file)
+        return
+
+    from datatrac.core.db import get_db
+    from datatrac.core.manager import DataManager
+    from datatrac.core.replica import get_read_db
+
+    # Viewing may use the local replica; new links are written to the registry
+    db = next(get_read_db() if hash_to_view else get_db())
     manager = DataManager(db)
 
+    # Accept unique hash prefixes everywhere, like git
+    try:
+        hash_to_view = hash_to_view and manager.resolve_hash(hash_to_view)
+        parent = parent and manager.resolve_hash(parent)
+        child = child and manager.resolve_hash(child)
+    except (FileNotFoundError, ValueError) as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        raise typer.Exit(1)
+
     # --- Mode 1: View Lineage ---
     if hash_to_view:
         try:
@@ -33,30 +53,48 @@ def lineage(
                 console.print(f"[red]Dataset with hash {hash_to_view} not found.[/red]")
                 raise typer.Exit(1)
             
-            lineage_data = manager.get_lineage(hash_to_view)
+            graph = manager.get_lineage_graph(hash_to_view, depth=depth, direction=direction)
+            names = {n["hash"]: n["name"] for n in graph["nodes"]}
+            parents_of, children_of = {}, {}
+            for edge in graph["edges"]:
+                parents_of.setdefault(edge["child"], []).append(edge["parent"])
+                children_of.setdefault(edge["parent"], []).append(edge["child"])
+
+            def _label(node_hash):
+                return f"[cyan]{names.get(node_hash)}[/cyan] ([yellow]{node_hash[:12]}...[/yellow])"
+
+            def _add_branch(branch, node_hash, links, seen):
+                # Shared ancestors/descendants are expanded only once
+                for linked in sorted(links.get(node_hash, []), key=lambda h: names.get(h) or ""):
+                    if linked in seen:
+                        branch.add(f"{_label(linked)} [dim](see above)[/dim]")
+                        continue
+                    seen.add(linked)
+                    _add_branch(branch.add(_label(linked)), linked, links, seen)
 
             tree = Tree(f"⛓️ [bold]Lineage for [cyan]{dataset.name}[/cyan] ([yellow]{dataset.hash[:12]}...[/yellow])")
-            
+
             # Add parents
-            if lineage_data["parents"]:
-                parent_branch = tree.add("🔼 [bold green]Parents[/bold green] (Derived From)")
-                for p in lineage_data["parents"]:
-                    parent_branch.add(f"[cyan]{p['name']}[/cyan] ([yellow]{p['hash'][:12]}...[/yellow])")
-            else:
-                 tree.add("🔼 No parents found.")
+            if direction in ("up", "both"):
+                if parents_of.get(dataset.hash):
+                    parent_branch = tree.add("🔼 [bold green]Parents[/bold green] (Derived From)")
+                    _add_branch(parent_branch, dataset.hash, parents_of, {dataset.hash})
+                else:
+                    tree.add("🔼 No parents found.")
 
             # Add children
-            if lineage_data["children"]:
-                child_branch = tree.add("🔽 [bold magenta]Children[/bold magenta] (Derived To)")
-                for c in lineage_data["children"]:
-                    child_branch.add(f"[cyan]{c['name']}[/cyan] ([yellow]{c['hash'][:12]}...[/yellow])")
-            else:
-                tree.add("🔽 No children found.")
+            if direction in ("down", "both"):
+                if children_of.get(dataset.hash):
+                    child_branch = tree.add("🔽 [bold magenta]Children[/bold magenta] (Derived To)")
+                    _add_branch(child_branch, dataset.hash, children_of, {dataset.hash})
+                else:
+                    tree.add("🔽 No children found.")
 
             console.print(tree)
 
-        except (FileNotFoundError, RuntimeError) as e:
+        except (FileNotFoundError, RuntimeError, ValueError) as e:
             console.print(f"[bold red]Error:[/bold red] {e}")
+            raise typer.Exit(1)
 
     # --- Mode 2: Create Lineage ---
     elif parent and child:
@@ -67,9 +105,61 @@ def lineage(
                 f"[yellow]{parent[:8]}...[/yellow] -> [green]{child[:8]}...[/green]"
             )
         except ValueError as e:
+            # e.g. the link would close a cycle
             console.print(f"[bold red]Error:[/bold red] {e}")
+            raise typer.Exit(1)
     
     # --- No valid options provided ---
     else:
         console.print("Usage error: Provide a hash to view, or --parent and --child to create a link.")
-        raise typer.Exit(1)
\ No newline at end of file
+        raise typer.Exit(1)
+
+
+def _read_links(path: str) -> list[tuple[str, str]]:
+    import csv
+    import sys
+
+    f = sys.stdin if path == "-" else open(path, newline="")
+    try:
+        rows = [row for row in csv.reader(f) if row and not row[0].startswith("#")]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    # An optional header row, e.g. "parent,child"
+    if rows and rows[0][0].strip().lower() in ("parent", "parent_hash"):
+        rows = rows[1:]
+    links = []
+    for number, row in enumerate(rows, 1):
+        if len(row) < 2:
+            raise ValueError(f"Row {number} needs a parent and a child hash.")
+        links.append((row[0].strip().lower(), row[1].strip().lower()))
+    return links
+
+
+def _create_from_file(path: str):
+    from datatrac.core.db import get_db
+    from datatrac.core.manager import HASH_LENGTH, DataManager
+
+    try:
+        links = _read_links(path)
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        raise typer.Exit(1)
+
+    manager = DataManager(next(get_db()))
+    # Full hashes are checked in bulk by the batch; only prefixes need a lookup each
+    prefixes = {h for link in links for h in link if len(h) < HASH_LENGTH}
+    try:
+        resolved = {prefix: manager.resolve_hash(prefix) for prefix in prefixes}
+    except (FileNotFoundError, ValueError) as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        raise typer.Exit(1)
+    links = [(resolved.get(parent, parent), resolved.get(child, child)) for parent, child in links]
+
+    result = manager.create_lineage_batch(links)
+    console.print(f"✅ Created {result['created']} lineage link(s); {result['existing']} already existed.")
+    if result["rejected"]:
+        console.print(f"[yellow]Rejected {len(result['rejected'])} link(s):[/yellow]")
+        for link in result["rejected"]:
+            console.print(f"  [yellow]{link['parent'][:12]}[/yellow] -> [green]{link['child'][:12]}[/green]: {link['reason']}")
+        raise typer.Exit(1)
@@ -1,35 +1,63 @@
 # datatrac/cli/commands/push.py
-from typing import Annotated
+from pathlib import Path
+from typing import Annotated, Optional
 import typer
 from rich.console import Console
-from datatrac.core.db import get_db
-from datatrac.core.manager import DataManager
 
 app = typer.Typer(help="Push a dataset to the registry.")
 console = Console()
 
 @app.callback(invoke_without_command=True)
 def push(
-    local_path: Annotated[str, typer.Argument(help="The local path to the dataset file.")],
-    source: Annotated[str, typer.Option("--source", "-s", help="The original source URL of the dataset.")] = None
+    local_path: Annotated[str, typer.Argument(help="The local path to the dataset file or directory.")],
+    source: Annotated[str, typer.Option("--source", "-s", help="The original source URL of the dataset.")] = None,
+    recursive: Annotated[bool, typer.Option("--recursive", "-r", help="Include files in sub-directories when pushing a directory.")] = False,
+    jobs: Annotated[int, typer.Option("--jobs", "-j", min=1, help="Number of files to hash and upload in parallel.")] = 4,
+    chunked: Annotated[Optional[bool], typer.Option("--chunked/--whole-file", help="Store as deduplicated chunks (default: DATATRAC_CHUNKED).")] = None,
 ):
     """
-    Hash a local dataset file and add it to the registry.
+    Hash a local dataset file (or every file in a directory) and add it to the registry.
     """
+    from datatrac.core.db import get_db
+    from datatrac.core.manager import DataManager
+
     try:
         db_session = next(get_db())
         manager = DataManager(db_session)
+
+        path = Path(local_path)
+        if path.is_dir():
+            pattern = path.rglob("*") if recursive else path.glob("*")
+            files = sorted(str(p) for p in pattern if p.is_file())
+            if not files:
+                console.print(f"No files found in {path}.")
+                return
+
+            results, failures = manager.push_many(files, source, jobs=jobs, chunked=chunked)
+            uploaded = sum(1 for _, _, was_uploaded in results if was_uploaded)
+            console.print(
+                f"✅ Registered {len(results)} file(s): "
+                f"[bold cyan]{uploaded}[/bold cyan] uploaded, {len(results) - uploaded} already in the registry."
+            )
+            for failed_path, error in failures.items():
+                console.print(f"[bold red]Failed:[/bold red] {failed_path}: {error}")
+            if failures:
+                raise typer.Exit(code=1)
+            return
+
         # Capture both the dataset and the new boolean flag
-        dataset, was_uploaded = manager.push_dataset(local_path, source)
+        dataset, was_uploaded = manager.push_dataset(local_path, source, chunked=chunked)
 
         # Only print the "success" message if a new upload happened
         if was_uploaded:
             console.print(f"✅ Dataset '[bold cyan]{dataset.name}[/bold cyan]' pushed successfully!")
-        
+
         # Always print the hash
         console.print(f"   Hash: [yellow]{dataset.hash}[/yellow]")
 
+    except typer.Exit:
+        raise
     except FileNotFoundError as e:
         console.print(f"[bold red]Error:[/bold red] {e}")
     except Exception as e:
-        console.print(f"[bold red]An unexpected error occurred:[/bold red] {e}")
\ No newline at end of file
+        console.print(f"[bold red]An unexpected error occurred:[/bold red] {e}")
@@ -0,0 +1,35 @@
+# datatrac/cli/commands/search.py
+import typer
+from typing_extensions import Annotated
+from rich.console import Console
+from rich.table import Table
+from .fetch import format_size
+
+app = typer.Typer(help="Search datasets by name or source.")
+console = Console()
+
+@app.callback(invoke_without_command=True)
+def search(
+    query: Annotated[str, typer.Argument(help="Text to look for in dataset names and sources.")],
+    limit: Annotated[int, typer.Option("--limit", "-n", min=1, help="Show at most this many matches.")] = 20,
+):
+    from datatrac.core.manager import DataManager
+    from datatrac.core.replica import get_read_db
+
+    db = next(get_read_db())
+    manager = DataManager(db)
+
+    rows = manager.search(query, limit=limit)
+    if not rows:
+        console.print(f"No datasets match '{query}'.")
+        return
+
+    table = Table(box=None, header_style="bold")
+    table.add_column("Name", no_wrap=True)
+    table.add_column("Size", no_wrap=True)
+    table.add_column("Hash", no_wrap=True)
+    table.add_column("Source", overflow="fold")
+    for ds in rows:
+        name = ds.name if ds.is_active else f"{ds.name} [dim red](Deregistered)[/dim red]"
+        table.add_row(name, format_size(ds.size_bytes), ds.hash[:12], ds.source or "N/A")
+    console.print(table)
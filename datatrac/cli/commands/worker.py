@@ -0,0 +1,43 @@
+# datatrac/cli/commands/worker.py
+from typing import List, Optional
+import typer
+from typing_extensions import Annotated
+from rich.console import Console
+
+app = typer.Typer(help="Run queued background jobs (uploads, deletes, verification).")
+console = Console()
+
+@app.callback(invoke_without_command=True)
+def worker(
+    kinds: Annotated[Optional[List[str]], typer.Option("--kind", "-k", help="Only run jobs of this kind (repeatable): push, delete, verify.")] = None,
+    concurrency: Annotated[Optional[List[str]], typer.Option("--concurrency", "-c", help="Per-kind limit, e.g. push=4 (repeatable). Default: DATATRAC_JOB_CONCURRENCY.")] = None,
+    burst: Annotated[bool, typer.Option("--burst", help="Exit once the queue is empty instead of waiting for more jobs.")] = False,
+):
+    """
+    Run jobs queued by the API server, e.g. when it is started with
+    DATATRAC_JOBS_IN_PROCESS=0. Push jobs read the server's spooled
+    uploads, so run this where SPOOL_DIR is shared with the server.
+    """
+    import logging
+    from datatrac.core.jobs import WorkerPool
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        limits = {}
+        for item in concurrency or []:
+            kind, _, number = item.partition("=")
+            limits[kind.strip()] = int(number)
+        pool = WorkerPool(kinds=kinds, concurrency=limits)
+    except ValueError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        raise typer.Exit(1)
+
+    summary = ", ".join(f"{kind}={limit}" for kind, limit in pool.limits.items())
+    console.print(f"Worker [cyan]{pool.worker_id}[/cyan] running jobs ({summary}). Press Ctrl+C to stop.")
+    try:
+        pool.run(burst=burst)
+    except KeyboardInterrupt:
+        console.print("Stopping; waiting for running jobs to finish...")
+    finally:
+        pool.stop()
+    console.print(f"✅ Processed {pool.processed} job(s).")
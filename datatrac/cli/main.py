@@ -1,8 +1,13 @@
 # datatrac/cli/main.py
 import typer
+from typing_extensions import Annotated
 from rich.console import Console
-from datatrac.core.db import create_database_tables
-from .commands import fetch, push, lineage, delete
+from rich.table import Table
+# Command modules only import typer/rich at the top; the database layer is
+# imported inside each command, so `--help` never loads SQLAlchemy or a driver
+from .commands import fetch, push, lineage, delete, search, db, cache, export, import_, worker, bench
+from datatrac.core import events, metrics
+from datatrac.core.config import REPLICA_ENABLED
 
 # Initialize rich console for beautiful output
 console = Console()
@@ -19,14 +24,70 @@ app.add_typer(fetch.app, name="fetch")
 app.add_typer(push.app, name="push")
 app.add_typer(lineage.app, name="lineage")
 app.add_typer(delete.app, name="delete")
+app.add_typer(search.app, name="search")
+app.add_typer(db.app, name="db")
+app.add_typer(cache.app, name="cache")
+app.add_typer(export.app, name="export")
+app.add_typer(import_.app, name="import")
+app.add_typer(worker.app, name="worker")
+app.add_typer(bench.app, name="bench")
+
+def _invalidate_replica(**_):
+    from datatrac.core.replica import get_replica
+
+    get_replica().mark_stale()
+
+# NEW: a write made by this command makes the local replica stale, so the
+# next read syncs first and sees it
+if REPLICA_ENABLED:
+    for _event in ("dataset_changed", "dataset_deleted", "lineage_created", "local_copy_changed", "registry_imported"):
+        events.subscribe(_event, _invalidate_replica)
+
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def _print_profile(profile: metrics.Profile, root: metrics.Span):
+    metrics.finish_span(root)
+    elapsed = profile.elapsed()
+    table = Table(
+        title=f"Profile ({elapsed:.3f}s wall)", title_justify="left",
+        caption="Self excludes nested phases; the self time of 'cli' is everything not instrumented (imports, Python code).",
+        caption_justify="left",
+    )
+    table.add_column("Phase", no_wrap=True)
+    for column in ("Calls", "Total", "Self", "% wall", "Bytes", "Rate"):
+        table.add_column(column, justify="right")
+    for name, calls, total, self_seconds, size in profile.rows():
+        table.add_row(
+            name, str(calls), f"{total:.3f}s", f"{self_seconds:.3f}s",
+            f"{100 * self_seconds / elapsed:.1f}" if elapsed else "-",
+            _format_bytes(size) if size else "",
+            f"{_format_bytes(size / total)}/s" if size and total else "",
+        )
+    # Phases run from worker threads (parallel hashing) can add up to more than the wall time
+    Console(stderr=True).print(table)
+
 
 @app.callback()
-def main():
+def main(
+    ctx: typer.Context,
+    profile: Annotated[bool, typer.Option("--profile", help="Print a breakdown of where the time went (hashing, transfers, SQL) when the command finishes.")] = False,
+):
     """
     Manage your datasets with DataTrac.
     """
-    # This is a good place to ensure the database and tables are created
-    create_database_tables()
+    # NEW: the breakdown is printed when the command's context closes, also on errors
+    if profile:
+        recorder = metrics.enable_profile()
+        if recorder is not None:
+            root = metrics.start_span("cli", command=ctx.invoked_subcommand)
+            ctx.call_on_close(lambda: _print_profile(recorder, root))
+    # NEW: Tables are no longer created on every run (a DDL round-trip to the
+    # registry); run `datatrac db upgrade` once after installing instead.
 
 if __name__ == "__main__":
     app()
\ No newline at end of file
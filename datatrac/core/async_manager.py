@@ -0,0 +1,96 @@
+# datatrac/core/async_manager.py
+"""
+Async access to `DataManager` for the API server.
+
+Metadata operations run on an `AsyncSession`: SQLAlchemy executes the
+ordinary (sync) DataManager code through `run_sync`, so every query is sent
+by the asyncio driver and the event loop never blocks on the database.
+
+Transfers (uploads to the registry, downloads, hashing, remote deletes)
+block on disk and network I/O, so they run in worker threads with their own
+sync session.
+"""
+import asyncio
+from functools import partial
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db import SessionLocal
+from .manager import DataManager
+from .storage import StorageBackend, get_storage_backend
+
+def TransferSession():
+    """
+    A session for worker threads. Results are returned to the event loop
+    after the session is closed, so they must not be expired on commit.
+    """
+    return SessionLocal(expire_on_commit=False)
+
+
+class AsyncDataManager:
+    """
+    Awaitable versions of the DataManager operations used by the API.
+    `db` may be None when no async driver is installed; metadata queries
+    then run in worker threads as well.
+    """
+
+    def __init__(self, db: AsyncSession | None, storage: StorageBackend | None = None):
+        self.db = db
+        self.storage = storage or get_storage_backend()
+
+    async def _query(self, method: str, *args, **kwargs):
+        if self.db is None:
+            return await self._offload(method, *args, **kwargs)
+
+        def _run(session):
+            return getattr(DataManager(session, self.storage), method)(*args, **kwargs)
+        return await self.db.run_sync(_run)
+
+    async def _offload(self, method: str, *args, **kwargs):
+        def _run():
+            with TransferSession() as session:
+                return getattr(DataManager(session, self.storage), method)(*args, **kwargs)
+        return await asyncio.to_thread(_run)
+
+    async def run_in_thread(self, func, *args, **kwargs):
+        """Runs a blocking call (e.g. a storage operation) off the event loop."""
+        return await asyncio.to_thread(partial(func, *args, **kwargs))
+
+    # --- Metadata ---
+
+    async def find_by_hash(self, file_hash: str):
+        return await self._query("find_by_hash", file_hash)
+
+    async def resolve_hash(self, hash_prefix: str) -> str:
+        return await self._query("resolve_hash", hash_prefix)
+
+    async def find_page(self, **filters):
+        return await self._query("find_page", **filters)
+
+    async def search(self, query: str, limit: int = 20):
+        return await self._query("search", query, limit=limit)
+
+    async def get_lineage_graph(self, file_hash: str, depth: int | None = None, direction: str = "both") -> dict:
+        return await self._query("get_lineage_graph", file_hash, depth=depth, direction=direction)
+
+    async def create_lineage(self, parent_hash: str, child_hash: str):
+        return await self._query("create_lineage", parent_hash, child_hash)
+
+    async def create_lineage_batch(self, links: list[tuple[str, str]]) -> dict:
+        return await self._query("create_lineage_batch", links)
+
+    # --- Transfers ---
+
+    async def iter_content(self, dataset, start: int, end: int, decode: bool = True):
+        """Plans the reads with this session; the returned sync generator only touches storage."""
+        return await self._query("iter_content", dataset, start, end, decode=decode)
+
+    async def push_dataset(self, local_path_str: str, **kwargs):
+        return await self._offload("push_dataset", local_path_str, **kwargs)
+
+    async def download_dataset(self, file_hash: str, destination_dir: str = "."):
+        return await self._offload("download_dataset", file_hash, destination_dir)
+
+    async def delete_dataset(self, file_hash: str):
+        return await self._offload("delete_dataset", file_hash)
+
@@ -0,0 +1,240 @@
+# datatrac/core/compression.py
+"""
+Transparent compression of stored objects (DATATRAC_COMPRESSION).
+
+The codec is picked per file: formats that are already compressed (by
+extension or magic bytes) are stored as they are; for everything else a
+few samples spread over the file are compressed, and the file is only
+compressed if that saves enough. zstd is used when `zstandard` is
+installed (`pip install datatrac[compression]`), gzip otherwise.
+
+Compression never changes a dataset's identity: the hash and `size_bytes`
+are those of the original content; `codec` and `stored_size_bytes`
+describe the object in storage. Everything here streams, so memory use
+does not depend on the file size, and uploads are compressed on the fly
+straight into the storage backend.
+
+A compressed object is one stream without an index, so reading a byte
+range of it (HTTP Range requests, resumed downloads) decodes it from the
+first byte up to the end of the range.
+"""
+import hashlib
+import os
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
+
+from . import metrics
+from .config import COMPRESSION, COMPRESSION_LEVEL, COMPRESSION_MIN_SAVING
+from .utils import ProgressCallback
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+NONE, GZIP, ZSTD = "none", "gzip", "zstd"
+CODECS = (NONE, GZIP, ZSTD)
+
+# Registry object names get these, so objects are recognizable on the host
+SUFFIXES = {GZIP: ".gz", ZSTD: ".zst"}
+
+# Formats that are compressed already (or compress too poorly to bother)
+INCOMPRESSIBLE_SUFFIXES = {
+    ".gz", ".tgz", ".bz2", ".xz", ".zst", ".zip", ".7z", ".rar", ".lz4", ".br",
+    ".parquet", ".orc", ".avro", ".arrow", ".feather", ".npz", ".h5", ".hdf5",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".mp3", ".mp4", ".mkv", ".mov", ".pdf",
+}
+MAGIC_NUMBERS = (
+    b"\x1f\x8b",              # gzip
+    b"\x28\xb5\x2f\xfd",      # zstd
+    b"PK\x03\x04",            # zip (and xlsx, docx, ...)
+    b"BZh",                   # bzip2
+    b"\xfd7zXZ\x00",          # xz
+    b"PAR1",                  # parquet
+    b"\x89PNG",
+    b"\xff\xd8\xff",          # jpeg
+)
+
+# Not worth it below this size
+MIN_COMPRESS_SIZE = 4096
+SAMPLE_SIZE = 64 * 1024
+SAMPLE_COUNT = 4
+STREAM_BLOCK_SIZE = 1024 * 1024
+
+
+def preferred_codec() -> str:
+    return ZSTD if zstandard is not None else GZIP
+
+
+def is_incompressible(path: Path) -> bool:
+    if path.suffix.lower() in INCOMPRESSIBLE_SUFFIXES:
+        return True
+    with open(path, "rb") as f:
+        head = f.read(8)
+    return any(head.startswith(magic) for magic in MAGIC_NUMBERS)
+
+
+def _read_samples(path: Path, size: int) -> bytes:
+    if size <= SAMPLE_SIZE * SAMPLE_COUNT:
+        return path.read_bytes()
+    step = (size - SAMPLE_SIZE) // (SAMPLE_COUNT - 1)
+    with open(path, "rb") as f:
+        samples = []
+        for i in range(SAMPLE_COUNT):
+            f.seek(i * step)
+            samples.append(f.read(SAMPLE_SIZE))
+    return b"".join(samples)
+
+
+def estimate_ratio(data: bytes, codec: str) -> float:
+    """Compressed size / original size of `data` at a fast level."""
+    if not data:
+        return 1.0
+    if codec == ZSTD:
+        compressed = zstandard.ZstdCompressor(level=1).compress(data)
+    else:
+        compressed = zlib.compress(data, 1)
+    return len(compressed) / len(data)
+
+
+def choose_codec(path: Path, mode: str = COMPRESSION) -> str:
+    """
+    The codec to store `path` with. `mode` is "off", "auto" (sample-based) or
+    a codec name to force one for every compressible file.
+    """
+    if mode == "off":
+        return NONE
+    path = Path(path)
+    size = path.stat().st_size
+    if size < MIN_COMPRESS_SIZE or is_incompressible(path):
+        return NONE
+    if mode in (GZIP, ZSTD):
+        if mode == ZSTD and zstandard is None:
+            print("Warning: zstd compression needs the 'zstandard' package; using gzip.")
+            return GZIP
+        return mode
+    codec = preferred_codec()
+    ratio = estimate_ratio(_read_samples(path, size), codec)
+    return codec if ratio <= 1 - COMPRESSION_MIN_SAVING else NONE
+
+
+def iter_compressed(source: Path, codec: str, level: int | None = None,
+                    progress: ProgressCallback | None = None) -> Iterator[bytes]:
+    """
+    Yields `source` compressed with `codec`, block by block.
+    `progress(bytes_read, bytes_total)` follows the original file.
+    """
+    if codec == ZSTD:
+        # threads=-1 compresses on all cores
+        compressor = zstandard.ZstdCompressor(level=level or COMPRESSION_LEVEL, threads=-1).compressobj()
+    elif codec == GZIP:
+        # The zlib gzip header has mtime 0, which keeps the output reproducible
+        compressor = zlib.compressobj(min(level or 6, 9), zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    else:
+        raise ValueError(f"Unknown codec '{codec}'.")
+    total = os.path.getsize(source)
+    with metrics.span("compress", codec=codec, bytes=total), open(source, "rb") as src:
+        done = 0
+        for block in _read_blocks(src):
+            data = compressor.compress(block)
+            if data:
+                yield data
+            done += len(block)
+            if progress:
+                progress(done, total)
+        tail = compressor.flush()
+        if tail:
+            yield tail
+
+
+class _GzipDecompressor:
+    def __init__(self):
+        self._inner = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._inner.decompress(data)
+
+    def flush(self) -> bytes:
+        return self._inner.flush()
+
+
+class _ZstdDecompressor:
+    def __init__(self):
+        self._inner = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._inner.decompress(data)
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def decompressor(codec: str):
+    """An incremental decompressor: `.decompress(block)` and a final `.flush()`."""
+    if codec == GZIP:
+        return _GzipDecompressor()
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("This dataset is stored with zstd; install 'zstandard' to read it.")
+        return _ZstdDecompressor()
+    raise ValueError(f"Unknown codec '{codec}'.")
+
+
+def iter_decompressed(blocks: Iterable[bytes], codec: str) -> Iterator[bytes]:
+    """Decompresses a stream of compressed blocks."""
+    inner = decompressor(codec)
+    for block in blocks:
+        data = inner.decompress(block)
+        if data:
+            yield data
+    tail = inner.flush()
+    if tail:
+        yield tail
+
+
+def slice_stream(blocks: Iterable[bytes], start: int, end: int) -> Iterator[bytes]:
+    """Bytes [start, end] (inclusive) of a stream that can only be read from the beginning."""
+    position = 0
+    for block in blocks:
+        block_end = position + len(block)
+        if block_end > start:
+            yield block[max(0, start - position):end + 1 - position]
+        position = block_end
+        if position > end:
+            return
+
+
+def _read_blocks(f: BinaryIO) -> Iterator[bytes]:
+    while block := f.read(STREAM_BLOCK_SIZE):
+        yield block
+
+
+def decompress_file(source: Path, destination: Path, codec: str, expected_hash: str | None = None):
+    """
+    Decompresses `source` into `destination`, verifying the SHA-256 of the
+    output on the way. The file only appears at `destination` if it matches.
+    """
+    part_path = destination.with_name(destination.name + ".part")
+    hasher = hashlib.sha256()
+    with metrics.span("decompress", codec=codec) as span, open(source, "rb") as src, open(part_path, "wb") as dst:
+        for data in iter_decompressed(_read_blocks(src), codec):
+            hasher.update(data)
+            dst.write(data)
+        span.attrs["bytes"] = dst.tell()
+    if expected_hash is not None and hasher.hexdigest() != expected_hash:
+        part_path.unlink(missing_ok=True)
+        raise RuntimeError("Decompressed file does not match the dataset hash.")
+    os.replace(part_path, destination)
+    return destination
+
+
+def accepts_encoding(header: str | None, codec: str) -> bool:
+    """Whether an Accept-Encoding header allows sending an object encoded with `codec` as is."""
+    if not header or codec == NONE:
+        return False
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        if name.strip().lower() == codec and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            return True
+    return False
@@ -6,6 +6,24 @@ from pathlib import Path
 # Base directory for local app data (e.g., downloaded files, temp items)
 APP_DIR = Path(os.getenv("DATATRAC_HOME", Path.home() / ".datatrac"))
 
+# Uploads received by the API server are spooled here before being pushed
+SPOOL_DIR = APP_DIR / "spool"
+
+# Local cache of file hashes keyed by (device, inode, size, mtime_ns)
+HASH_CACHE_ENABLED = os.getenv("DATATRAC_HASH_CACHE", "1") != "0"
+HASH_CACHE_PATH = APP_DIR / "hash_cache.db"
+HASH_CACHE_MAX_AGE_DAYS = int(os.getenv("DATATRAC_HASH_CACHE_MAX_AGE_DAYS", "90"))
+
+# Content-addressed cache of dataset files. Point DATATRAC_OBJECT_CACHE_DIR
+# at a group-writable directory to share it between users of a machine.
+OBJECT_CACHE_ENABLED = os.getenv("DATATRAC_OBJECT_CACHE", "1") != "0"
+OBJECT_CACHE_DIR = Path(os.getenv("DATATRAC_OBJECT_CACHE_DIR", APP_DIR / "objects"))
+OBJECT_CACHE_MAX_BYTES = int(float(os.getenv("DATATRAC_OBJECT_CACHE_MAX_GB", "20")) * 1024**3)
+# Opt in to hardlinks when reflinks are unsupported: instant, but the file
+# shares its inode with the cache, so editing it in place changes the cached
+# object too (it is re-verified and dropped, but the edit is not undone)
+OBJECT_CACHE_HARDLINKS = os.getenv("DATATRAC_OBJECT_CACHE_HARDLINKS", "0") == "1"
+
 # --- CENTRAL DATABASE CONFIGURATION (PostgreSQL) ---
 DB_USER = "datatrac_user"
 # IMPORTANT: For security, use environment variables in a real project
@@ -14,7 +32,21 @@ DB_PASSWORD = "your_strong_password"
 DB_HOST = "taklu.chickenkiller.com"
 DB_NAME = "datatrac_db"
 
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+DATABASE_URL = os.getenv(
+    "DATATRAC_DATABASE_URL",
+    f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}",
+)
+
+# Used by the API server; derived from DATABASE_URL (asyncpg / aiosqlite) when unset
+ASYNC_DATABASE_URL = os.getenv("DATATRAC_ASYNC_DATABASE_URL")
+
+# --- LOCAL REPLICA ---
+# Opt-in SQLite copy of the registry metadata for read commands (fetch,
+# lineage, search). It is synced incrementally when older than the bound;
+# writes always go to the central database.
+REPLICA_ENABLED = os.getenv("DATATRAC_REPLICA", "0") == "1"
+REPLICA_PATH = Path(os.getenv("DATATRAC_REPLICA_PATH", APP_DIR / "replica.db"))
+REPLICA_MAX_STALENESS_SECONDS = float(os.getenv("DATATRAC_REPLICA_MAX_STALENESS_SECONDS", "60"))
 
 # --- REMOTE REGISTRY CONFIGURATION ---
 REMOTE_USER = "naruto"
@@ -23,5 +55,76 @@ REMOTE_STORAGE_PATH = "/home/naruto/datasets"
 
 REMOTE_TARGET = f"{REMOTE_USER}@{REMOTE_HOST}"
 
+# --- STORAGE BACKEND ---
+# "ssh" stores objects on REMOTE_TARGET, "local" in LOCAL_STORAGE_PATH
+# (useful for offline testing and benchmarks).
+STORAGE_BACKEND = os.getenv("DATATRAC_STORAGE", "ssh")
+LOCAL_STORAGE_PATH = Path(os.getenv("DATATRAC_LOCAL_STORAGE", APP_DIR / "registry"))
+# Store new datasets as deduplicated content-defined chunks instead of one file.
+# Chunking runs at ~100 MB/s with numpy (`datatrac[chunking]`), 2-3 MB/s without.
+CHUNKED_STORAGE = os.getenv("DATATRAC_CHUNKED", "0") == "1"
+# Compress new objects: "off", "auto" (per file, when a sample compresses
+# well), or "zstd"/"gzip" to force a codec. zstd needs `zstandard`.
+# A compressed object has no seek index: a byte range of it is decoded from
+# the start of the object.
+COMPRESSION = os.getenv("DATATRAC_COMPRESSION", "off")
+COMPRESSION_LEVEL = int(os.getenv("DATATRAC_COMPRESSION_LEVEL", "3"))
+# "auto" only compresses files whose sample shrinks by at least this fraction
+COMPRESSION_MIN_SAVING = float(os.getenv("DATATRAC_COMPRESSION_MIN_SAVING", "0.1"))
+# Parallel ranged downloads: number of streams and bytes per range
+DOWNLOAD_STREAMS = int(os.getenv("DATATRAC_DOWNLOAD_STREAMS", "4"))
+DOWNLOAD_SEGMENT_SIZE = int(os.getenv("DATATRAC_DOWNLOAD_SEGMENT_SIZE", str(8 * 1024 * 1024)))
+# How long the shared SSH master connection stays open after the last transfer
+SSH_CONTROL_PERSIST = os.getenv("DATATRAC_SSH_CONTROL_PERSIST", "10m")
+
+# --- API SERVER ---
+# How often the in-memory lineage index checks the database for writes made
+# by other processes (e.g. the CLI). 0 disables polling.
+LINEAGE_INDEX_POLL_SECONDS = float(os.getenv("DATATRAC_LINEAGE_INDEX_POLL_SECONDS", "30"))
+# Downloads are counted in memory and written to the database this often
+DOWNLOAD_STATS_FLUSH_SECONDS = float(os.getenv("DATATRAC_DOWNLOAD_STATS_FLUSH_SECONDS", "5"))
+# Serialized dataset details and lineage responses kept in memory. Writes
+# through this server invalidate them at once; the TTL bounds how long
+# writes made elsewhere (e.g. the CLI) can go unnoticed. 0 entries disables it.
+RESPONSE_CACHE_SIZE = int(os.getenv("DATATRAC_RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("DATATRAC_RESPONSE_CACHE_TTL_SECONDS", "30"))
+# How long browsers may reuse metadata without revalidating; 0 means they
+# always revalidate (a cheap 304 when nothing changed)
+METADATA_MAX_AGE_SECONDS = int(os.getenv("DATATRAC_METADATA_MAX_AGE_SECONDS", "0"))
+
+# --- BACKGROUND JOBS ---
+# Uploads, deletes and verification requested through the API run as jobs.
+# The API server runs a worker pool itself unless this is 0, in which case
+# `datatrac worker` (with access to SPOOL_DIR) must run somewhere.
+JOBS_IN_PROCESS = os.getenv("DATATRAC_JOBS_IN_PROCESS", "1") == "1"
+
+def _per_kind(variable: str, defaults: dict[str, float]) -> dict[str, float]:
+    """Reads "push=2,delete=4" (or a single number for every kind) over `defaults`."""
+    value = os.getenv(variable, "").strip()
+    settings = dict(defaults)
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        kind, _, number = item.rpartition("=")
+        if kind:
+            settings[kind.strip()] = float(number)
+        else:
+            settings = {k: float(number) for k in settings}
+    return settings
+
+# Jobs of one kind running at once in each worker process
+JOB_CONCURRENCY = {k: int(v) for k, v in _per_kind("DATATRAC_JOB_CONCURRENCY", {"push": 2, "delete": 4, "verify": 2}).items()}
+# Attempts before a job fails for good, and the first retry delay (doubled after each attempt)
+JOB_MAX_ATTEMPTS = {k: int(v) for k, v in _per_kind("DATATRAC_JOB_MAX_ATTEMPTS", {"push": 3, "delete": 5, "verify": 2}).items()}
+JOB_RETRY_BACKOFF_SECONDS = _per_kind("DATATRAC_JOB_RETRY_BACKOFF_SECONDS", {"push": 30, "delete": 10, "verify": 60})
+JOB_POLL_SECONDS = float(os.getenv("DATATRAC_JOB_POLL_SECONDS", "2"))
+# A running job whose worker has not been heard from for this long is requeued
+JOB_STALE_SECONDS = float(os.getenv("DATATRAC_JOB_STALE_SECONDS", "300"))
+
+# --- METRICS AND TRACING ---
+# Timings of hashing, transfers, SQL statements and API requests, served at
+# /metrics by the API server. 0 turns all instrumentation off.
+METRICS_ENABLED = os.getenv("DATATRAC_METRICS", "1") == "1"
+# If set, every timed operation is also appended to this file as a JSON line
+TRACE_FILE = os.getenv("DATATRAC_TRACE_FILE") or None
+
 # Ensure the local app directory exists
 APP_DIR.mkdir(exist_ok=True)    
\ No newline at end of file
@@ -0,0 +1,95 @@
+# datatrac/core/dag.py
+"""
+Incremental cycle detection for lineage (Pearce & Kelly's dynamic
+topological order).
+
+Every node has a position in a topological order of the graph. Adding an
+edge x -> y where x already comes before y needs no work at all. Otherwise
+only the nodes positioned between y and x are searched: forward from y and
+backward from x. If the forward search reaches x, the edge would close a
+cycle; if not, the two visited sets swap places in the order. Adding many
+edges costs far less than a full DFS per edge.
+"""
+from collections import deque
+from typing import Hashable, Iterable
+
+
+class IncrementalTopoOrder:
+    def __init__(self, nodes: Iterable[Hashable] = (), edges: Iterable[tuple] = ()):
+        self._children: dict = {}
+        self._parents: dict = {}
+        self._position: dict = {}
+        for node in nodes:
+            self._add_node(node)
+        edges = list(edges)
+        for parent, child in edges:
+            self._add_node(parent)
+            self._add_node(child)
+            self._children[parent].add(child)
+            self._parents[child].add(parent)
+        self._initial_order()
+
+    def _add_node(self, node):
+        if node not in self._position:
+            self._position[node] = len(self._position)
+            self._children[node] = set()
+            self._parents[node] = set()
+
+    def _initial_order(self):
+        # Kahn's algorithm; nodes on cycles already in the graph keep their
+        # arrival order after everything else
+        incoming = {node: len(parents) for node, parents in self._parents.items()}
+        queue = deque(node for node, count in incoming.items() if count == 0)
+        order = []
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for child in self._children[node]:
+                incoming[child] -= 1
+                if incoming[child] == 0:
+                    queue.append(child)
+        placed = set(order)
+        order.extend(node for node in self._position if node not in placed)
+        self._position = {node: i for i, node in enumerate(order)}
+
+    def add_edge(self, parent, child) -> bool:
+        """Adds parent -> child; returns False (and adds nothing) if it would create a cycle."""
+        if parent == child:
+            return False
+        self._add_node(parent)
+        self._add_node(child)
+        if child in self._children[parent]:
+            return True
+        lower, upper = self._position[child], self._position[parent]
+        if lower < upper:
+            forward = self._search(child, self._children, lambda n: self._position[n] <= upper, stop=parent)
+            if forward is None:
+                return False
+            backward = self._search(parent, self._parents, lambda n: self._position[n] >= lower)
+            self._reorder(backward, forward)
+        self._children[parent].add(child)
+        self._parents[child].add(parent)
+        return True
+
+    def _search(self, start, adjacency: dict, in_range, stop=None) -> list | None:
+        """Nodes reachable from `start` within the affected range; None if `stop` is reached."""
+        seen, stack = {start}, [start]
+        while stack:
+            node = stack.pop()
+            for linked in adjacency[node]:
+                if linked == stop:
+                    return None
+                if linked not in seen and in_range(linked):
+                    seen.add(linked)
+                    stack.append(linked)
+        return list(seen)
+
+    def _reorder(self, backward: list, forward: list):
+        # The ancestors of the new parent move before the descendants of the
+        # new child, reusing the positions both sets held
+        position = self._position
+        backward.sort(key=position.__getitem__)
+        forward.sort(key=position.__getitem__)
+        slots = sorted(position[n] for n in backward + forward)
+        for node, slot in zip(backward + forward, slots):
+            position[node] = slot
@@ -1,13 +1,41 @@
+import logging
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-from .config import DATABASE_URL
+from . import metrics
+from .config import ASYNC_DATABASE_URL, DATABASE_URL
 
-# For PostgreSQL, remove the connect_args argument.
-# It is only needed for SQLite to disable thread checks.
-engine = create_engine(DATABASE_URL)
+logger = logging.getLogger(__name__)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_engine = None
+
+def get_engine():
+    """
+    Creates the engine on first use. Importing this module stays cheap and
+    commands that never touch the database never load a DBAPI driver.
+    """
+    global _engine
+    if _engine is None:
+        # connect_args is only needed for SQLite to disable thread checks.
+        connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+        _engine = create_engine(DATABASE_URL, connect_args=connect_args)
+        metrics.instrument_engine(_engine)
+        SessionLocal.configure(bind=_engine)
+    return _engine
+
+def __getattr__(name):
+    # `from datatrac.core.db import engine` keeps working
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class _LazySessionmaker(sessionmaker):
+    def __call__(self, **local_kw):
+        get_engine()
+        return super().__call__(**local_kw)
+
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
 Base = declarative_base()
 
 def get_db():
@@ -18,9 +46,70 @@ def get_db():
     finally:
         db.close()
 
+def upsert_insert(db, table):
+    """An INSERT that supports `.on_conflict_do_nothing()`/`_do_update()` on this session's backend."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"ON CONFLICT inserts are not supported on {dialect}.")
+    return insert(table)
+
+# --- Async engine (API server) ---
+# Same database through an asyncio driver: asyncpg for PostgreSQL, aiosqlite
+# for SQLite. Both are optional (`pip install datatrac[async]`); without them
+# the API runs its queries in worker threads instead.
+_ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+_async_sessionmaker = None
+_async_engine = None
+
+def async_database_url() -> str:
+    if ASYNC_DATABASE_URL:
+        return ASYNC_DATABASE_URL
+    url = make_url(DATABASE_URL)
+    driver = _ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver:
+        url = url.set(drivername=f"{url.get_backend_name()}+{driver}")
+    return url.render_as_string(hide_password=False)
+
+def get_async_sessionmaker():
+    """Returns the async session factory, or None if no async driver is installed."""
+    global _async_engine, _async_sessionmaker
+    if _async_sessionmaker is None and _async_engine is None:
+        try:
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+            _async_engine = create_async_engine(async_database_url())
+            metrics.instrument_engine(_async_engine.sync_engine)
+        except ImportError as e:
+            logger.warning("Async database driver unavailable (%s); using worker threads instead.", e)
+            _async_engine = False
+            return None
+        # Objects stay usable after commit; lazy loads cannot happen in async code
+        _async_sessionmaker = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_sessionmaker
+
+async def get_async_db():
+    """Dependency to get an async DB session (None when running without an async driver)."""
+    factory = get_async_sessionmaker()
+    if factory is None:
+        yield None
+        return
+    async with factory() as session:
+        yield session
+
+async def dispose_async_engine():
+    if _async_engine:
+        await _async_engine.dispose()
+
 def create_database_tables():
-    """Creates all database tables."""
+    """
+    Creates all database tables directly from the models, without migrations.
+    Only meant for throwaway databases (tests, benchmarks); real registries
+    are managed with `datatrac db upgrade`.
+    """
     # Import all models here before calling create_all
     # This ensures they are registered with Base.metadata
     from . import models
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=get_engine())
@@ -0,0 +1,46 @@
+# datatrac/core/events.py
+"""
+A tiny in-process publish/subscribe hub.
+
+`DataManager` emits an event after each committed write, so in-memory
+structures (e.g. the API's lineage index) can update themselves without
+polling the database.
+
+Events and their keyword arguments:
+    dataset_changed(file_hash)      pushed, or its statistics changed
+    dataset_deleted(file_hash)      deregistered by an admin
+    lineage_created(parent_hash, child_hash)
+    local_copy_changed(file_hash)   the current user's local copy was recorded or removed
+    registry_imported(counts)       rows were bulk imported ({table: rows})
+"""
+import logging
+import threading
+from collections import defaultdict
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+_listeners: dict[str, list[Callable]] = defaultdict(list)
+_lock = threading.Lock()
+
+
+def subscribe(event: str, listener: Callable):
+    with _lock:
+        _listeners[event].append(listener)
+
+
+def unsubscribe(event: str, listener: Callable):
+    with _lock:
+        if listener in _listeners[event]:
+            _listeners[event].remove(listener)
+
+
+def emit(event: str, **payload):
+    with _lock:
+        listeners = list(_listeners[event])
+    for listener in listeners:
+        # A failing listener must never break the write that triggered it
+        try:
+            listener(**payload)
+        except Exception:
+            logger.exception("Listener for %s failed", event)
@@ -0,0 +1,122 @@
+# datatrac/core/hash_cache.py
+"""
+A local cache of file hashes keyed by (device, inode, size, mtime_ns), so
+re-pushing a file that has not changed costs one stat() instead of a full read.
+"""
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from . import utils
+from .config import HASH_CACHE_ENABLED, HASH_CACHE_MAX_AGE_DAYS, HASH_CACHE_PATH
+
+# Files modified this recently are not cached: a write landing in the same
+# mtime tick as our read would otherwise go unnoticed (git's "racy" problem).
+RACY_WINDOW_NS = 2_000_000_000
+
+EVICTION_INTERVAL_S = 24 * 60 * 60
+
+
+class HashCache:
+    def __init__(self, db_path: Path = HASH_CACHE_PATH, max_age_days: int = HASH_CACHE_MAX_AGE_DAYS):
+        self.db_path = Path(db_path)
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # One row per inode: a changed file simply replaces its old entry
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS file_hashes (
+                dev INTEGER NOT NULL,
+                ino INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (dev, ino)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._maybe_evict()
+
+    def get(self, st: os.stat_result) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hash FROM file_hashes WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ?",
+                (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns),
+            ).fetchone()
+            if row:
+                self._conn.execute(
+                    "UPDATE file_hashes SET last_used = ? WHERE dev = ? AND ino = ?",
+                    (time.time(), st.st_dev, st.st_ino),
+                )
+        return row[0] if row else None
+
+    def put(self, st: os.stat_result, file_hash: str):
+        if time.time_ns() - st.st_mtime_ns < RACY_WINDOW_NS:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO file_hashes (dev, ino, size, mtime_ns, hash, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, file_hash, time.time()),
+            )
+
+    def evict_stale(self) -> int:
+        """Drops entries that have not been used for `max_age_days`."""
+        cutoff = time.time() - self.max_age_days * 24 * 60 * 60
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM file_hashes WHERE last_used < ?", (cutoff,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_eviction', ?)", (str(time.time()),)
+            )
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return cursor.rowcount
+
+    def _maybe_evict(self):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'last_eviction'").fetchone()
+        if not row or time.time() - float(row[0]) > EVICTION_INTERVAL_S:
+            self.evict_stale()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache: HashCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_hash_cache() -> HashCache | None:
+    """Returns the process-wide cache, or None if caching is disabled."""
+    global _cache
+    if not HASH_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = HashCache()
+            except sqlite3.Error:
+                # A broken cache must never block a push; just hash normally
+                return None
+    return _cache
+
+
+def cached_hash_file(file_path: str, progress: utils.ProgressCallback | None = None) -> str:
+    """Like `utils.hash_file`, but skips the read when the file is unchanged."""
+    cache = get_hash_cache()
+    if cache is None:
+        return utils.hash_file(file_path, progress=progress)
+
+    st = os.stat(file_path)
+    file_hash = cache.get(st)
+    if file_hash is None:
+        file_hash = utils.hash_file(file_path, progress=progress)
+        # Only cache if the file did not change while we were reading it
+        if os.stat(file_path).st_mtime_ns == st.st_mtime_ns:
+            cache.put(st, file_hash)
+    return file_hash
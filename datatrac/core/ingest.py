@@ -0,0 +1,127 @@
+# datatrac/core/ingest.py
+"""
+Spooling for uploads that arrive over the network.
+
+Incoming bytes are written once to a uniquely named file under SPOOL_DIR and
+hashed as they arrive, so `push_dataset` does not need to read the file again
+to hash it. Large files can be sent in several requests through an upload
+session, which can be resumed from its current offset after a failure.
+"""
+import hashlib
+import json
+import os
+import re
+import secrets
+import tempfile
+import threading
+from pathlib import Path
+
+from .config import SPOOL_DIR
+from .utils import hash_file
+
+
+class SpoolFile:
+    """A unique spool file that hashes everything written to it."""
+
+    def __init__(self, suffix: str = ""):
+        SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=SPOOL_DIR, prefix="upload-", suffix=suffix)
+        self.path = Path(path)
+        self._file = os.fdopen(fd, "wb")
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes):
+        self._file.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+
+    def finish(self) -> str:
+        """Closes the file and returns its SHA-256."""
+        self._file.close()
+        return self._hash.hexdigest()
+
+    def discard(self):
+        self._file.close()
+        self.path.unlink(missing_ok=True)
+
+
+_SESSION_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadSession:
+    """
+    A multi-request upload. Data lives in `<id>.part`, metadata in `<id>.json`.
+    The running hash is kept in memory while the process lives; if it is lost
+    (e.g. after a restart), the file is hashed once more on completion.
+    """
+
+    # upload_id -> (bytes hashed so far, running sha256)
+    _hashers: dict = {}
+    # upload_id -> lock, so concurrent requests cannot interleave appends
+    _session_locks: dict[str, threading.Lock] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, upload_id: str):
+        if not _SESSION_ID.match(upload_id):
+            raise FileNotFoundError("Unknown upload session.")
+        self.id = upload_id
+        self.data_path = SPOOL_DIR / f"{upload_id}.part"
+        self.meta_path = SPOOL_DIR / f"{upload_id}.json"
+        try:
+            self.meta = json.loads(self.meta_path.read_text())
+        except FileNotFoundError:
+            raise FileNotFoundError("Unknown upload session.")
+
+    @classmethod
+    def create(cls, filename: str, source: str | None = None, total_size: int | None = None) -> "UploadSession":
+        SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+        upload_id = secrets.token_hex(16)
+        meta = {"filename": Path(filename).name, "source": source, "total_size": total_size}
+        (SPOOL_DIR / f"{upload_id}.part").touch()
+        (SPOOL_DIR / f"{upload_id}.json").write_text(json.dumps(meta))
+        with cls._lock:
+            cls._hashers[upload_id] = (0, hashlib.sha256())
+        return cls(upload_id)
+
+    @property
+    def offset(self) -> int:
+        return self.data_path.stat().st_size
+
+    def _session_lock(self) -> threading.Lock:
+        with self._lock:
+            return self._session_locks.setdefault(self.id, threading.Lock())
+
+    def append(self, data: bytes, offset: int):
+        """Appends `data` at `offset`, which must equal the current size."""
+        with self._session_lock():
+            current = self.offset
+            if offset != current:
+                raise ValueError(f"Upload offset mismatch: expected {current}, got {offset}.")
+            with open(self.data_path, "ab") as f:
+                f.write(data)
+            with self._lock:
+                hashed_to, hasher = self._hashers.pop(self.id, (None, None))
+            if hashed_to == current:
+                hasher.update(data)
+                with self._lock:
+                    self._hashers[self.id] = (current + len(data), hasher)
+
+    def finish(self) -> str:
+        """Returns the SHA-256 of the uploaded data."""
+        total_size = self.meta.get("total_size")
+        size = self.offset
+        if total_size is not None and size != total_size:
+            raise ValueError(f"Upload incomplete: {size} of {total_size} bytes received.")
+        with self._lock:
+            hashed_to, hasher = self._hashers.pop(self.id, (None, None))
+        if hashed_to == size:
+            return hasher.hexdigest()
+        return hash_file(str(self.data_path))
+
+    def discard(self):
+        with self._lock:
+            self._hashers.pop(self.id, None)
+            self._session_locks.pop(self.id, None)
+        self.data_path.unlink(missing_ok=True)
+        self.meta_path.unlink(missing_ok=True)
@@ -0,0 +1,409 @@
+# datatrac/core/jobs.py
+"""
+Background jobs for long-running registry operations.
+
+The API no longer pushes, deletes or verifies objects inside the request:
+it records a job in the `jobs` table and answers 202 with the job id. A
+`WorkerPool` (started by the API server, or `datatrac worker` elsewhere)
+claims queued jobs and runs the matching `DataManager` operation.
+
+- Claiming is a conditional UPDATE (status='queued' -> 'running'), so two
+  workers never run the same job; PostgreSQL also skips rows another worker
+  has locked.
+- Each kind has its own concurrency limit, retry count and backoff
+  (DATATRAC_JOB_*). A failed attempt is queued again after
+  backoff * 2**(attempt - 1). Errors that cannot go away by retrying
+  (ValueError, FileNotFoundError) fail the job at once.
+- Progress (bytes done/total) is written at most every PROGRESS_INTERVAL
+  seconds and doubles as a heartbeat. Jobs of a worker that stopped
+  heartbeating for JOB_STALE_SECONDS are queued again.
+
+Push jobs read the spooled upload, so a separate worker must share
+SPOOL_DIR with the API server.
+"""
+import logging
+import os
+import secrets
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from . import metrics, models
+from .config import (
+    JOB_CONCURRENCY,
+    JOB_MAX_ATTEMPTS,
+    JOB_POLL_SECONDS,
+    JOB_RETRY_BACKOFF_SECONDS,
+    JOB_STALE_SECONDS,
+)
+from .db import SessionLocal, get_engine
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+PROGRESS_INTERVAL = 1.0
+MAX_BACKOFF_SECONDS = 3600
+# Retrying does not fix these
+PERMANENT_ERRORS = (ValueError, FileNotFoundError)
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(value: datetime | None) -> datetime | None:
+    # SQLite hands timestamps back without a timezone; they are stored in UTC
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+# --- Job kinds ---
+
+def _run_push(manager, params: dict, progress) -> dict:
+    dataset, uploaded = manager.push_dataset(
+        params["path"], source=params.get("source"), file_hash=params["file_hash"],
+        name=params["name"], record_local_copy=False, progress=progress,
+    )
+    _discard_upload(params)
+    return {"hash": dataset.hash, "name": dataset.name, "uploaded": uploaded}
+
+
+def _discard_upload(params: dict, keep_session: bool = False):
+    from .ingest import UploadSession
+
+    if params.get("upload_id"):
+        if keep_session:
+            return
+        try:
+            UploadSession(params["upload_id"]).discard()
+        except FileNotFoundError:
+            pass
+    else:
+        Path(params["path"]).unlink(missing_ok=True)
+
+
+def _give_up_push(params: dict):
+    # A one-shot upload is gone for good; an upload session keeps its data
+    # so the client can complete it again
+    _discard_upload(params, keep_session=True)
+
+
+def _run_delete(manager, params: dict, progress) -> dict:
+    success, message = manager.delete_dataset(params["file_hash"])
+    if not success:
+        raise ValueError(message)
+    return {"hash": params["file_hash"], "message": message}
+
+
+def _run_verify(manager, params: dict, progress) -> dict:
+    return manager.verify_dataset(params["file_hash"], progress=progress)
+
+
+@dataclass
+class JobKind:
+    # run(manager, params, progress) -> result (JSON-serializable)
+    run: Callable
+    # Called once a job has failed for good, e.g. to clean up its input
+    give_up: Callable[[dict], None] | None = None
+
+
+KINDS = {
+    "push": JobKind(_run_push, _give_up_push),
+    "delete": JobKind(_run_delete),
+    "verify": JobKind(_run_verify),
+}
+
+
+# --- Queue ---
+
+# The pool running in this process, woken up when a job is submitted here
+_local_pool: "WorkerPool | None" = None
+
+
+def submit(db: Session, kind: str, params: dict, max_attempts: int | None = None) -> models.Job:
+    if kind not in KINDS:
+        raise ValueError(f"Unknown job kind '{kind}'.")
+    job = models.Job(
+        id=secrets.token_hex(16),
+        kind=kind,
+        status=QUEUED,
+        params=params,
+        max_attempts=max_attempts or JOB_MAX_ATTEMPTS.get(kind, 1),
+        attempts=0,
+        bytes_done=0,
+    )
+    db.add(job)
+    db.commit()
+    if _local_pool is not None:
+        _local_pool.wake()
+    return job
+
+
+def get_job(db: Session, job_id: str) -> models.Job | None:
+    return db.get(models.Job, job_id)
+
+
+def list_jobs(db: Session, status: str | None = None, kind: str | None = None, limit: int = 50) -> list[models.Job]:
+    query = select(models.Job).order_by(models.Job.created_at.desc()).limit(limit)
+    if status:
+        query = query.where(models.Job.status == status)
+    if kind:
+        query = query.where(models.Job.kind == kind)
+    return list(db.scalars(query))
+
+
+def job_status(job: models.Job) -> dict:
+    """A job as the API reports it, with elapsed time and throughput."""
+    started_at, finished_at = _aware(job.started_at), _aware(job.finished_at)
+    elapsed = throughput = None
+    if started_at is not None:
+        elapsed = max(((finished_at or utcnow()) - started_at).total_seconds(), 0.0)
+        if elapsed > 0:
+            throughput = round(job.bytes_done / elapsed)
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "bytes_done": job.bytes_done,
+        "bytes_total": job.bytes_total,
+        "progress": round(job.bytes_done / job.bytes_total, 4) if job.bytes_total else None,
+        "elapsed_seconds": round(elapsed, 3) if elapsed is not None else None,
+        "throughput_bytes_per_second": throughput,
+        "result": job.result,
+        "error": job.error,
+        "created_at": _aware(job.created_at),
+        "run_after": _aware(job.run_after),
+        "started_at": started_at,
+        "finished_at": finished_at,
+    }
+
+
+def claim(db: Session, kind: str, worker: str) -> str | None:
+    """Marks the next runnable job of `kind` as running by `worker`; returns its id."""
+    now = utcnow()
+    candidates = db.scalars(
+        select(models.Job.id)
+        .where(models.Job.status == QUEUED, models.Job.kind == kind, models.Job.run_after <= now)
+        .order_by(models.Job.run_after, models.Job.created_at)
+        .limit(8)
+        .with_for_update(skip_locked=True)  # PostgreSQL; ignored by SQLite
+    ).all()
+    for job_id in candidates:
+        claimed = db.execute(
+            update(models.Job)
+            .where(models.Job.id == job_id, models.Job.status == QUEUED)
+            .values(status=RUNNING, worker=worker, attempts=models.Job.attempts + 1,
+                    started_at=now, heartbeat_at=now, error=None)
+        ).rowcount
+        if claimed:
+            db.commit()
+            return job_id
+    db.rollback()
+    return None
+
+
+def requeue_stale(db: Session) -> int:
+    """Queues running jobs again whose worker stopped heartbeating (e.g. it crashed)."""
+    cutoff = utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+    stale = (models.Job.status == RUNNING, models.Job.heartbeat_at < cutoff)
+    message = "The worker running this job stopped responding."
+    exhausted = db.execute(
+        select(models.Job.id, models.Job.kind, models.Job.params)
+        .where(*stale, models.Job.attempts >= models.Job.max_attempts)
+    ).all()
+    given_up = []
+    for job_id, kind, params in exhausted:
+        # Conditional per job, so only one of several pollers gives it up
+        if db.execute(
+            update(models.Job)
+            .where(models.Job.id == job_id, *stale)
+            .values(status=FAILED, worker=None, finished_at=utcnow(), error=message)
+        ).rowcount:
+            given_up.append((job_id, kind, params))
+    requeued = db.execute(
+        update(models.Job).where(*stale).values(status=QUEUED, worker=None, run_after=utcnow(), error=message)
+    ).rowcount
+    db.commit()
+    if given_up or requeued:
+        logger.warning("Requeued %d and failed %d job(s) of unresponsive workers", requeued, len(given_up))
+    # As in WorkerPool._failed, once the failure is recorded
+    for job_id, kind, params in given_up:
+        job_kind = KINDS.get(kind)
+        if job_kind and job_kind.give_up:
+            try:
+                job_kind.give_up(params)
+            except Exception:
+                logger.exception("Could not clean up failed job %s", job_id)
+    return requeued
+
+
+class JobProgress:
+    """Progress callback for a running job; writes are throttled and double as heartbeats."""
+
+    def __init__(self, job_id: str, interval: float = PROGRESS_INTERVAL):
+        self.job_id = job_id
+        self.interval = interval
+        self._last_write = 0.0
+
+    def __call__(self, bytes_done: int, bytes_total: int | None):
+        now = time.monotonic()
+        if now - self._last_write < self.interval and bytes_done != bytes_total:
+            return
+        self._last_write = now
+        try:
+            with get_engine().begin() as conn:
+                conn.execute(
+                    update(models.Job).where(models.Job.id == self.job_id)
+                    .values(bytes_done=bytes_done, bytes_total=bytes_total, heartbeat_at=utcnow())
+                )
+        except Exception:
+            # Progress is informational; never fail the job over it
+            logger.exception("Could not record progress of job %s", self.job_id)
+
+
+class WorkerPool:
+    """Runs queued jobs in threads, with a concurrency limit per kind."""
+
+    def __init__(self, kinds: list[str] | None = None, concurrency: dict[str, int] | None = None,
+                 poll_interval: float = JOB_POLL_SECONDS):
+        self.kinds = list(kinds or KINDS)
+        unknown = set(self.kinds) - set(KINDS)
+        if unknown:
+            raise ValueError(f"Unknown job kind(s): {', '.join(sorted(unknown))}")
+        limits = {**JOB_CONCURRENCY, **(concurrency or {})}
+        self.limits = {kind: max(1, limits.get(kind, 1)) for kind in self.kinds}
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._executor = ThreadPoolExecutor(max_workers=sum(self.limits.values()), thread_name_prefix="datatrac-job")
+        self._running: dict[str, set[str]] = {kind: set() for kind in self.kinds}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.processed = 0
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        """Runs the pool in a background thread (the API server)."""
+        global _local_pool
+        _local_pool = self
+        self._thread = threading.Thread(target=self.run, daemon=True, name="datatrac-jobs")
+        self._thread.start()
+
+    def stop(self, wait: bool = True):
+        global _local_pool
+        if _local_pool is self:
+            _local_pool = None
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._executor.shutdown(wait=wait)
+
+    def busy(self) -> bool:
+        with self._lock:
+            return any(self._running.values())
+
+    def run(self, burst: bool = False):
+        """
+        Claims and runs jobs until stopped. With burst=True, returns once
+        nothing is queued and nothing is running (e.g. for cron).
+        """
+        errors = 0
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                claimed = self._poll()
+                errors = 0
+            except Exception:
+                # e.g. the database is down, or the jobs table is missing
+                # (`datatrac db upgrade`); back off instead of spinning
+                errors += 1
+                logger.exception("Polling for jobs failed")
+                claimed = 0
+                if burst:
+                    raise
+            if burst and not claimed and not self.busy():
+                return
+            self._wake.wait(self.poll_interval * min(2 ** errors, 30))
+
+    def _poll(self) -> int:
+        claimed = 0
+        with SessionLocal() as db:
+            requeue_stale(db)
+            self._heartbeat(db)
+            for kind in self.kinds:
+                while len(self._running[kind]) < self.limits[kind]:
+                    job_id = claim(db, kind, self.worker_id)
+                    if job_id is None:
+                        break
+                    with self._lock:
+                        self._running[kind].add(job_id)
+                    self._executor.submit(self._execute, kind, job_id)
+                    claimed += 1
+        return claimed
+
+    def _heartbeat(self, db: Session):
+        with self._lock:
+            running = [job_id for ids in self._running.values() for job_id in ids]
+        if running:
+            db.execute(update(models.Job).where(models.Job.id.in_(running)).values(heartbeat_at=utcnow()))
+            db.commit()
+
+    def _execute(self, kind: str, job_id: str):
+        from .manager import DataManager
+
+        try:
+            with metrics.span("job", kind=kind, job_id=job_id), SessionLocal() as db:
+                job = db.get(models.Job, job_id)
+                params = dict(job.params)
+                try:
+                    result = KINDS[kind].run(DataManager(db), params, JobProgress(job_id))
+                except Exception as e:
+                    db.rollback()
+                    self._failed(db, job_id, kind, params, e)
+                else:
+                    job = db.get(models.Job, job_id)
+                    job.status, job.result, job.finished_at = SUCCEEDED, result, utcnow()
+                    if job.bytes_total is not None:
+                        job.bytes_done = job.bytes_total
+                    db.commit()
+        except Exception:
+            logger.exception("Job %s could not be recorded", job_id)
+        finally:
+            with self._lock:
+                self._running[kind].discard(job_id)
+                self.processed += 1
+            self.wake()
+
+    def _failed(self, db: Session, job_id: str, kind: str, params: dict, error: Exception):
+        job = db.get(models.Job, job_id)
+        job.error = f"{type(error).__name__}: {error}"
+        job.worker = None
+        if isinstance(error, PERMANENT_ERRORS) or job.attempts >= job.max_attempts:
+            job.status, job.finished_at = FAILED, utcnow()
+            logger.warning("Job %s (%s) failed: %s", job_id, kind, job.error)
+            db.commit()
+            if KINDS[kind].give_up:
+                KINDS[kind].give_up(params)
+            return
+        backoff = JOB_RETRY_BACKOFF_SECONDS.get(kind, 30) * 2 ** (job.attempts - 1)
+        job.status = QUEUED
+        job.run_after = utcnow() + timedelta(seconds=min(backoff, MAX_BACKOFF_SECONDS))
+        logger.warning("Job %s (%s) attempt %d failed, retrying in %.1fs: %s",
+                       job_id, kind, job.attempts, backoff, job.error)
+        db.commit()
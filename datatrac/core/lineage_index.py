@@ -0,0 +1,232 @@
+# datatrac/core/lineage_index.py
+"""
+An in-memory index of the lineage graph for the API server.
+
+Dataset hashes are interned to small integers and each node keeps its
+parents and children in compact `array('i')` edge lists, so even large
+graphs take little memory and transitive walks are plain integer BFS.
+
+The index is loaded once, updated incrementally from `DataManager` events
+(see `events.py`), and re-checked by a cheap poll to pick up writes made by
+other processes such as the CLI.
+"""
+import sys
+import threading
+import time
+from array import array
+from collections import deque
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import events, models
+from .manager import MAX_LINEAGE_DEPTH
+
+
+class LineageIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+        self.loaded = False
+        self.generation = 0
+        self.refresh_ms = None
+        self.loaded_at = None
+        self._signature = None
+        self._subscribed = False
+
+    def _reset(self):
+        self._ids: dict[str, int] = {}
+        self._hashes: list[str] = []
+        self._names: list[str | None] = []
+        self._parents: list[array] = []
+        self._children: list[array] = []
+        self._edge_count = 0
+
+    def _intern(self, file_hash: str, name: str | None = None) -> int:
+        node = self._ids.get(file_hash)
+        if node is None:
+            node = len(self._hashes)
+            self._ids[file_hash] = node
+            self._hashes.append(file_hash)
+            self._names.append(name)
+            self._parents.append(array("i"))
+            self._children.append(array("i"))
+        elif name is not None:
+            self._names[node] = name
+        return node
+
+    # --- Loading and refreshing ---
+
+    @staticmethod
+    def _db_signature(db: Session) -> tuple:
+        # Lineage rows and datasets are only ever added (datasets are
+        # soft-deleted), so the row counts change whenever the graph does
+        return (
+            db.scalar(select(func.count()).select_from(models.Lineage)),
+            db.scalar(select(func.count()).select_from(models.Dataset)),
+        )
+
+    def load(self, db: Session):
+        """(Re)builds the whole index from the database."""
+        start = time.perf_counter()
+        signature = self._db_signature(db)
+        datasets = db.execute(select(models.Dataset.hash, models.Dataset.name)).all()
+        edges = db.execute(select(models.Lineage.parent_hash, models.Lineage.child_hash)).all()
+
+        # Build into a fresh index so readers never see a half-loaded graph
+        fresh = LineageIndex()
+        for file_hash, name in datasets:
+            fresh._intern(file_hash, name)
+        for parent_hash, child_hash in edges:
+            fresh._add_edge(parent_hash, child_hash)
+
+        with self._lock:
+            self._ids, self._hashes, self._names = fresh._ids, fresh._hashes, fresh._names
+            self._parents, self._children = fresh._parents, fresh._children
+            self._edge_count = fresh._edge_count
+            self._signature = signature
+            self.loaded = True
+            self.generation += 1
+            self.loaded_at = time.time()
+            self.refresh_ms = round((time.perf_counter() - start) * 1000, 3)
+
+    def refresh_if_changed(self, db: Session) -> bool:
+        """Reloads the index if the database changed behind our back."""
+        if self._db_signature(db) == self._signature:
+            return False
+        self.load(db)
+        return True
+
+    # --- Incremental updates (called from DataManager events) ---
+
+    def _add_edge(self, parent_hash: str, child_hash: str) -> bool:
+        parent = self._intern(parent_hash)
+        child = self._intern(child_hash)
+        if child in self._children[parent]:
+            return False
+        self._children[parent].append(child)
+        self._parents[child].append(parent)
+        self._edge_count += 1
+        return True
+
+    def add_edge(self, parent_hash: str, child_hash: str):
+        with self._lock:
+            if self._add_edge(parent_hash, child_hash):
+                self.generation += 1
+                # Keep the poll from reloading just because of our own write
+                if self._signature:
+                    self._signature = (self._signature[0] + 1, self._signature[1])
+
+    def add_dataset(self, file_hash: str, name: str | None = None):
+        with self._lock:
+            is_new = file_hash not in self._ids
+            self._intern(file_hash, name)
+            if is_new:
+                self.generation += 1
+                if self._signature:
+                    self._signature = (self._signature[0], self._signature[1] + 1)
+
+    def subscribe(self, name_lookup=None):
+        """
+        Keeps the index current from DataManager events. `name_lookup` maps
+        a hash to its dataset name for datasets pushed after loading.
+        """
+        if self._subscribed:
+            return
+        self._subscribed = True
+
+        def _on_dataset_changed(file_hash):
+            if file_hash not in self._ids:
+                self.add_dataset(file_hash, name_lookup(file_hash) if name_lookup else None)
+
+        def _on_lineage_created(parent_hash, child_hash):
+            # Either end may have been pushed by another process since loading
+            _on_dataset_changed(parent_hash)
+            _on_dataset_changed(child_hash)
+            self.add_edge(parent_hash, child_hash)
+
+        events.subscribe("lineage_created", _on_lineage_created)
+        events.subscribe("dataset_changed", _on_dataset_changed)
+        # Deregistering a dataset keeps its lineage rows, so the graph does
+        # not change on dataset_deleted
+
+    # --- Queries ---
+
+    def __contains__(self, file_hash: str) -> bool:
+        return file_hash in self._ids
+
+    def walk(self, file_hash: str, depth: int | None = 1, direction: str = "both") -> dict:
+        """
+        Same result as `DataManager.get_lineage_graph`, answered from memory.
+        """
+        if direction not in ("up", "down", "both"):
+            raise ValueError("direction must be one of: up, down, both")
+        if depth is not None and depth < 0:
+            raise ValueError("depth must not be negative")
+        depth = MAX_LINEAGE_DEPTH if depth is None else min(depth, MAX_LINEAGE_DEPTH)
+        with self._lock:
+            root = self._ids.get(file_hash)
+            if root is None:
+                raise FileNotFoundError(f"Dataset with hash {file_hash} not found.")
+
+            distances = {root: 0}
+            edges = set()
+            walks = []
+            if direction in ("down", "both"):
+                walks.append((self._children, 1))
+            if direction in ("up", "both"):
+                walks.append((self._parents, -1))
+
+            for adjacency, sign in walks:
+                seen = {root}
+                queue = deque([(root, 0)])
+                while queue:
+                    node, distance = queue.popleft()
+                    if distance >= depth:
+                        continue
+                    for linked in adjacency[node]:
+                        edges.add((node, linked) if sign > 0 else (linked, node))
+                        if linked in seen:
+                            continue
+                        seen.add(linked)
+                        known = distances.get(linked)
+                        if known is None or distance + 1 < abs(known):
+                            distances[linked] = sign * (distance + 1)
+                        queue.append((linked, distance + 1))
+
+            hashes, names = self._hashes, self._names
+            nodes = [
+                {"hash": hashes[node], "name": names[node], "depth": d}
+                for node, d in distances.items()
+            ]
+            return {
+                "root": file_hash,
+                "nodes": sorted(nodes, key=lambda n: (n["depth"], n["name"] or "")),
+                "edges": [{"parent": hashes[p], "child": hashes[c]} for p, c in edges],
+            }
+
+    def stats(self) -> dict:
+        with self._lock:
+            memory = (
+                sys.getsizeof(self._ids)
+                + sys.getsizeof(self._hashes)
+                + sum(sys.getsizeof(h) for h in self._hashes)
+                + sys.getsizeof(self._names)
+                + sum(sys.getsizeof(n) for n in self._names if n is not None)
+                + sys.getsizeof(self._parents) + sys.getsizeof(self._children)
+                + sum(sys.getsizeof(a) for a in self._parents)
+                + sum(sys.getsizeof(a) for a in self._children)
+            )
+            return {
+                "loaded": self.loaded,
+                "datasets": len(self._hashes),
+                "edges": self._edge_count,
+                "generation": self.generation,
+                "memory_bytes": memory,
+                "refresh_ms": self.refresh_ms,
+                "loaded_at": self.loaded_at,
+            }
+
+
+# The API process keeps one index; it stays empty (and unused) elsewhere
+lineage_index = LineageIndex()
@@ -1,30 +1,161 @@
-import subprocess
+import base64
 import getpass
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, select
+from typing import Iterable
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import and_, exists, func, literal, or_, select, tuple_, union_all
 from datetime import datetime, timezone
 
-from . import models, utils
-from .config import REMOTE_TARGET, REMOTE_STORAGE_PATH
+from . import compression, events, models, stats, utils
+from .chunking import iter_chunks
+from .config import CHUNKED_STORAGE
+from .dag import IncrementalTopoOrder
+from .db import upsert_insert
+from .download import download_ranged
+from .hash_cache import cached_hash_file
+from .object_cache import get_object_cache
+from .search import get_search_index, has_sqlite_fts, sqlite_search
+from .storage import StorageBackend, get_storage_backend
 
 def get_current_user():
     return getpass.getuser()
 
-def run_command(command: list[str]):
-    result = subprocess.run(command, capture_output=True, text=True)
-    if result.returncode != 0:
-        error_message = result.stderr or result.stdout
-        raise RuntimeError(f"Command failed: {' '.join(command)}\nError: {error_message.strip()}")
-    return result.stdout
+# Keep IN (...) lists well under the bind-parameter limits of every backend
+QUERY_BATCH_SIZE = 1000
+
+# Shortest hash prefix accepted in place of a full hash (like git)
+MIN_HASH_PREFIX = 4
+HASH_LENGTH = 64
+
+# Upper bound for transitive lineage walks; also guards against cycles
+MAX_LINEAGE_DEPTH = 100
+
+# Number of chunks looked up / uploaded together when pushing in chunked format
+CHUNK_BATCH_SIZE = 32
+
+# Columns returned by listings; enough for the API schema without loading
+# full ORM objects
+LISTING_COLUMNS = (
+    models.Dataset.hash,
+    models.Dataset.name,
+    models.Dataset.source,
+    models.Dataset.registry_path,
+    models.Dataset.created_at,
+    models.Dataset.is_active,
+    models.Dataset.size_bytes,
+    models.Dataset.download_count,
+    models.Dataset.last_downloaded_at,
+    models.Dataset.codec,
+    models.Dataset.stored_size_bytes,
+)
+
+def encode_cursor(created_at: datetime, file_hash: str) -> str:
+    raw = json.dumps([created_at.isoformat(), file_hash]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, file_hash = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), file_hash
+    except (ValueError, TypeError):
+        raise ValueError("Invalid pagination cursor.")
 
 class DataManager:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, storage: StorageBackend | None = None):
         self.db = db
+        self.storage = storage or get_storage_backend()
 
     def find_by_hash(self, file_hash: str):
         return self.db.query(models.Dataset).filter_by(hash=file_hash).first()
 
+    def resolve_hash(self, hash_prefix: str) -> str:
+        """
+        Expands a unique hash prefix to the full hash, git style.
+        Raises FileNotFoundError if nothing matches and ValueError if the
+        prefix is too short or ambiguous.
+        """
+        prefix = hash_prefix.strip().lower()
+        if len(prefix) == HASH_LENGTH:
+            if not self.db.scalar(select(models.Dataset.hash).where(models.Dataset.hash == prefix)):
+                raise FileNotFoundError(f"Dataset with hash {hash_prefix} not found.")
+            return prefix
+        if len(prefix) < MIN_HASH_PREFIX:
+            raise ValueError(f"Hash prefix must be at least {MIN_HASH_PREFIX} characters.")
+        if any(c not in "0123456789abcdef" for c in prefix):
+            raise FileNotFoundError(f"Dataset with hash {hash_prefix} not found.")
+
+        if self.db.get_bind().dialect.name == "postgresql":
+            # Served by the text_pattern_ops index
+            condition = models.Dataset.hash.like(f"{prefix}%")
+        else:
+            # Range scan over the primary key: every hash starting with
+            # `prefix` sorts between it and the same prefix followed by "g"
+            condition = and_(models.Dataset.hash >= prefix, models.Dataset.hash < prefix + "g")
+        matches = self.db.scalars(
+            select(models.Dataset.hash).where(condition).order_by(models.Dataset.hash).limit(5)
+        ).all()
+        if not matches:
+            raise FileNotFoundError(f"Dataset with hash {hash_prefix} not found.")
+        if len(matches) > 1:
+            candidates = ", ".join(match[:12] for match in matches)
+            raise ValueError(f"Hash prefix {hash_prefix} is ambiguous; candidates: {candidates}...")
+        return matches[0]
+
+    def search(self, query: str, limit: int = 20):
+        """
+        Finds datasets whose name or source contains `query` (case-insensitive),
+        best matches first.
+        """
+        query = query.strip()
+        if not query:
+            return []
+        if self.db.get_bind().dialect.name == "postgresql":
+            # ILIKE is answered from the pg_trgm GIN indexes
+            score = func.greatest(
+                func.similarity(models.Dataset.name, query),
+                func.similarity(func.coalesce(models.Dataset.source, ""), query),
+            )
+            return self.db.execute(
+                select(*LISTING_COLUMNS)
+                .where(or_(
+                    models.Dataset.name.icontains(query, autoescape=True),
+                    models.Dataset.source.icontains(query, autoescape=True),
+                ))
+                .order_by(score.desc(), models.Dataset.hash)
+                .limit(limit)
+            ).all()
+
+        index = get_search_index()
+        if index is not None:
+            # Long-running API process: searched from memory
+            index.catch_up(self.db)
+            hashes = index.search(query, limit=limit)
+        elif has_sqlite_fts(self.db):
+            hashes = sqlite_search(self.db, query, limit=limit)
+        else:
+            # A database without the search table (not migrated to 0006)
+            return self.db.execute(
+                select(*LISTING_COLUMNS)
+                .where(or_(
+                    models.Dataset.name.icontains(query, autoescape=True),
+                    models.Dataset.source.icontains(query, autoescape=True),
+                ))
+                .order_by(models.Dataset.hash)
+                .limit(limit)
+            ).all()
+        if not hashes:
+            return []
+        rows = {
+            row.hash: row for row in
+            self.db.execute(select(*LISTING_COLUMNS).where(models.Dataset.hash.in_(hashes)))
+        }
+        return [rows[h] for h in hashes if h in rows]
+
     def find_all(self):
         """
         Finds all datasets that are either active in the registry OR 
@@ -46,6 +177,113 @@ class DataManager:
         )
         return query.order_by(models.Dataset.created_at.desc()).all()
 
+    def find_page(
+        self,
+        limit: int | None = 100,
+        after: str | None = None,
+        name_prefix: str | None = None,
+        source: str | None = None,
+        active: bool | None = None,
+        min_size: int | None = None,
+        max_size: int | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ):
+        """
+        One page of datasets, newest first, as lightweight rows (LISTING_COLUMNS).
+        Pages are addressed by keyset cursor on (created_at, hash), so deep
+        pages cost the same as the first one.
+
+        `active=None` keeps the `find_all` visibility rules (active datasets
+        plus the current user's local copies); True/False filter on is_active.
+
+        Returns (rows, next_cursor); next_cursor is None on the last page.
+        """
+        query = select(*LISTING_COLUMNS)
+        if active is None:
+            local_hashes_subquery = select(models.LocalCopy.dataset_hash).where(
+                models.LocalCopy.user_identifier == get_current_user()
+            )
+            query = query.where(or_(
+                models.Dataset.is_active == True,
+                models.Dataset.hash.in_(local_hashes_subquery),
+            ))
+        else:
+            query = query.where(models.Dataset.is_active == active)
+
+        if name_prefix:
+            query = query.where(models.Dataset.name.startswith(name_prefix, autoescape=True))
+        if source:
+            query = query.where(models.Dataset.source == source)
+        if min_size is not None:
+            query = query.where(models.Dataset.size_bytes >= min_size)
+        if max_size is not None:
+            query = query.where(models.Dataset.size_bytes <= max_size)
+        if created_after is not None:
+            query = query.where(models.Dataset.created_at >= created_after)
+        if created_before is not None:
+            query = query.where(models.Dataset.created_at < created_before)
+        if after:
+            cursor_created_at, cursor_hash = decode_cursor(after)
+            query = query.where(
+                tuple_(models.Dataset.created_at, models.Dataset.hash) < tuple_(cursor_created_at, cursor_hash)
+            )
+
+        query = query.order_by(models.Dataset.created_at.desc(), models.Dataset.hash.desc())
+        if limit is None:
+            return self.db.execute(query).all(), None
+
+        # Fetch one extra row to know whether there is a next page
+        rows = self.db.execute(query.limit(limit + 1)).all()
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].created_at, rows[-1].hash)
+
+    def iter_all_with_local_paths(self, batch_size: int = 500):
+        """
+        Like `find_all`, but joins in the current user's local copy in the same
+        query and yields batches of (dataset, local_path) as rows arrive.
+        Datasets are lightweight rows (LISTING_COLUMNS), not ORM objects.
+        local_path is None when the user has no copy or it no longer exists;
+        the existence checks for a batch are done in parallel.
+        """
+        user = get_current_user()
+        query = (
+            select(*LISTING_COLUMNS, models.LocalCopy.local_path)
+            .outerjoin(
+                models.LocalCopy,
+                and_(
+                    models.LocalCopy.dataset_hash == models.Dataset.hash,
+                    models.LocalCopy.user_identifier == user,
+                ),
+            )
+            .where(or_(models.Dataset.is_active == True, models.LocalCopy.id.isnot(None)))
+            .order_by(models.Dataset.created_at.desc())
+            .execution_options(yield_per=batch_size)
+        )
+        for partition in self.db.execute(query).partitions():
+            existing = utils.paths_exist([row.local_path for row in partition if row.local_path])
+            yield [
+                (row, Path(row.local_path) if row.local_path and existing[row.local_path] else None)
+                for row in partition
+            ]
+
+    def find_local_paths_for_user(self, file_hashes: list[str]) -> dict[str, Path]:
+        """Batched `find_local_path_for_user`: one query for all hashes."""
+        user = get_current_user()
+        paths = {}
+        for i in range(0, len(file_hashes), QUERY_BATCH_SIZE):
+            batch = file_hashes[i:i + QUERY_BATCH_SIZE]
+            paths.update(self.db.execute(
+                select(models.LocalCopy.dataset_hash, models.LocalCopy.local_path).where(
+                    models.LocalCopy.user_identifier == user,
+                    models.LocalCopy.dataset_hash.in_(batch),
+                )
+            ).tuples().all())
+        existing = utils.paths_exist(list(paths.values()))
+        return {h: Path(p) for h, p in paths.items() if existing[p]}
+
     def find_local_path_for_user(self, file_hash: str):
         user = get_current_user()
         copy = self.db.query(models.LocalCopy).filter_by(dataset_hash=file_hash, user_identifier=user).first()
@@ -60,42 +298,431 @@ class DataManager:
             copy = models.LocalCopy(dataset_hash=dataset_hash, user_identifier=user, local_path=local_path)
             self.db.add(copy)
         self.db.commit()
+        events.emit("local_copy_changed", file_hash=dataset_hash)
 
 
-    def push_dataset(self, local_path_str: str, source: str | None = None):
+    def _cache_object(self, file_hash: str, path: Path, copy: bool = True):
+        """
+        Adds a file to the local object cache; the cache is best effort.
+        Pushes pass copy=False: the file is only cached if it can be linked.
+        """
+        cache = get_object_cache()
+        if cache is None:
+            return
+        try:
+            cache.add(file_hash, path, copy=copy)
+        except OSError as e:
+            print(f"Warning: could not add {path.name} to the local cache: {e}")
+
+    def _upload_object(self, local_path: Path, file_hash: str, name: str,
+                       progress: utils.ProgressCallback | None = None) -> tuple[str, str, int]:
+        """
+        Uploads one file-format object, compressed if DATATRAC_COMPRESSION picks
+        a codec for it. Returns (registry_path, codec, stored size).
+        """
+        codec = compression.choose_codec(local_path)
+        size = local_path.stat().st_size
+        if codec != compression.NONE:
+            # Compressed on the fly into the backend, without a local temp file
+            registry_path = self.storage.object_path(f"{file_hash}{Path(name).suffix}{compression.SUFFIXES[codec]}")
+            blocks = compression.iter_compressed(local_path, codec, progress=progress)
+            stored_size = self.storage.upload_stream(blocks, registry_path)
+            if stored_size < size:
+                return registry_path, codec, stored_size
+            # The sample was misleading; never store something bigger
+            self.storage.delete(registry_path)
+        registry_path = self.storage.object_path(f"{file_hash}{Path(name).suffix}")
+        self.storage.upload(local_path, registry_path, progress=progress)
+        return registry_path, compression.NONE, size
+
+    def push_dataset(self, local_path_str: str, source: str | None = None, chunked: bool | None = None,
+                     file_hash: str | None = None, name: str | None = None, record_local_copy: bool = True,
+                     progress: utils.ProgressCallback | None = None):
+        """
+        Hashes a local file and uploads it unless the registry already has it.
+        Callers that already know the hash (e.g. the API, which hashes uploads
+        while receiving them) pass `file_hash` to skip reading the file again.
+        `progress(bytes_done, bytes_total)` follows the upload.
+        """
+        if chunked is None:
+            chunked = CHUNKED_STORAGE
         local_path = Path(local_path_str).resolve()
         if not local_path.exists():
             raise FileNotFoundError(f"File not found: {local_path}")
 
-        file_hash = utils.hash_file(str(local_path))
+        if file_hash is None:
+            file_hash = cached_hash_file(str(local_path))
+        name = name or local_path.name
         dataset = self.find_by_hash(file_hash)
         was_uploaded = False  # Initialize flag
 
         if not dataset:
             print("Dataset not found in global registry. Uploading...")
-            registry_path = f"{REMOTE_STORAGE_PATH}/{file_hash}{local_path.suffix}"
-            run_command(["scp", str(local_path), f"{REMOTE_TARGET}:{registry_path}"])
+            # Chunked datasets are deduplicated instead of compressed
+            codec, stored_size = compression.NONE, None
+            if chunked:
+                registry_path = self.storage.object_path(f"{file_hash}{Path(name).suffix}")
+                chunk_links = self._store_chunked(local_path, progress=progress)
+            else:
+                registry_path, codec, stored_size = self._upload_object(local_path, file_hash, name, progress=progress)
 
             # NEW: Get file size during push
             file_size = local_path.stat().st_size
 
             dataset = models.Dataset(
                 hash=file_hash, 
-                name=local_path.name, 
+                name=name, 
                 source=source, 
                 registry_path=registry_path,
-                size_bytes=file_size
+                size_bytes=file_size,
+                storage_format="chunked" if chunked else "file",
+                codec=codec,
+                stored_size_bytes=stored_size,
             )
+            if chunked:
+                dataset.chunks = chunk_links
             self.db.add(dataset)
             was_uploaded = True # Set flag to True on new upload
         else:
             print(f"Dataset with hash {file_hash[:8]}... already exists in global registry.")
 
-        self._get_or_create_local_copy(file_hash, str(local_path))
-        
+        if record_local_copy:
+            self._get_or_create_local_copy(file_hash, str(local_path))
+            self._cache_object(file_hash, local_path, copy=False)
+        else:
+            self.db.commit()
+        if was_uploaded:
+            events.emit("dataset_changed", file_hash=file_hash)
+
         # Return both the dataset object and the flag
         return dataset, was_uploaded
 
+    def push_many(self, local_paths: list[str], source: str | None = None, jobs: int = 4,
+                  chunked: bool | None = None):
+        """
+        Pushes many files at once. Files are hashed in parallel, the registry
+        is asked which hashes it already has in batched queries, only the
+        missing files are uploaded (at most `jobs` at a time) and all rows
+        are written in a single transaction.
+
+        In chunked format files are stored one after another (their chunks
+        are uploaded `jobs` at a time), since chunk deduplication needs the
+        database session.
+
+        Returns (results, failures) where results is a list of
+        (path, dataset, was_uploaded) and failures maps path -> error message.
+        """
+        if chunked is None:
+            chunked = CHUNKED_STORAGE
+        paths = [Path(p).resolve() for p in local_paths]
+        for path in paths:
+            if not path.exists():
+                raise FileNotFoundError(f"File not found: {path}")
+
+        failures = {}
+
+        def _hash(path: Path) -> str | None:
+            # One unreadable file is reported, not fatal for the batch
+            try:
+                return cached_hash_file(str(path))
+            except OSError as e:
+                failures[str(path)] = str(e)
+                return None
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            hashes = list(pool.map(_hash, paths))
+        hashed = [(path, file_hash) for path, file_hash in zip(paths, hashes) if file_hash is not None]
+
+        unique_hashes = list(dict.fromkeys(file_hash for _, file_hash in hashed))
+        existing = {}
+        for i in range(0, len(unique_hashes), QUERY_BATCH_SIZE):
+            batch = unique_hashes[i:i + QUERY_BATCH_SIZE]
+            for ds in self.db.query(models.Dataset).filter(models.Dataset.hash.in_(batch)):
+                existing[ds.hash] = ds
+
+        # The first file seen for each new hash is the one that gets uploaded
+        to_upload = {}
+        for path, file_hash in hashed:
+            if file_hash not in existing and file_hash not in to_upload:
+                to_upload[file_hash] = path
+
+        def _upload(item):
+            file_hash, path = item
+            return self._upload_object(path, file_hash, path.name)
+
+        new_datasets = {}
+        if to_upload and chunked:
+            print(f"Uploading {len(to_upload)} new dataset(s) in chunked format...")
+            for file_hash, path in to_upload.items():
+                try:
+                    chunk_links = self._store_chunked(path, jobs=jobs)
+                    size = path.stat().st_size
+                except (RuntimeError, OSError) as e:
+                    failures[str(path)] = str(e)
+                    continue
+                new_datasets[file_hash] = models.Dataset(
+                    hash=file_hash,
+                    name=path.name,
+                    source=source,
+                    registry_path=self.storage.object_path(f"{file_hash}{path.suffix}"),
+                    size_bytes=size,
+                    storage_format="chunked",
+                    chunks=chunk_links,
+                )
+        elif to_upload:
+            print(f"Uploading {len(to_upload)} new dataset(s) with {jobs} worker(s)...")
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                futures = {pool.submit(_upload, item): item for item in to_upload.items()}
+                for future, (file_hash, path) in futures.items():
+                    try:
+                        registry_path, codec, stored_size = future.result()
+                        size = path.stat().st_size
+                    except (RuntimeError, OSError) as e:
+                        failures[str(path)] = str(e)
+                        continue
+                    new_datasets[file_hash] = models.Dataset(
+                        hash=file_hash,
+                        name=path.name,
+                        source=source,
+                        registry_path=registry_path,
+                        size_bytes=size,
+                        codec=codec,
+                        stored_size_bytes=stored_size,
+                    )
+        self.db.add_all(new_datasets.values())
+
+        # Local copies: one lookup for the whole batch, then update or insert
+        user = get_current_user()
+        registered = {**existing, **new_datasets}
+        copies = {}
+        known_hashes = list(registered)
+        for i in range(0, len(known_hashes), QUERY_BATCH_SIZE):
+            batch = known_hashes[i:i + QUERY_BATCH_SIZE]
+            for copy in self.db.query(models.LocalCopy).filter(
+                models.LocalCopy.user_identifier == user,
+                models.LocalCopy.dataset_hash.in_(batch),
+            ):
+                copies[copy.dataset_hash] = copy
+
+        results = []
+        for path, file_hash in hashed:
+            dataset = registered.get(file_hash)
+            if dataset is None:
+                failures.setdefault(str(path), "Upload of identical content failed.")
+                continue
+            copy = copies.get(file_hash)
+            if copy:
+                copy.local_path = str(path)
+            else:
+                copy = models.LocalCopy(dataset_hash=file_hash, user_identifier=user, local_path=str(path))
+                copies[file_hash] = copy
+                self.db.add(copy)
+            was_uploaded = file_hash in new_datasets and to_upload[file_hash] == path
+            results.append((path, dataset, was_uploaded))
+
+        self.db.commit()
+        for file_hash in new_datasets:
+            events.emit("dataset_changed", file_hash=file_hash)
+        for file_hash in copies:
+            events.emit("local_copy_changed", file_hash=file_hash)
+        for path, dataset, _ in results:
+            self._cache_object(dataset.hash, path, copy=False)
+        return results, failures
+
+    def _chunk_registry_path(self, chunk_hash: str) -> str:
+        return self.storage.object_path(f"chunks/{chunk_hash[:2]}/{chunk_hash}")
+
+    def _store_chunked(self, local_path: Path, jobs: int = 4,
+                       progress: utils.ProgressCallback | None = None) -> list[models.DatasetChunk]:
+        """
+        Splits a file into content-defined chunks and uploads only the chunks
+        the registry does not have yet. New `Chunk` rows are added to the
+        session; the returned `DatasetChunk` links still need a dataset.
+        """
+        links = []
+        seen = set()  # chunks uploaded (or known) during this push
+        new_chunks = 0
+        reused_bytes = 0
+        bytes_done, bytes_total = 0, local_path.stat().st_size
+
+        def _flush(batch):
+            nonlocal new_chunks, reused_bytes, bytes_done
+            candidates = {c.hash: c for c in batch if c.hash not in seen}
+            if candidates:
+                stored = set(self.db.scalars(
+                    select(models.Chunk.hash).where(models.Chunk.hash.in_(list(candidates)))
+                ))
+                missing = [c for h, c in candidates.items() if h not in stored]
+                reused_bytes += sum(c.size for h, c in candidates.items() if h in stored)
+
+                with ThreadPoolExecutor(max_workers=jobs) as pool:
+                    list(pool.map(
+                        lambda c: self.storage.put_bytes(c.data, self._chunk_registry_path(c.hash)),
+                        missing,
+                    ))
+                for c in missing:
+                    self.db.add(models.Chunk(
+                        hash=c.hash, size_bytes=c.size, registry_path=self._chunk_registry_path(c.hash)
+                    ))
+                new_chunks += len(missing)
+                seen.update(candidates)
+            for c in batch:
+                links.append(models.DatasetChunk(seq=len(links), chunk_hash=c.hash))
+            bytes_done += sum(c.size for c in batch)
+            if progress:
+                progress(bytes_done, bytes_total)
+
+        batch = []
+        for chunk in iter_chunks(str(local_path)):
+            batch.append(chunk)
+            if len(batch) >= CHUNK_BATCH_SIZE:
+                _flush(batch)
+                batch = []
+        if batch:
+            _flush(batch)
+
+        print(f"Stored {len(links)} chunk(s): {new_chunks} new, {reused_bytes} bytes deduplicated.")
+        return links
+
+    def _reassemble_chunked(self, dataset: models.Dataset, destination: Path, jobs: int = 4):
+        """Downloads a chunked dataset and verifies it against the dataset hash."""
+        rows = self.db.execute(
+            select(models.Chunk.hash, models.Chunk.registry_path)
+            .join(models.DatasetChunk, models.DatasetChunk.chunk_hash == models.Chunk.hash)
+            .where(models.DatasetChunk.dataset_hash == dataset.hash)
+            .order_by(models.DatasetChunk.seq)
+        ).all()
+
+        def _fetch(row):
+            data = self.storage.get_bytes(row.registry_path)
+            if hashlib.sha256(data).hexdigest() != row.hash:
+                raise RuntimeError(f"Chunk {row.hash[:12]}... is corrupt in the registry.")
+            return data
+
+        file_hash = hashlib.sha256()
+        part_path = destination.with_name(destination.name + ".part")
+        with open(part_path, "wb") as out, ThreadPoolExecutor(max_workers=jobs) as pool:
+            # Fetch a bounded window of chunks at a time, writing them in order
+            window = jobs * 2
+            for i in range(0, len(rows), window):
+                for data in pool.map(_fetch, rows[i:i + window]):
+                    out.write(data)
+                    file_hash.update(data)
+
+        if file_hash.hexdigest() != dataset.hash:
+            part_path.unlink()
+            raise RuntimeError("Reassembled file does not match the dataset hash.")
+        os.replace(part_path, destination)
+
+    def _release_chunks(self, dataset: models.Dataset):
+        """Deletes the chunks of a deregistered dataset that no active dataset uses."""
+        other = aliased(models.DatasetChunk)
+        still_used = exists().where(
+            and_(
+                other.chunk_hash == models.DatasetChunk.chunk_hash,
+                other.dataset_hash != dataset.hash,
+            )
+        )
+        orphaned = self.db.execute(
+            select(models.Chunk)
+            .join(models.DatasetChunk, models.DatasetChunk.chunk_hash == models.Chunk.hash)
+            .where(models.DatasetChunk.dataset_hash == dataset.hash, ~still_used)
+            .distinct()
+        ).scalars().all()
+
+        # The chunk list is only needed to reassemble an active dataset
+        dataset.chunks = []
+        self.db.flush()
+        for chunk in orphaned:
+            self.storage.delete(chunk.registry_path)
+            self.db.delete(chunk)
+
+    def iter_content(self, dataset: models.Dataset, start: int, end: int, block_size: int = 8 * 1024 * 1024,
+                     decode: bool = True):
+        """
+        Returns a generator over bytes [start, end] (inclusive) of a stored
+        dataset. The chunk list is loaded up front, so the generator itself
+        only touches storage and can run in another thread.
+
+        Compressed objects are decompressed on the fly. They cannot be read
+        from the middle, so a range is served by decompressing from the
+        start and skipping up to it (the skipped part is never sent).
+        With decode=False the range applies to the stored bytes instead.
+        """
+        storage = self.storage
+        if decode and dataset.codec != compression.NONE:
+            stored_size = dataset.stored_size_bytes or storage.size(dataset.registry_path)
+            registry_path, codec = dataset.registry_path, dataset.codec
+
+            def _stored_blocks():
+                for pos in range(0, stored_size, block_size):
+                    yield storage.read_range(registry_path, pos, min(block_size, stored_size - pos))
+
+            return compression.slice_stream(compression.iter_decompressed(_stored_blocks(), codec), start, end)
+
+        if dataset.storage_format == "chunked":
+            pieces = []
+            offset = 0
+            rows = self.db.execute(
+                select(models.Chunk.registry_path, models.Chunk.size_bytes)
+                .join(models.DatasetChunk, models.DatasetChunk.chunk_hash == models.Chunk.hash)
+                .where(models.DatasetChunk.dataset_hash == dataset.hash)
+                .order_by(models.DatasetChunk.seq)
+            ).all()
+            for row in rows:
+                chunk_start, chunk_end = offset, offset + row.size_bytes - 1
+                if chunk_end >= start and chunk_start <= end:
+                    lo = max(start, chunk_start) - chunk_start
+                    hi = min(end, chunk_end) - chunk_start
+                    pieces.append((row.registry_path, lo, hi - lo + 1))
+                offset += row.size_bytes
+        else:
+            pieces = [
+                (dataset.registry_path, pos, min(block_size, end + 1 - pos))
+                for pos in range(start, end + 1, block_size)
+            ]
+
+        def _generate():
+            for registry_path, offset, length in pieces:
+                yield storage.read_range(registry_path, offset, length)
+
+        return _generate()
+
+    def verify_dataset(self, file_hash: str, progress: utils.ProgressCallback | None = None) -> dict:
+        """
+        Reads a dataset back from storage (decompressing/reassembling as a
+        download would) and checks it against its hash. Raises ValueError
+        if the stored content does not match.
+        """
+        dataset = self.find_by_hash(file_hash)
+        if not dataset:
+            raise ValueError(f"Dataset with hash {file_hash} not found.")
+        if not dataset.is_active:
+            raise ValueError("This dataset has been deregistered; its object is gone.")
+        size = dataset.size_bytes
+        if size is None:
+            size = self.storage.size(dataset.registry_path)
+        hasher = hashlib.sha256()
+        bytes_done = 0
+        if size:
+            for block in self.iter_content(dataset, 0, size - 1):
+                hasher.update(block)
+                bytes_done += len(block)
+                if progress:
+                    progress(bytes_done, size)
+        if hasher.hexdigest() != dataset.hash:
+            raise ValueError(f"Stored object of {file_hash[:12]} does not match its hash.")
+        return {"hash": dataset.hash, "bytes_verified": bytes_done}
+
+    def record_download(self, dataset: models.Dataset):
+        """
+        Updates the download statistics of a dataset with one atomic UPDATE
+        (download_count = download_count + 1), so concurrent downloads are
+        never lost.
+        """
+        stats.add_downloads(self.db, {dataset.hash: (1, datetime.now(timezone.utc))})
+        self.db.refresh(dataset)
+
     def download_dataset(self, file_hash: str, destination_dir: str = "."):
         existing_path = self.find_local_path_for_user(file_hash)
         if existing_path:
@@ -110,15 +737,53 @@ class DataManager:
             raise FileNotFoundError("Cannot download: This dataset has been deregistered by an admin and is no longer available on the server.")
         
         local_destination = Path(destination_dir).resolve() / dataset.name
-        remote_source = f"{REMOTE_TARGET}:{dataset.registry_path}"
-        print(f"Downloading from {REMOTE_TARGET}...")
-        run_command(["scp", remote_source, str(local_destination)])
-        self._get_or_create_local_copy(file_hash, str(local_destination))
 
+        # NEW: Another download or push on this machine may have cached it
+        cache = get_object_cache()
+        method = None
+        if cache:
+            try:
+                method = cache.materialize(dataset.hash, local_destination)
+            except OSError as e:
+                # An unreadable or broken entry is a cache miss, not a failed download
+                print(f"Warning: could not restore {dataset.name} from the local cache: {e}")
+        if method:
+            self._get_or_create_local_copy(file_hash, str(local_destination))
+            self.record_download(dataset)
+            return local_destination, f"Restored from the local cache ({method}), no transfer needed."
 
-        dataset.download_count += 1
-        dataset.last_downloaded_at = datetime.now(timezone.utc)
-        self.db.commit()
+        print("Downloading from the registry...")
+        if dataset.storage_format == "chunked":
+            self._reassemble_chunked(dataset, local_destination)
+        elif dataset.codec != compression.NONE:
+            # Transfer the (smaller) compressed object, resumably, next to the
+            # destination, then decompress it and verify the original hash
+            stored_path = local_destination.with_name(
+                f".{local_destination.name}{compression.SUFFIXES[dataset.codec]}"
+            )
+            download_ranged(
+                self.storage,
+                dataset.registry_path,
+                stored_path,
+                expected_hash=None,
+                size=dataset.stored_size_bytes,
+            )
+            try:
+                compression.decompress_file(stored_path, local_destination, dataset.codec, expected_hash=dataset.hash)
+            finally:
+                stored_path.unlink(missing_ok=True)
+        else:
+            download_ranged(
+                self.storage,
+                dataset.registry_path,
+                local_destination,
+                expected_hash=dataset.hash,
+                size=dataset.size_bytes,
+            )
+        self._get_or_create_local_copy(file_hash, str(local_destination))
+        self._cache_object(dataset.hash, local_destination)
+
+        self.record_download(dataset)
         return local_destination, "Download complete."
 
     def delete_dataset(self, file_hash: str):
@@ -134,11 +799,15 @@ class DataManager:
             return False, "This dataset has already been deregistered."
 
         print(f"Deleting remote file: {dataset.registry_path}")
-        run_command(["ssh", REMOTE_TARGET, f"rm {dataset.registry_path}"])
+        if dataset.storage_format == "chunked":
+            self._release_chunks(dataset)
+        else:
+            self.storage.delete(dataset.registry_path)
         
         # UPDATE instead of DELETE
         dataset.is_active = False
         self.db.commit()
+        events.emit("dataset_deleted", file_hash=file_hash)
         return True, "Dataset has been deregistered. Users with local copies can still see it."
 
     def delete_local_copy(self, file_hash: str):
@@ -152,42 +821,219 @@ class DataManager:
         if not local_file.exists():
             self.db.delete(copy) # Clean up dangling record
             self.db.commit()
+            events.emit("local_copy_changed", file_hash=file_hash)
             return False, "Local file not found, but stale record was cleaned up."
         
         local_file.unlink()
         self.db.delete(copy)
         self.db.commit()
+        events.emit("local_copy_changed", file_hash=file_hash)
         return True, f"Successfully deleted local file and record for: {local_file}"
 
     def create_lineage(self, parent_hash: str, child_hash: str) -> models.Lineage:
-        """Creates a lineage link between two datasets."""
-        parent = self.find_by_hash(parent_hash)
-        if not parent:
-            raise ValueError(f"Parent dataset with hash {parent_hash} not found.")
-        
-        child = self.find_by_hash(child_hash)
-        if not child:
-            raise ValueError(f"Child dataset with hash {child_hash} not found.")
+        """
+        Creates a lineage link between two datasets. Creating a link that
+        exists already is a no-op; a link that would close a cycle raises.
+        """
+        result = self.create_lineage_batch([(parent_hash, child_hash)])
+        if result["rejected"]:
+            raise ValueError(result["rejected"][0]["reason"])
+        return self.db.get(models.Lineage, (parent_hash, child_hash))
+
+    def create_lineage_batch(self, links: Iterable[tuple[str, str]]) -> dict:
+        """
+        Creates many lineage links at once, e.g. everything a pipeline run
+        produced. Endpoints and existing links are looked up with set
+        queries, and the new links are written in one bulk insert that
+        ignores links created concurrently.
+
+        Links to unknown datasets and links that would create a cycle are
+        rejected and reported, the rest are still created. Cycles are found
+        with an incremental topological order over the descendants of the
+        new children, the only part of the graph a new link can close a
+        cycle through.
+
+        Returns {"created": n, "existing": n, "rejected": [{parent, child, reason}]}.
+        """
+        pairs = list(dict.fromkeys((parent, child) for parent, child in links))
+        known = self._existing_hashes({h for pair in pairs for h in pair})
+
+        rejected, candidates = [], []
+        for parent, child in pairs:
+            if parent not in known:
+                reason = f"Parent dataset with hash {parent} not found."
+            elif child not in known:
+                reason = f"Child dataset with hash {child} not found."
+            elif parent == child:
+                reason = "A dataset cannot be its own parent."
+            else:
+                candidates.append((parent, child))
+                continue
+            rejected.append({"parent": parent, "child": child, "reason": reason})
+
+        existing = self._existing_links(candidates)
+        new_links = [pair for pair in candidates if pair not in existing]
+        created = []
+        if new_links:
+            graph = IncrementalTopoOrder(edges=self._descendant_links({child for _, child in new_links}))
+            for parent, child in new_links:
+                if graph.add_edge(parent, child):
+                    created.append((parent, child))
+                else:
+                    rejected.append({
+                        "parent": parent, "child": child,
+                        "reason": f"Linking {parent[:12]} -> {child[:12]} would create a cycle.",
+                    })
+        if created:
+            statement = upsert_insert(self.db, models.Lineage.__table__).on_conflict_do_nothing()
+            self.db.execute(statement, [{"parent_hash": p, "child_hash": c} for p, c in created])
+            self.db.commit()
+            for parent, child in created:
+                events.emit("lineage_created", parent_hash=parent, child_hash=child)
+        return {"created": len(created), "existing": len(existing), "rejected": rejected}
+
+    def _existing_hashes(self, hashes: set[str]) -> set[str]:
+        found = set()
+        hashes = list(hashes)
+        for start in range(0, len(hashes), QUERY_BATCH_SIZE):
+            batch = hashes[start:start + QUERY_BATCH_SIZE]
+            found.update(self.db.scalars(select(models.Dataset.hash).where(models.Dataset.hash.in_(batch))))
+        return found
+
+    def _existing_links(self, pairs: list[tuple[str, str]]) -> set[tuple[str, str]]:
+        # Looked up by parent (the leading primary key column) and filtered
+        # here: much faster than a row-value IN (...) on SQLite
+        wanted = set(pairs)
+        lineage = models.Lineage
+        found = set()
+        parents = list({parent for parent, _ in pairs})
+        for start in range(0, len(parents), QUERY_BATCH_SIZE):
+            batch = parents[start:start + QUERY_BATCH_SIZE]
+            rows = self.db.execute(
+                select(lineage.parent_hash, lineage.child_hash).where(lineage.parent_hash.in_(batch))
+            )
+            found.update((parent, child) for parent, child in rows if (parent, child) in wanted)
+        return found
+
+    def _descendant_links(self, roots: set[str]) -> set[tuple[str, str]]:
+        """Every existing link below `roots`, in one recursive query per batch of roots."""
+        lineage = models.Lineage
+        links = set()
+        roots = list(roots)
+        for start in range(0, len(roots), QUERY_BATCH_SIZE):
+            batch = roots[start:start + QUERY_BATCH_SIZE]
+            # UNION (not UNION ALL) visits each node once, even around cycles
+            reach = (
+                select(models.Dataset.hash.label("hash"))
+                .where(models.Dataset.hash.in_(batch))
+                .cte("reach", recursive=True)
+            )
+            reach = reach.union(
+                select(lineage.child_hash).join(reach, lineage.parent_hash == reach.c.hash)
+            )
+            rows = self.db.execute(
+                select(lineage.parent_hash, lineage.child_hash)
+                .where(lineage.parent_hash.in_(select(reach.c.hash)))
+            )
+            links.update((parent, child) for parent, child in rows)
+        return links
 
-        lineage_link = models.Lineage(parent_hash=parent_hash, child_hash=child_hash)
-        self.db.add(lineage_link)
-        self.db.commit()
-        self.db.refresh(lineage_link)
-        return lineage_link
-    
     def get_lineage(self, file_hash: str) -> dict:
         """Retrieves all parents and children for a given dataset hash."""
-        dataset = self.find_by_hash(file_hash)
-        if not dataset:
+        graph = self.get_lineage_graph(file_hash, depth=1)
+        return {
+            "parents": [{"name": n["name"], "hash": n["hash"]} for n in graph["nodes"] if n["depth"] == -1],
+            "children": [{"name": n["name"], "hash": n["hash"]} for n in graph["nodes"] if n["depth"] == 1],
+        }
+
+    def get_lineage_graph(self, file_hash: str, depth: int | None = None, direction: str = "both") -> dict:
+        """
+        Walks lineage transitively in one recursive SQL query (WITH RECURSIVE).
+
+        `direction` is "up" (ancestors), "down" (descendants) or "both";
+        `depth` limits how many links are followed: None means as far as
+        MAX_LINEAGE_DEPTH (which also stops runaway walks around cycles),
+        0 returns the dataset alone.
+
+        Returns a compact graph: {"root", "nodes": [{hash, name, depth}],
+        "edges": [{parent, child}]}. Node depth is negative for ancestors
+        and positive for descendants.
+        """
+        if direction not in ("up", "down", "both"):
+            raise ValueError("direction must be one of: up, down, both")
+        if depth is not None and depth < 0:
+            raise ValueError("depth must not be negative")
+        max_depth = MAX_LINEAGE_DEPTH if depth is None else min(depth, MAX_LINEAGE_DEPTH)
+
+        root = self.db.execute(
+            select(models.Dataset.hash, models.Dataset.name).where(models.Dataset.hash == file_hash)
+        ).first()
+        if not root:
             raise FileNotFoundError(f"Dataset with hash {file_hash} not found.")
+        if max_depth == 0:
+            # The recursive walks below always return their first step
+            return {"root": root.hash, "nodes": [{"hash": root.hash, "name": root.name, "depth": 0}], "edges": []}
 
-        parents = [
-            {"name": link.parent.name, "hash": link.parent.hash}
-            for link in dataset.parents
-        ]
-        children = [
-            {"name": link.child.name, "hash": link.child.hash}
-            for link in dataset.children
-        ]
-        
-        return {"parents": parents, "children": children}
\ No newline at end of file
+        lineage = models.Lineage
+        walks = []
+        if direction in ("down", "both"):
+            down = (
+                select(lineage.parent_hash, lineage.child_hash, literal(1).label("depth"))
+                .where(lineage.parent_hash == file_hash)
+                .cte("lineage_down", recursive=True)
+            )
+            down = down.union(
+                select(lineage.parent_hash, lineage.child_hash, down.c.depth + 1)
+                .join(down, lineage.parent_hash == down.c.child_hash)
+                .where(down.c.depth < max_depth)
+            )
+            walks.append(select(down.c.parent_hash, down.c.child_hash, down.c.depth.label("depth")))
+        if direction in ("up", "both"):
+            up = (
+                select(lineage.parent_hash, lineage.child_hash, literal(1).label("depth"))
+                .where(lineage.child_hash == file_hash)
+                .cte("lineage_up", recursive=True)
+            )
+            up = up.union(
+                select(lineage.parent_hash, lineage.child_hash, up.c.depth + 1)
+                .join(up, lineage.child_hash == up.c.parent_hash)
+                .where(up.c.depth < max_depth)
+            )
+            walks.append(select(up.c.parent_hash, up.c.child_hash, (-up.c.depth).label("depth")))
+
+        # The recursive .union() above already drops repeated (edge, depth)
+        # rows, so diamonds and cycles do not multiply the result; the two
+        # directions are disjoint by sign of depth, hence UNION ALL here.
+        # Names come from the same query
+        walk = union_all(*walks).subquery("walk")
+        parent_ds = aliased(models.Dataset)
+        child_ds = aliased(models.Dataset)
+        rows = self.db.execute(
+            select(
+                walk.c.parent_hash, parent_ds.name,
+                walk.c.child_hash, child_ds.name,
+                walk.c.depth,
+            )
+            .join(parent_ds, parent_ds.hash == walk.c.parent_hash)
+            .join(child_ds, child_ds.hash == walk.c.child_hash)
+        ).all()
+
+        nodes = {root.hash: {"hash": root.hash, "name": root.name, "depth": 0}}
+        edges = {}
+        for parent_hash, parent_name, child_hash, child_name, edge_depth in rows:
+            edges[(parent_hash, child_hash)] = {"parent": parent_hash, "child": child_hash}
+            # The far end of the edge is the node this step discovered
+            if edge_depth > 0:
+                node_hash, node_name = child_hash, child_name
+            else:
+                node_hash, node_name = parent_hash, parent_name
+            known = nodes.get(node_hash)
+            if known is None or abs(edge_depth) < abs(known["depth"]):
+                if node_hash != root.hash:
+                    nodes[node_hash] = {"hash": node_hash, "name": node_name, "depth": edge_depth}
+
+        return {
+            "root": root.hash,
+            "nodes": sorted(nodes.values(), key=lambda n: (n["depth"], n["name"] or "")),
+            "edges": list(edges.values()),
+        }
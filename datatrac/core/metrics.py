@@ -0,0 +1,367 @@
+# datatrac/core/metrics.py
+"""
+Built-in metrics and tracing (no extra dependencies).
+
+- Counters and histograms live in memory and are rendered in the
+  Prometheus text format (`GET /metrics` on the API server).
+- `span(name, **attrs)` times a block: hashing, compression, storage
+  transfers and remote commands are wrapped in spans. A span records into
+  `datatrac_span_seconds` / `datatrac_span_bytes_total`, into the profile
+  printed by `datatrac --profile`, and, when DATATRAC_TRACE_FILE is set,
+  is appended to that file as one JSON line (trace/span/parent ids,
+  start, duration, attributes).
+- `instrument_engine` times every SQL statement and every session commit
+  through SQLAlchemy events.
+
+Spans nest through a context variable, so a span's "self" time excludes
+the time of spans opened inside it (in the same thread or task).
+
+This module only imports the standard library; SQLAlchemy is touched only
+when an engine is instrumented.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .config import METRICS_ENABLED, TRACE_FILE
+
+# Seconds; transfers and hashes can take minutes
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+# SQL statements are usually far below a millisecond on SQLite
+QUERY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount: float = 1, *labelvalues):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, *labelvalues):
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self) -> dict[tuple, tuple[float, int]]:
+        """labels -> (sum, count)"""
+        with self._lock:
+            return {key: (series[1], series[2]) for key, series in self._series.items()}
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += bucket_count
+                    le = f'le="{bound:g}"' if bound != "+Inf" else 'le="+Inf"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total:.6f}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+REGISTRY: list = []
+
+SPAN_SECONDS = Histogram(
+    "datatrac_span_seconds", "Time spent in instrumented operations (hashing, compression, transfers, commands).",
+    ("span",),
+)
+SPAN_BYTES = Counter("datatrac_span_bytes_total", "Bytes processed by instrumented operations.", ("span",))
+DB_QUERY_SECONDS = Histogram(
+    "datatrac_db_query_seconds", "SQL statements, by database and statement type.", ("database", "operation"), QUERY_BUCKETS,
+)
+DB_COMMIT_SECONDS = Histogram("datatrac_db_commit_seconds", "Session commits, including the flush before them.", (), QUERY_BUCKETS)
+HTTP_REQUEST_SECONDS = Histogram(
+    "datatrac_http_request_seconds", "API requests, from the first byte received to the last byte sent.",
+    ("method", "route", "status"),
+)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Spans ---
+
+class Span:
+    __slots__ = ("name", "attrs", "parent", "trace_id", "span_id", "start", "wall_start", "child_seconds", "_token")
+
+    def __init__(self, name: str, attrs: dict, parent: "Span | None"):
+        self.name, self.attrs, self.parent = name, attrs, parent
+        self.child_seconds = 0.0
+        self.trace_id = self.span_id = None
+        if _tracer is not None:
+            self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+            self.span_id = os.urandom(8).hex()
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+
+
+_current_span: ContextVar[Span | None] = ContextVar("datatrac_span", default=None)
+
+
+def start_span(name: str, **attrs) -> Span:
+    """Opens a span and makes it the parent of spans opened after it; close it with `finish_span`."""
+    span = Span(name, attrs, _current_span.get())
+    span._token = _current_span.set(span)
+    return span
+
+
+def finish_span(span: Span, error: BaseException | None = None):
+    duration = time.perf_counter() - span.start
+    try:
+        _current_span.reset(span._token)
+    except ValueError:
+        # Finished from another context (e.g. a CLI close callback)
+        _current_span.set(span.parent)
+    if error is not None:
+        span.attrs["error"] = type(error).__name__
+    if span.parent is not None:
+        span.parent.child_seconds += duration
+    SPAN_SECONDS.observe(duration, span.name)
+    size = span.attrs.get("bytes")
+    if size:
+        SPAN_BYTES.inc(size, span.name)
+    _report(span.name, duration, duration - span.child_seconds, size, span)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Times the block. Attributes can be added to `.attrs` inside it, e.g.
+    the number of bytes once it is known.
+    """
+    if not METRICS_ENABLED:
+        yield _NULL_SPAN
+        return
+    current = start_span(name, **attrs)
+    try:
+        yield current
+    except BaseException as e:
+        finish_span(current, e)
+        raise
+    finish_span(current)
+
+
+class _NullSpan:
+    attrs: dict = {}
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def record(name: str, duration: float, **attrs):
+    """Reports an operation timed elsewhere (e.g. by SQLAlchemy events) as a leaf span."""
+    parent = _current_span.get()
+    if parent is not None:
+        parent.child_seconds += duration
+    leaf = None
+    if _tracer is not None:
+        leaf = Span(name, attrs, parent)
+        leaf.wall_start -= duration
+    _report(name, duration, duration, attrs.get("bytes"), leaf)
+
+
+def _report(name: str, duration: float, self_seconds: float, size: int | None, span: Span | None):
+    if _profile is not None:
+        _profile.add(name, duration, self_seconds, size)
+    if _tracer is not None and span is not None:
+        _tracer.write(span, duration)
+
+
+# --- Trace export ---
+
+class _TraceWriter:
+    """Appends finished spans to a file as JSON lines."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", buffering=1024 * 1024)
+
+    def write(self, span: Span, duration: float):
+        line = json.dumps({
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent.span_id if span.parent else None,
+            "name": span.name,
+            "start": round(span.wall_start, 6),
+            "duration_ms": round(duration * 1000, 3),
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+            "attrs": span.attrs,
+        }, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+
+_tracer: _TraceWriter | None = None
+
+
+def enable_tracing(path: str):
+    global _tracer
+    if _tracer is None:
+        _tracer = _TraceWriter(path)
+        import atexit
+        atexit.register(_tracer.flush)
+
+
+if METRICS_ENABLED and TRACE_FILE:
+    enable_tracing(TRACE_FILE)
+
+
+# --- Profile (datatrac --profile) ---
+
+class Profile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        # name -> [calls, total seconds, self seconds, bytes]
+        self.phases: dict[str, list] = {}
+
+    def add(self, name: str, duration: float, self_seconds: float, size: int | None):
+        with self._lock:
+            phase = self.phases.setdefault(name, [0, 0.0, 0.0, 0])
+            phase[0] += 1
+            phase[1] += duration
+            phase[2] += self_seconds
+            phase[3] += size or 0
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def rows(self) -> list[tuple[str, int, float, float, int]]:
+        """(phase, calls, total, self, bytes), slowest first."""
+        with self._lock:
+            rows = [(name, *values) for name, values in self.phases.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+
+_profile: Profile | None = None
+
+
+def enable_profile() -> Profile | None:
+    global _profile
+    if METRICS_ENABLED and _profile is None:
+        _profile = Profile()
+    return _profile
+
+
+# --- SQLAlchemy ---
+
+_session_events_installed = False
+
+
+_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+# Statement text -> operation; compiled statements are cached by SQLAlchemy,
+# so the same few hundred strings come back over and over
+_operation_cache: dict[str, str] = {}
+
+
+def _operation(statement: str) -> str:
+    operation = _operation_cache.get(statement)
+    if operation is None:
+        word = statement[:16].lstrip().partition(" ")[0].upper()
+        operation = word if word in _OPERATIONS else "OTHER"
+        if len(_operation_cache) < 2048:
+            _operation_cache[statement] = operation
+    return operation
+
+
+def instrument_engine(engine, database: str = "registry"):
+    """Times every statement run on `engine` (labelled `database`) and every ORM session commit."""
+    global _session_events_installed
+    if not METRICS_ENABLED:
+        return
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    perf_counter = time.perf_counter
+
+    # The start time rides on the execution context, which lives exactly as
+    # long as one statement
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._datatrac_start = perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_datatrac_start", None)
+        if start is None:
+            return
+        duration = perf_counter() - start
+        operation = _operation(statement)
+        DB_QUERY_SECONDS.observe(duration, database, operation)
+        if _tracer is not None:
+            record("db.query", duration, database=database, operation=operation, statement=statement[:200])
+        elif _profile is not None or _current_span.get() is not None:
+            record("db.query", duration)
+
+    if _session_events_installed:
+        return
+    _session_events_installed = True
+
+    @event.listens_for(Session, "before_commit")
+    def _before_commit(session):
+        session.info["datatrac_commit_start"] = time.perf_counter()
+
+    def _commit_done(session):
+        start = session.info.pop("datatrac_commit_start", None)
+        if start is not None:
+            duration = time.perf_counter() - start
+            DB_COMMIT_SECONDS.observe(duration)
+            record("db.commit", duration)
+
+    event.listen(Session, "after_commit", _commit_done)
+    event.listen(Session, "after_soft_rollback", lambda session, previous: session.info.pop("datatrac_commit_start", None))
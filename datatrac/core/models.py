@@ -1,16 +1,67 @@
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Boolean, BigInteger
+from sqlalchemy import DDL, JSON, Column, String, DateTime, ForeignKey, Integer, Boolean, BigInteger, Index, Text, event
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql.functions import FunctionElement
 from .db import Base
 
+
+class change_timestamp(FunctionElement):
+    """
+    The database clock when the statement runs. PostgreSQL's now() is the
+    start of the transaction instead, which can be minutes before the commit
+    (e.g. a push that uploads inside its transaction); rows stamped that early
+    would fall behind a replica's watermark before they become visible.
+    """
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+
+@compiles(change_timestamp)
+def _change_timestamp(element, compiler, **kw):
+    # SQLite (and most others): the time of the current statement
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(change_timestamp, "postgresql")
+def _change_timestamp_postgresql(element, compiler, **kw):
+    return "clock_timestamp()"
+
+
+def updated_at_column():
+    """
+    Last change of a row, set on insert and on every UPDATE (ORM or Core).
+    Local replicas sync incrementally by this watermark, so it comes from
+    the database clock rather than each client's.
+    """
+    return Column(DateTime(timezone=True), default=change_timestamp(), onupdate=change_timestamp(),
+                  server_default=change_timestamp(), nullable=False, index=True)
+
 class Dataset(Base):
     __tablename__ = "datasets"
+    __table_args__ = (
+        # Keyset pagination walks (created_at, hash) in descending order
+        Index("ix_datasets_created_at_hash", "created_at", "hash"),
+        # Listing filters
+        Index("ix_datasets_source", "source"),
+        Index("ix_datasets_size_bytes", "size_bytes"),
+        # PostgreSQL only: hash-prefix lookups (LIKE 'abc%') need a
+        # pattern_ops index under non-C collations; SQLite range-scans the
+        # primary key instead
+        Index("ix_datasets_hash_pattern", "hash", postgresql_ops={"hash": "text_pattern_ops"}).ddl_if(dialect="postgresql"),
+        # PostgreSQL only: trigram indexes for substring search (ILIKE '%q%')
+        Index("ix_datasets_name_trgm", "name", postgresql_using="gin",
+              postgresql_ops={"name": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        Index("ix_datasets_source_trgm", "source", postgresql_using="gin",
+              postgresql_ops={"source": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
 
     hash = Column(String, primary_key=True, index=True)
     name = Column(String, index=True)
     source = Column(String, nullable=True)
     registry_path = Column(String, unique=True)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = updated_at_column()
 
     
 
@@ -20,9 +71,26 @@ class Dataset(Base):
     download_count = Column(BigInteger, default=0, nullable=False)
     last_downloaded_at = Column(DateTime, nullable=True)
 
+    # "file" = one object at registry_path, "chunked" = reassembled from
+    # the chunks listed in dataset_chunks. The hash is always the hash of
+    # the whole file either way.
+    storage_format = Column(String, default="file", server_default="file", nullable=False)
+    # Compression of the stored object ("none", "gzip", "zstd"). size_bytes is
+    # always the original size; stored_size_bytes is what the registry holds.
+    codec = Column(String, default="none", server_default="none", nullable=False)
+    stored_size_bytes = Column(BigInteger, nullable=True)
+
     # This relationship links a dataset to all its local copies.
     # When a Dataset is deleted, all its LocalCopy records are also deleted.
     copies = relationship("LocalCopy", back_populates="dataset", cascade="all, delete-orphan")
+
+    # Ordered chunk list for chunked datasets
+    chunks = relationship(
+        "DatasetChunk",
+        back_populates="dataset",
+        order_by="DatasetChunk.seq",
+        cascade="all, delete-orphan"
+    )
     
     # Relationships for lineage
     parents = relationship(
@@ -38,6 +106,13 @@ class Dataset(Base):
         cascade="all, delete-orphan"
     )
 
+# The trigram indexes above need the pg_trgm extension
+event.listen(
+    Dataset.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 class LocalCopy(Base):
     __tablename__ = "local_copies"
     
@@ -45,6 +120,7 @@ class LocalCopy(Base):
     dataset_hash = Column(String, ForeignKey("datasets.hash"), nullable=False)
     user_identifier = Column(String, nullable=False, index=True) # e.g., 'anant'
     local_path = Column(String, nullable=False)
+    updated_at = updated_at_column()
     
     dataset = relationship("Dataset", back_populates="copies")
 
@@ -53,6 +129,57 @@ class Lineage(Base):
 
     parent_hash = Column(String, ForeignKey("datasets.hash"), primary_key=True)
     child_hash = Column(String, ForeignKey("datasets.hash"), primary_key=True)
+    updated_at = updated_at_column()
     
     parent = relationship("Dataset", foreign_keys=[parent_hash], back_populates="children")
-    child = relationship("Dataset", foreign_keys=[child_hash], back_populates="parents")
\ No newline at end of file
+    child = relationship("Dataset", foreign_keys=[child_hash], back_populates="parents")
+
+class Chunk(Base):
+    """A content-addressed chunk stored once in the registry, shared by datasets."""
+    __tablename__ = "chunks"
+
+    hash = Column(String, primary_key=True)
+    size_bytes = Column(BigInteger, nullable=False)
+    registry_path = Column(String, nullable=False)
+
+class DatasetChunk(Base):
+    __tablename__ = "dataset_chunks"
+
+    dataset_hash = Column(String, ForeignKey("datasets.hash"), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    chunk_hash = Column(String, ForeignKey("chunks.hash"), nullable=False, index=True)
+
+    dataset = relationship("Dataset", back_populates="chunks")
+    chunk = relationship("Chunk")
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+class Job(Base):
+    """A long-running operation (push, delete, verify) queued for a worker; see core/jobs.py."""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers poll for queued jobs whose backoff has passed
+        Index("ix_jobs_status_kind_run_after", "status", "kind", "run_after"),
+    )
+
+    id = Column(String, primary_key=True)
+    kind = Column(String, nullable=False)
+    # "queued", "running", "succeeded" or "failed"
+    status = Column(String, default="queued", nullable=False)
+    params = Column(JSON, nullable=False)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=1, nullable=False)
+    bytes_done = Column(BigInteger, default=0, nullable=False)
+    bytes_total = Column(BigInteger, nullable=True)
+    # host:pid of the worker running it
+    worker = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=_utcnow, nullable=False)
+    # Not picked up before this time (retry backoff)
+    run_after = Column(DateTime(timezone=True), default=_utcnow, nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    # Touched while running; a job whose worker stops touching it is requeued
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,220 @@
+# datatrac/core/object_cache.py
+"""
+A content-addressed cache of dataset files on this machine.
+
+Objects live at `<OBJECT_CACHE_DIR>/<hash[:2]>/<hash>`. Downloads and pushes
+add to it, and later downloads of the same dataset (into any directory, by
+any user sharing the cache directory) are materialized from it instead of
+being transferred again:
+
+1. reflink (copy-on-write clone; instant, and the copy is independent),
+2. hardlink, only with DATATRAC_OBJECT_CACHE_HARDLINKS=1 (instant; the file
+   is shared, so treat datasets as read-only),
+3. plain copy. Pushes never copy: a file that can only be copied is left
+   out of the cache rather than doubling the disk space of the push.
+
+Objects are verified against their hash before use (cheap thanks to the
+hash cache), so a file modified through a hardlink is never handed out.
+The cache is bounded in size and evicts the least recently used objects.
+"""
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from .config import OBJECT_CACHE_DIR, OBJECT_CACHE_ENABLED, OBJECT_CACHE_HARDLINKS, OBJECT_CACHE_MAX_BYTES
+from .hash_cache import cached_hash_file
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# ioctl(dest_fd, FICLONE, src_fd) clones a file on btrfs, XFS, bcachefs, ...
+FICLONE = 0x40049409
+
+# Read once: os.umask() can only be read by setting it, which races with
+# other threads creating files
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def reflink(source: Path, destination: Path):
+    if fcntl is None:
+        raise OSError("reflinks are not supported on this platform")
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def link_or_copy(source: Path, destination: Path, hardlink: bool = True, copy: bool = True) -> str:
+    """
+    Places `source` at `destination` as cheaply as the filesystem allows.
+    Returns the method used: "reflink", "hardlink" or "copy". With
+    copy=False, raises OSError instead of copying the data.
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    # Build next to the destination and rename, so readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=destination.parent, prefix=f".{destination.name}.", suffix=".tmp")
+    os.close(fd)
+    tmp_path = Path(tmp)
+    try:
+        try:
+            reflink(source, tmp_path)
+            method = "reflink"
+        except OSError:
+            tmp_path.unlink()
+            try:
+                if not hardlink:
+                    raise OSError("hardlinks disabled")
+                os.link(source, tmp_path)
+                method = "hardlink"
+            except OSError:
+                if not copy:
+                    raise
+                shutil.copyfile(source, tmp_path)
+                method = "copy"
+        if method != "hardlink":
+            # mkstemp creates the file 0600; give it the mode any new file
+            # would get, so a shared cache stays readable by the group.
+            # A hardlink shares the source's inode (and mode), so leave it be.
+            os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, destination)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return method
+
+
+class ObjectCache:
+    def __init__(self, root: Path = OBJECT_CACHE_DIR, max_bytes: int = OBJECT_CACHE_MAX_BYTES,
+                 hardlinks: bool = OBJECT_CACHE_HARDLINKS):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hardlinks = hardlinks
+        # Bytes in the cache, counted once and then kept up to date by add()
+        # and evict(). Other processes sharing the directory are only seen
+        # at the next full count, which every eviction does.
+        self._total_bytes: int | None = None
+
+    def path_for(self, file_hash: str) -> Path:
+        return self.root / file_hash[:2] / file_hash
+
+    def _touch(self, path: Path):
+        # LRU order is kept in atime. mtime stays untouched: it is shared with
+        # hardlinked copies and is part of the hash cache key.
+        try:
+            st = path.stat()
+            os.utime(path, ns=(time.time_ns(), st.st_mtime_ns))
+        except FileNotFoundError:
+            pass
+
+    def get(self, file_hash: str, verify: bool = True) -> Path | None:
+        """Returns the cached object, or None if it is missing or corrupt."""
+        path = self.path_for(file_hash)
+        if not path.exists():
+            return None
+        if verify and cached_hash_file(str(path)) != file_hash:
+            # Changed after caching (e.g. edited through a hardlink)
+            path.unlink(missing_ok=True)
+            self._total_bytes = None
+            return None
+        self._touch(path)
+        return path
+
+    def add(self, file_hash: str, source: Path, copy: bool = True) -> Path | None:
+        """
+        Adds a file whose hash is already known (no-op if cached). Returns
+        None if it is larger than the whole cache, or would have to be
+        copied with copy=False.
+        """
+        path = self.path_for(file_hash)
+        if path.exists():
+            self._touch(path)
+            return path
+        size = Path(source).stat().st_size
+        if size > self.max_bytes:
+            return None
+        try:
+            link_or_copy(Path(source), path, hardlink=self.hardlinks, copy=copy)
+        except OSError:
+            if copy:
+                raise
+            return None
+        self._touch(path)
+        if self._total_bytes is None:
+            self._total_bytes = sum(st.st_size for _, st in self.entries())
+        else:
+            self._total_bytes += size
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+        return path
+
+    def materialize(self, file_hash: str, destination: Path) -> str | None:
+        """
+        Places a verified copy of `file_hash` at `destination`. Returns the
+        method used, or None if the object is not cached.
+        """
+        path = self.get(file_hash)
+        if path is None:
+            return None
+        return link_or_copy(path, Path(destination), hardlink=self.hardlinks)
+
+    def entries(self) -> list[tuple[Path, os.stat_result]]:
+        if not self.root.exists():
+            return []
+        result = []
+        for path in self.root.glob("??/*"):
+            if path.name.startswith("."):
+                continue
+            try:
+                result.append((path, path.stat()))
+            except FileNotFoundError:
+                pass
+        return result
+
+    def stats(self) -> dict:
+        entries = self.entries()
+        return {
+            "path": str(self.root),
+            "objects": len(entries),
+            "bytes": sum(st.st_size for _, st in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+    def evict(self, max_bytes: int | None = None) -> int:
+        """Removes least recently used objects until the cache fits; returns bytes freed."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(st.st_size for _, st in entries)
+        freed = 0
+        for path, st in sorted(entries, key=lambda entry: entry[1].st_atime_ns):
+            if total - freed <= limit:
+                break
+            path.unlink(missing_ok=True)
+            freed += st.st_size
+        self._total_bytes = total - freed
+        return freed
+
+    def verify(self) -> list[str]:
+        """Re-checks every object and drops corrupt ones; returns their hashes."""
+        corrupt = []
+        for path, _ in self.entries():
+            if cached_hash_file(str(path)) != path.name:
+                path.unlink(missing_ok=True)
+                corrupt.append(path.name)
+        if corrupt:
+            self._total_bytes = None
+        return corrupt
+
+
+_object_cache: ObjectCache | None = None
+
+
+def get_object_cache() -> ObjectCache | None:
+    """The object cache, or None when disabled with DATATRAC_OBJECT_CACHE=0."""
+    global _object_cache
+    if not OBJECT_CACHE_ENABLED:
+        return None
+    if _object_cache is None:
+        _object_cache = ObjectCache()
+    return _object_cache
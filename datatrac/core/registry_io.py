@@ -0,0 +1,290 @@
+# datatrac/core/registry_io.py
+"""
+Streaming bulk export and import of registry metadata as NDJSON.
+
+An export is a header line followed by one line per row:
+
+    {"format": "datatrac-registry", "version": 1, "tables": [...]}
+    {"table": "datasets", "row": {"hash": "...", "name": "...", ...}}
+
+Rows are read through a server-side cursor (`yield_per`) and written out
+batch by batch, so neither side ever holds the registry in memory and no
+ORM objects are built. Imports are written in batches: on PostgreSQL with
+COPY into a staging table followed by one INSERT ... ON CONFLICT, elsewhere
+with a multi-row INSERT ... ON CONFLICT. Rows whose key already exists are
+skipped, or overwritten with on_conflict="update".
+
+`updated_at` is never imported: the target stamps rows itself, so local
+replicas of the target pick the imported rows up.
+"""
+import csv
+import gzip
+import io
+import json
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from typing import BinaryIO, Iterable, Iterator
+
+from sqlalchemy import DateTime, Table, select, tuple_
+from sqlalchemy.orm import Session
+
+from . import events, models
+from .db import Base, upsert_insert
+
+FORMAT = "datatrac-registry"
+VERSION = 1
+
+# In dependency order: rows may only reference tables listed before them
+EXPORT_TABLES = ("datasets", "chunks", "dataset_chunks", "lineage", "local_copies")
+BATCH_SIZE = 5000
+
+# Columns the importing database assigns itself
+_SKIPPED_ON_IMPORT = {"updated_at"}
+_SKIPPED_ON_IMPORT_BY_TABLE = {"local_copies": {"id"}}
+# local_copies has a surrogate key; a copy is identified by dataset and user
+_NATURAL_KEYS = {"local_copies": ("dataset_hash", "user_identifier")}
+
+
+def _table(name: str) -> Table:
+    if name not in EXPORT_TABLES:
+        raise ValueError(f"Unknown table '{name}'. Choose from: {', '.join(EXPORT_TABLES)}")
+    return Base.metadata.tables[name]
+
+
+def parse_tables(names: Iterable[str] | None) -> list[str]:
+    """Validates table names and puts them in dependency order."""
+    if not names:
+        return list(EXPORT_TABLES)
+    wanted = {_table(name.strip()).name for name in names if name.strip()}
+    return [name for name in EXPORT_TABLES if name in wanted]
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def iter_rows(db: Session, name: str, batch_size: int = BATCH_SIZE) -> Iterator[list[dict]]:
+    """Batches of rows of one table, in key order, from a server-side cursor."""
+    table = _table(name)
+    result = db.execute(
+        select(table).order_by(*table.primary_key.columns),
+        execution_options={"yield_per": batch_size},
+    )
+    for partition in result.mappings().partitions():
+        yield [dict(row) for row in partition]
+
+
+def iter_ndjson(db: Session, tables: Iterable[str] | None = None, batch_size: int = BATCH_SIZE) -> Iterator[bytes]:
+    """The export as NDJSON, one chunk of bytes per batch of rows."""
+    tables = parse_tables(tables)
+    if db.get_bind().dialect.name == "postgresql":
+        # One snapshot for all tables, so links never point at missing rows
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    try:
+        yield (json.dumps({"format": FORMAT, "version": VERSION, "tables": tables}) + "\n").encode()
+        for name in tables:
+            for batch in iter_rows(db, name, batch_size):
+                yield "".join(
+                    json.dumps({"table": name, "row": row}, default=_json_default) + "\n" for row in batch
+                ).encode()
+    finally:
+        db.rollback()
+
+
+def read_ndjson(lines: Iterable[bytes | str]) -> Iterator[dict]:
+    """Parses export lines; checks the header if there is one."""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if "format" in record:
+            if record["format"] != FORMAT or record.get("version") != VERSION:
+                raise ValueError(f"Unsupported export format: {record.get('format')} v{record.get('version')}")
+            continue
+        if "table" not in record or "row" not in record:
+            raise ValueError(f"Line {number} is not a registry record.")
+        yield record
+
+
+class RegistryImporter:
+    """Buffers imported rows per table and writes them in batches."""
+
+    def __init__(self, db: Session, on_conflict: str = "skip", batch_size: int = BATCH_SIZE):
+        if on_conflict not in ("skip", "update"):
+            raise ValueError("on_conflict must be 'skip' or 'update'")
+        self.db = db
+        self.on_conflict = on_conflict
+        self.batch_size = batch_size
+        self.dialect = db.get_bind().dialect.name
+        self.counts = {name: 0 for name in EXPORT_TABLES}
+        self._pending: dict[str, list[dict]] = {name: [] for name in EXPORT_TABLES}
+        self._columns = {}
+        self._defaults = {}
+        self._datetime_columns = {}
+        for name in EXPORT_TABLES:
+            table = _table(name)
+            skipped = _SKIPPED_ON_IMPORT | _SKIPPED_ON_IMPORT_BY_TABLE.get(name, set())
+            self._columns[name] = [c.name for c in table.columns if c.name not in skipped]
+            # Older exports may lack newer columns
+            self._defaults[name] = {
+                c.name: c.default.arg for c in table.columns if c.default is not None and c.default.is_scalar
+            }
+            self._datetime_columns[name] = [c.name for c in table.columns if isinstance(c.type, DateTime)]
+
+    def add(self, record: dict):
+        name = record["table"]
+        _table(name)
+        row = record["row"]
+        defaults = self._defaults[name]
+        values = {column: row.get(column, defaults.get(column)) for column in self._columns[name]}
+        for column in self._datetime_columns[name]:
+            if isinstance(values.get(column), str):
+                values[column] = datetime.fromisoformat(values[column])
+        self._pending[name].append(values)
+        if len(self._pending[name]) >= self.batch_size:
+            self._flush(name)
+
+    def add_many(self, records: Iterable[dict]):
+        for record in records:
+            self.add(record)
+
+    def finish(self) -> dict[str, int]:
+        """Writes what is still buffered; returns rows processed per table."""
+        for name in EXPORT_TABLES:
+            self._flush_one(name)
+        events.emit("registry_imported", counts=dict(self.counts))
+        return self.counts
+
+    def _flush(self, name: str):
+        # Rows of earlier tables may be referenced by this batch
+        for earlier in EXPORT_TABLES[:EXPORT_TABLES.index(name) + 1]:
+            self._flush_one(earlier)
+
+    def _flush_one(self, name: str):
+        rows, self._pending[name] = self._pending[name], []
+        if not rows:
+            return
+        try:
+            if name in _NATURAL_KEYS:
+                self._write_by_natural_key(name, rows)
+            elif not (self.dialect == "postgresql" and self._copy(name, rows)):
+                self._insert(name, rows)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        self.counts[name] += len(rows)
+
+    def _insert(self, name: str, rows: list[dict]):
+        table = _table(name)
+        key = [c.name for c in table.primary_key.columns]
+        updated = [c for c in self._columns[name] if c not in key]
+        statement = upsert_insert(self.db, table)
+        # Link tables are all key: there is nothing to update
+        if self.on_conflict == "update" and updated:
+            set_ = {c: statement.excluded[c] for c in updated}
+            # ON CONFLICT DO UPDATE does not apply the column's onupdate;
+            # without a new stamp replicas would never see the overwrite
+            if "updated_at" in table.c:
+                set_["updated_at"] = models.change_timestamp()
+            statement = statement.on_conflict_do_update(index_elements=key, set_=set_)
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=key)
+        # One multi-row INSERT per few hundred rows (insertmanyvalues)
+        self.db.execute(statement, rows)
+
+    def _copy(self, name: str, rows: list[dict]) -> bool:
+        """COPY into a staging table, then one INSERT ... ON CONFLICT. False if the driver cannot COPY."""
+        cursor = self.db.connection().connection.dbapi_connection.cursor()
+        if not hasattr(cursor, "copy_expert"):  # psycopg2 only
+            cursor.close()
+            return False
+        table = _table(name)
+        columns = self._columns[name]
+        key = [c.name for c in table.primary_key.columns]
+        column_list = ", ".join(columns)
+        staging = f"datatrac_import_{name}"
+
+        buffer = io.StringIO()
+        # QUOTE_NOTNULL: NULL is an unquoted empty field, "" an empty string
+        writer = csv.writer(buffer, quoting=csv.QUOTE_NOTNULL)
+        for row in rows:
+            writer.writerow([
+                value.isoformat() if isinstance(value, datetime) else value
+                for value in (row[column] for column in columns)
+            ])
+        buffer.seek(0)
+
+        updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns if c not in key)
+        if self.on_conflict == "update" and updates:
+            if "updated_at" in table.c:
+                updates += ", updated_at = clock_timestamp()"
+            conflict = f"DO UPDATE SET {updates}"
+        else:
+            conflict = "DO NOTHING"
+        try:
+            cursor.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {staging} "
+                f"(LIKE {name} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            )
+            cursor.copy_expert(f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+            cursor.execute(
+                f"INSERT INTO {name} ({column_list}) SELECT {column_list} FROM {staging} "
+                f"ON CONFLICT ({', '.join(key)}) {conflict}"
+            )
+        finally:
+            cursor.close()
+        return True
+
+    def _write_by_natural_key(self, name: str, rows: list[dict]):
+        table = _table(name)
+        key_columns = [table.c[c] for c in _NATURAL_KEYS[name]]
+        # The last row wins within a batch, like later batches over earlier ones
+        by_key = {tuple(row[c.name] for c in key_columns): row for row in rows}
+        existing = {
+            tuple(found[:-1]): found[-1]
+            for found in self.db.execute(
+                select(*key_columns, table.c.id).where(tuple_(*key_columns).in_(list(by_key)))
+            )
+        }
+        new_rows = [row for key, row in by_key.items() if key not in existing]
+        if new_rows:
+            self.db.execute(table.insert(), new_rows)
+        if self.on_conflict == "update":
+            for key, row in by_key.items():
+                if key in existing:
+                    self.db.execute(table.update().where(table.c.id == existing[key]).values(**row))
+
+
+def import_ndjson(db: Session, lines: Iterable[bytes | str], on_conflict: str = "skip",
+                  batch_size: int = BATCH_SIZE) -> dict[str, int]:
+    importer = RegistryImporter(db, on_conflict=on_conflict, batch_size=batch_size)
+    importer.add_many(read_ndjson(lines))
+    return importer.finish()
+
+
+@contextmanager
+def open_export(path: str, mode: str = "rb"):
+    """
+    Opens an export file for reading ("rb") or writing ("wb"); "-" is
+    stdin/stdout. Files ending in .gz or .zst are (de)compressed on the fly.
+    """
+    if path == "-":
+        yield sys.stdin.buffer if mode == "rb" else sys.stdout.buffer
+        return
+    f: BinaryIO
+    if path.endswith(".gz"):
+        f = gzip.open(path, mode, compresslevel=6)
+    elif path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("Reading or writing .zst files needs the 'zstandard' package.")
+        f = zstandard.open(path, mode)
+    else:
+        f = open(path, mode)
+    with f:
+        yield f
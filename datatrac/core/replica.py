@@ -0,0 +1,226 @@
+# datatrac/core/replica.py
+"""
+An opt-in local SQLite replica of the registry metadata (DATATRAC_REPLICA=1).
+
+Read commands (`fetch`, `fetch --all`, `lineage <hash>`, `search`) are served
+from `replica.db` in the app directory, so listing a large registry is a
+local query instead of round trips to the central database. The replica
+holds `datasets`, `lineage` and the current user's `local_copies`; pushes,
+downloads, deletes and new lineage links still go to the central database.
+
+Syncing is incremental. Rows whose `updated_at` is at or after the last
+watermark (minus a small overlap, for rows committed late by long
+transactions) are upserted, so copying a row twice is harmless. Datasets
+are never hard-deleted (deregistering is an update) and lineage links are
+never removed, so no tombstones are needed. The user's local copies are
+few and are copied in full.
+
+A read syncs first when the replica is older than
+DATATRAC_REPLICA_MAX_STALENESS_SECONDS or this machine wrote to the
+registry since. If the central database is unreachable, the last synced
+data is served with a warning.
+"""
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import Column, MetaData, String, Table, create_engine, delete, event, select, tuple_
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from . import metrics, models
+from .config import REPLICA_ENABLED, REPLICA_MAX_STALENESS_SECONDS, REPLICA_PATH
+from .db import Base, SessionLocal, get_db
+from .search import SQLITE_FTS_DDL, create_sqlite_fts
+
+SYNC_BATCH_SIZE = 5000
+SYNC_OVERLAP = timedelta(minutes=1)
+# Tables synced by watermark; local_copies is copied in full
+WATERMARKED_TABLES = ("datasets", "lineage")
+REPLICATED_TABLES = WATERMARKED_TABLES + ("local_copies",)
+
+_state_metadata = MetaData()
+replica_state = Table(
+    "replica_state", _state_metadata,
+    Column("key", String, primary_key=True),
+    Column("value", String),
+)
+
+
+def schema_fingerprint() -> str:
+    """Changes whenever a replicated table gains or loses a column, or the search table changes."""
+    layout = [(name, sorted(c.name for c in Base.metadata.tables[name].columns)) for name in REPLICATED_TABLES]
+    layout.append(SQLITE_FTS_DDL)
+    return hashlib.sha1(json.dumps(layout).encode()).hexdigest()[:12]
+
+
+class Replica:
+    def __init__(self, path: Path = REPLICA_PATH):
+        self.path = Path(path)
+        self.engine = create_engine(f"sqlite:///{self.path}")
+        metrics.instrument_engine(self.engine, "replica")
+
+        @event.listens_for(self.engine, "connect")
+        def _pragmas(dbapi_connection, _):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+        self.Session = sessionmaker(bind=self.engine, autoflush=False)
+        self._ensure_schema()
+
+    def _tables(self) -> list[Table]:
+        return [Base.metadata.tables[name] for name in REPLICATED_TABLES]
+
+    def _ensure_schema(self):
+        # The replica is a disposable cache: after a schema change it is
+        # rebuilt from scratch instead of migrated
+        _state_metadata.create_all(self.engine)
+        with self.engine.begin() as conn:
+            if self._get(conn, "schema") == schema_fingerprint():
+                return
+            Base.metadata.drop_all(conn, tables=self._tables())
+            Base.metadata.create_all(conn, tables=self._tables())
+            create_sqlite_fts(conn)
+            conn.execute(delete(replica_state))
+            self._set(conn, "schema", schema_fingerprint())
+
+    @staticmethod
+    def _get(conn, key: str) -> str | None:
+        return conn.execute(select(replica_state.c.value).where(replica_state.c.key == key)).scalar()
+
+    @staticmethod
+    def _set(conn, key: str, value: str | None):
+        statement = insert(replica_state).values(key=key, value=value)
+        conn.execute(statement.on_conflict_do_update(index_elements=["key"], set_={"value": value}))
+
+    def synced_at(self) -> float | None:
+        """Unix time of the last successful sync, or None if never synced."""
+        with self.engine.connect() as conn:
+            value = self._get(conn, "synced_at")
+        return float(value) if value else None
+
+    def mark_stale(self):
+        """Makes the next read sync first, e.g. after this machine wrote to the registry."""
+        with self.engine.begin() as conn:
+            self._set(conn, "stale", "1")
+
+    def is_stale(self, max_age: float = REPLICA_MAX_STALENESS_SECONDS) -> bool:
+        with self.engine.connect() as conn:
+            synced_at, stale = self._get(conn, "synced_at"), self._get(conn, "stale")
+        return not synced_at or stale == "1" or time.time() - float(synced_at) > max_age
+
+    def _copy_changed(self, central: Session, conn, table: Table, since: datetime | None) -> tuple[int, datetime | None]:
+        """Upserts rows changed since `since`; returns (rows copied, new watermark)."""
+        # Paged by primary key within the window rather than by updated_at,
+        # so paging never depends on how a driver round-trips timestamps
+        key = list(table.primary_key.columns)
+        upsert = insert(table)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[c.name for c in key],
+            set_={c.name: upsert.excluded[c.name] for c in table.columns if not c.primary_key},
+        )
+        copied, watermark, last = 0, since, None
+        while True:
+            query = select(table).order_by(*key).limit(SYNC_BATCH_SIZE)
+            if since is not None:
+                query = query.where(table.c.updated_at >= since - SYNC_OVERLAP)
+            if last is not None:
+                query = query.where(tuple_(*key) > tuple_(*last))
+            rows = central.execute(query).mappings().all()
+            if not rows:
+                break
+            conn.execute(upsert, [dict(row) for row in rows])
+            copied += len(rows)
+            last = [rows[-1][c.name] for c in key]
+            newest = max(row["updated_at"] for row in rows)
+            watermark = max(watermark, newest) if watermark else newest
+        return copied, watermark
+
+    def sync(self, central: Session, full: bool = False) -> dict:
+        """Brings the replica up to date with the central database; returns rows copied per table."""
+        from .manager import get_current_user
+
+        if full:
+            with self.engine.begin() as conn:
+                conn.execute(delete(replica_state).where(replica_state.c.key != "schema"))
+                for table in reversed(self._tables()):
+                    conn.execute(delete(table))
+
+        counts = {}
+        with self.engine.begin() as conn:
+            for name in WATERMARKED_TABLES:
+                table = Base.metadata.tables[name]
+                since = self._get(conn, f"watermark:{name}")
+                copied, watermark = self._copy_changed(
+                    central, conn, table, datetime.fromisoformat(since) if since else None,
+                )
+                if watermark is not None:
+                    self._set(conn, f"watermark:{name}", watermark.isoformat())
+                counts[name] = copied
+
+            copies = models.LocalCopy.__table__
+            rows = central.execute(
+                select(copies).where(copies.c.user_identifier == get_current_user())
+            ).mappings().all()
+            conn.execute(delete(copies))
+            if rows:
+                conn.execute(insert(copies), [dict(row) for row in rows])
+            counts["local_copies"] = len(rows)
+
+            self._set(conn, "synced_at", str(time.time()))
+            self._set(conn, "stale", None)
+        central.rollback()
+        return counts
+
+    def ensure_fresh(self, max_age: float = REPLICA_MAX_STALENESS_SECONDS):
+        """Syncs if the replica is stale; falls back to stale data when the registry is unreachable."""
+        if not self.is_stale(max_age):
+            return
+        central = SessionLocal()
+        try:
+            self.sync(central)
+        except OperationalError as e:
+            synced_at = self.synced_at()
+            if synced_at is None:
+                raise
+            age = int(time.time() - synced_at)
+            print(f"Warning: could not reach the registry ({e.orig}); showing data synced {age}s ago.")
+        finally:
+            central.close()
+
+    def stats(self) -> dict:
+        with self.Session() as db:
+            counts = {table.name: db.query(table).count() for table in self._tables()}
+        return {"path": str(self.path), "synced_at": self.synced_at(), "rows": counts}
+
+
+_replica: Replica | None = None
+
+
+def get_replica() -> Replica | None:
+    """The local replica, or None unless enabled with DATATRAC_REPLICA=1."""
+    global _replica
+    if not REPLICA_ENABLED:
+        return None
+    if _replica is None:
+        _replica = Replica()
+    return _replica
+
+
+def get_read_db():
+    """Like get_db(), but served from the local replica when it is enabled."""
+    replica = get_replica()
+    if replica is None:
+        yield from get_db()
+        return
+    replica.ensure_fresh()
+    db = replica.Session()
+    try:
+        yield db
+    finally:
+        db.close()
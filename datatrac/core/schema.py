@@ -0,0 +1,81 @@
+# datatrac/core/schema.py
+"""
+Schema management with Alembic (`datatrac db upgrade`).
+
+Commands no longer create tables on every run; the registry schema is
+upgraded explicitly, once, after installing a new version. Migrations live
+in `datatrac/migrations`.
+"""
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+
+from .config import DATABASE_URL
+from .db import get_engine
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+
+# Revision matching a database created by create_all() before migrations
+# existed: the original tables only, or with everything up to 0002 ... 0005
+_BASELINE_REVISION = "0001"
+_CREATE_ALL_REVISION = "0002"
+_UPDATED_AT_REVISION = "0003"
+_CODEC_REVISION = "0004"
+_JOBS_REVISION = "0005"
+
+
+def alembic_config(connection=None) -> Config:
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    # "%" is special in ini interpolation
+    config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def current_revision() -> str | None:
+    with get_engine().connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def head_revision() -> str:
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def _adopt_unversioned(connection, config: Config) -> str | None:
+    """
+    Stamps databases that were created with create_all() before migrations
+    existed, so upgrading does not try to create their tables again.
+    """
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    if "alembic_version" in tables or "datasets" not in tables:
+        return None
+    columns = {column["name"] for column in inspector.get_columns("datasets")}
+    if "jobs" in tables:
+        revision = _JOBS_REVISION
+    elif "codec" in columns:
+        revision = _CODEC_REVISION
+    elif "updated_at" in columns:
+        revision = _UPDATED_AT_REVISION
+    elif {"chunks"} <= tables and "storage_format" in columns:
+        revision = _CREATE_ALL_REVISION
+    else:
+        revision = _BASELINE_REVISION
+    command.stamp(config, revision)
+    return revision
+
+
+def upgrade(revision: str = "head") -> tuple[str | None, str | None]:
+    """Upgrades the registry schema; returns (revision before, revision after)."""
+    with get_engine().begin() as connection:
+        config = alembic_config(connection)
+        before = _adopt_unversioned(connection, config) or MigrationContext.configure(connection).get_current_revision()
+        command.upgrade(config, revision)
+        after = MigrationContext.configure(connection).get_current_revision()
+    return before, after
@@ -0,0 +1,169 @@
+# datatrac/core/search.py
+"""
+Substring search over dataset names and sources.
+
+PostgreSQL answers these queries from pg_trgm GIN indexes (see models.py).
+SQLite answers them from `datasets_search`, an FTS5 table with the trigram
+tokenizer that triggers keep in step with `datasets` (migration 0006), so a
+short-lived CLI process does not have to index anything before searching.
+
+The long-running API server keeps an equivalent index in memory instead
+(`TrigramIndex`): each trigram of a lower-cased name/source maps to the set
+of datasets containing it, and a query only checks the datasets that share
+all of its trigrams. Dataset names and sources never change once pushed, so
+it is built once and then only extended with datasets created since the
+last search.
+"""
+import heapq
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from . import models
+
+FTS_TABLE = "datasets_search"
+
+# The FTS5 table stores its own copy of name/source (an external-content
+# table would be keyed on the datasets rowid, which VACUUM may renumber).
+# Batch migrations that recreate `datasets` drop these triggers; they must
+# call create_sqlite_fts() again afterwards.
+SQLITE_FTS_DDL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(hash UNINDEXED, name, source, tokenize='trigram')",
+    f"INSERT INTO {FTS_TABLE} (hash, name, source) SELECT hash, name, source FROM datasets",
+    f"""CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON datasets BEGIN
+        INSERT INTO {FTS_TABLE} (hash, name, source) VALUES (new.hash, new.name, new.source);
+    END""",
+    # Upserts rewrite name/source without changing them, e.g. on replica sync
+    f"""CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF name, source ON datasets
+    WHEN old.name IS NOT new.name OR old.source IS NOT new.source BEGIN
+        UPDATE {FTS_TABLE} SET name = new.name, source = new.source WHERE hash = old.hash;
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON datasets BEGIN
+        DELETE FROM {FTS_TABLE} WHERE hash = old.hash;
+    END""",
+]
+
+
+def create_sqlite_fts(connection):
+    """(Re)creates the SQLite search table and its triggers, filled from `datasets`."""
+    for statement in SQLITE_FTS_DDL:
+        connection.exec_driver_sql(statement)
+
+
+def has_sqlite_fts(db: Session) -> bool:
+    return db.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+    ).first() is not None
+
+
+def sqlite_search(db: Session, query: str, limit: int = 20) -> list[str]:
+    """Hashes of the best matches from the FTS5 table, ranked like `TrigramIndex.search`."""
+    needle = query.lower()
+    score = (
+        "max(CASE WHEN instr(lower(name), :needle) THEN length(:needle) * 1.0 / length(name) ELSE 0 END,"
+        " CASE WHEN instr(lower(source), :needle) THEN length(:needle) * 1.0 / length(source) ELSE 0 END)"
+    )
+    if len(needle) >= 3:
+        # A quoted phrase is a substring match with the trigram tokenizer
+        condition, params = f"{FTS_TABLE} MATCH :phrase", {"phrase": '"' + query.replace('"', '""') + '"'}
+    else:
+        # Too short for trigrams: FTS5 scans its own (small) copy of the text
+        pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        condition = "(name LIKE :pattern ESCAPE '\\' OR source LIKE :pattern ESCAPE '\\')"
+        params = {"pattern": pattern}
+    rows = db.execute(
+        text(f"SELECT hash FROM {FTS_TABLE} WHERE {condition} ORDER BY {score} DESC, hash DESC LIMIT :limit"),
+        {**params, "needle": needle, "limit": limit},
+    )
+    return list(rows.scalars())
+
+
+def trigrams(text: str) -> set[str]:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids: dict[str, int] = {}
+        self._docs: list[tuple[str, str, str]] = []  # (hash, name, source)
+        self._postings: dict[str, set[int]] = defaultdict(set)
+        self._watermark: datetime | None = None
+
+    def _add(self, file_hash: str, name: str | None, source: str | None):
+        if file_hash in self._ids:
+            return
+        doc_id = len(self._docs)
+        self._ids[file_hash] = doc_id
+        self._docs.append((file_hash, (name or "").lower(), (source or "").lower()))
+        for gram in trigrams(name or "") | trigrams(source or ""):
+            self._postings[gram].add(doc_id)
+
+    def catch_up(self, db: Session):
+        """Adds datasets created since the last call (all of them the first time)."""
+        query = select(
+            models.Dataset.hash, models.Dataset.name, models.Dataset.source, models.Dataset.created_at
+        )
+        if self._watermark is not None:
+            # >= so rows sharing the watermark's timestamp are not missed;
+            # already indexed hashes are skipped by _add
+            query = query.where(models.Dataset.created_at >= self._watermark)
+        with self._lock:
+            for file_hash, name, source, created_at in db.execute(query):
+                self._add(file_hash, name, source)
+                if created_at and (self._watermark is None or created_at > self._watermark):
+                    self._watermark = created_at
+
+    def search(self, query: str, limit: int = 20) -> list[str]:
+        """Returns the hashes of the best matches, best first."""
+        needle = query.lower()
+        with self._lock:
+            grams = trigrams(needle)
+            if grams:
+                # Intersect the smallest posting lists first
+                postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+                candidates = set(postings[0])
+                for posting in postings[1:]:
+                    candidates &= posting
+                    if not candidates:
+                        break
+            else:
+                # Queries under three characters have no trigrams to look up
+                candidates = range(len(self._docs))
+            # Every candidate contains the query, so the share of the text it
+            # covers ranks matches like trigram similarity would, without
+            # building trigram sets per candidate
+            docs = self._docs
+            scored = []
+            for doc_id in candidates:
+                file_hash, name, source = docs[doc_id]
+                score = max(
+                    len(needle) / len(name) if needle in name else 0.0,
+                    len(needle) / len(source) if needle in source else 0.0,
+                )
+                if score:
+                    scored.append((score, file_hash))
+        return [file_hash for _, file_hash in heapq.nlargest(limit, scored)]
+
+
+_search_index: TrigramIndex | None = None
+
+
+def enable_memory_index():
+    """Called by long-running processes (the API server) to search from memory on SQLite."""
+    global _search_index
+    if _search_index is None:
+        _search_index = TrigramIndex()
+
+
+def get_search_index() -> TrigramIndex | None:
+    """The in-memory index, or None unless `enable_memory_index` was called."""
+    return _search_index
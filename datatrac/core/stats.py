@@ -0,0 +1,92 @@
+# datatrac/core/stats.py
+"""
+Download statistics without read-modify-write.
+
+Counts are applied with a single atomic statement per dataset:
+
+    UPDATE datasets SET download_count = download_count + :n, ...
+
+so concurrent downloads never lose increments and nothing is read first.
+The API server goes one step further and only counts in memory on the hot
+path (`DownloadCounter.record`); a background loop flushes the totals in one
+batch every few seconds, so a popular dataset costs one row update per
+flush instead of one per request.
+"""
+import logging
+import threading
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, bindparam, case, or_, update
+from sqlalchemy.orm import Session
+
+from . import events, models
+
+logger = logging.getLogger(__name__)
+
+
+def add_downloads(db: Session, counts: dict[str, tuple[int, datetime]]):
+    """Adds {hash: (downloads, last download time)} to the stored statistics and commits."""
+    if not counts:
+        return
+    table = models.Dataset.__table__
+    last = bindparam("b_last", type_=DateTime())
+    statement = (
+        update(table)
+        .where(table.c.hash == bindparam("b_hash"))
+        .values(
+            download_count=table.c.download_count + bindparam("b_count"),
+            # Another process may have flushed a later download already
+            last_downloaded_at=case(
+                (or_(table.c.last_downloaded_at.is_(None), table.c.last_downloaded_at < last), last),
+                else_=table.c.last_downloaded_at,
+            ),
+        )
+    )
+    db.execute(statement, [
+        {"b_hash": file_hash, "b_count": count, "b_last": last_at}
+        for file_hash, (count, last_at) in counts.items()
+    ])
+    db.commit()
+    for file_hash in counts:
+        events.emit("dataset_changed", file_hash=file_hash)
+
+
+class DownloadCounter:
+    """In-memory download counts, flushed to the database in batches."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: dict[str, tuple[int, datetime]] = {}
+
+    def record(self, file_hash: str, count: int = 1):
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            pending, _ = self._pending.get(file_hash, (0, None))
+            self._pending[file_hash] = (pending + count, now)
+
+    def pending(self, file_hash: str) -> int:
+        """Downloads counted but not yet written to the database."""
+        with self._lock:
+            return self._pending.get(file_hash, (0, None))[0]
+
+    def flush(self, db: Session) -> int:
+        """Writes all pending counts; returns how many datasets were updated."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+        try:
+            add_downloads(db, batch)
+        except Exception:
+            db.rollback()
+            # Put the counts back so the next flush retries them
+            with self._lock:
+                for file_hash, (count, last_at) in batch.items():
+                    pending, newer = self._pending.get(file_hash, (0, None))
+                    self._pending[file_hash] = (pending + count, newer or last_at)
+            raise
+        return len(batch)
+
+
+# Shared by the API server's request handlers and its flush loop
+download_counter = DownloadCounter()
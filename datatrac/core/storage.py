@@ -0,0 +1,337 @@
+# datatrac/core/storage.py
+"""
+Storage backends for the registry's dataset objects.
+
+`DataManager` only talks to a `StorageBackend`, so the transport can be
+swapped without touching the registry logic:
+
+- `SSHStorage` uses scp/ssh over one multiplexed (ControlMaster) connection,
+  so only the first transfer pays for the SSH handshake.
+- `LocalStorage` keeps objects in a local directory, which makes the whole
+  push/fetch/delete flow usable offline for tests and benchmarks.
+"""
+import functools
+import os
+import posixpath
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Iterable
+
+from . import metrics
+from .config import (
+    APP_DIR,
+    LOCAL_STORAGE_PATH,
+    REMOTE_STORAGE_PATH,
+    REMOTE_TARGET,
+    SSH_CONTROL_PERSIST,
+    STORAGE_BACKEND,
+)
+from .utils import ProgressCallback
+
+# Block size for local copies that report progress
+COPY_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+def run_command(command: list[str], binary: bool = False):
+    with metrics.span("command", program=command[0]) as span:
+        result = subprocess.run(command, capture_output=True, text=not binary)
+        if binary:
+            span.attrs["bytes"] = len(result.stdout)
+    if result.returncode != 0:
+        error_message = result.stderr or result.stdout
+        if binary:
+            error_message = error_message.decode(errors="replace")
+        raise RuntimeError(f"Command failed: {' '.join(command)}\nError: {error_message.strip()}")
+    return result.stdout
+
+
+def _timed(operation: str, size=None):
+    """
+    Runs a backend method in a `transfer.<operation>` span; `size(args, result)`
+    gives the bytes it moved.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with metrics.span(f"transfer.{operation}", backend=self.name) as span:
+                result = method(self, *args, **kwargs)
+                if size is not None:
+                    span.attrs["bytes"] = size(args, result)
+            return result
+        return wrapper
+    return decorate
+
+
+_file_size = lambda args, result: os.path.getsize(args[0])
+_downloaded_size = lambda args, result: os.path.getsize(args[1])
+_result_size = lambda args, result: len(result)
+_result = lambda args, result: result
+
+
+class StorageBackend:
+    """Interface every storage backend implements."""
+
+    name: str
+    root: str
+
+    def object_path(self, name: str) -> str:
+        """Returns the registry path for an object called `name`."""
+        return f"{self.root}/{name}"
+
+    def upload(self, local_path: Path, registry_path: str, progress: ProgressCallback | None = None):
+        """Stores `local_path` at `registry_path`, calling `progress(bytes_done, bytes_total)` as it goes."""
+        raise NotImplementedError
+
+    def upload_stream(self, blocks: Iterable[bytes], registry_path: str) -> int:
+        """
+        Stores the concatenated `blocks` at `registry_path` without a local
+        copy (e.g. compressed on the fly); returns the bytes written.
+        """
+        raise NotImplementedError
+
+    def download(self, registry_path: str, local_path: Path):
+        raise NotImplementedError
+
+    def delete(self, registry_path: str):
+        raise NotImplementedError
+
+    def size(self, registry_path: str) -> int:
+        raise NotImplementedError
+
+    def read_range(self, registry_path: str, offset: int, length: int) -> bytes:
+        """Returns `length` bytes of an object starting at `offset`."""
+        raise NotImplementedError
+
+    def local_path(self, registry_path: str) -> Path | None:
+        """Returns the object's path if it is on this machine, so it can be sent with sendfile."""
+        return None
+
+    def put_bytes(self, data: bytes, registry_path: str):
+        """Stores a small in-memory object, e.g. a chunk."""
+        with tempfile.NamedTemporaryFile(dir=APP_DIR, prefix="put-", delete=False) as tmp:
+            tmp.write(data)
+        try:
+            self.upload(Path(tmp.name), registry_path)
+        finally:
+            os.unlink(tmp.name)
+
+    def get_bytes(self, registry_path: str) -> bytes:
+        with tempfile.TemporaryDirectory(dir=APP_DIR, prefix="get-") as tmp_dir:
+            tmp_path = Path(tmp_dir) / "object"
+            self.download(registry_path, tmp_path)
+            return tmp_path.read_bytes()
+
+    def close(self):
+        """Releases any long-lived connections held by the backend."""
+
+
+class SSHStorage(StorageBackend):
+    name = "ssh"
+
+    def __init__(self, target: str = REMOTE_TARGET, root: str = REMOTE_STORAGE_PATH,
+                 control_persist: str = SSH_CONTROL_PERSIST):
+        self.target = target
+        self.root = root
+        control_dir = APP_DIR / "ssh"
+        control_dir.mkdir(mode=0o700, exist_ok=True)
+        # %C is a hash of (local host, remote host, port, user), which keeps
+        # the socket path short enough for the unix socket limit
+        self.ssh_options = [
+            "-o", "ControlMaster=auto",
+            "-o", f"ControlPath={control_dir}/%C",
+            "-o", f"ControlPersist={control_persist}",
+        ]
+        self._known_dirs = {root}
+        self._dirs_lock = threading.Lock()
+
+    def _ensure_remote_dir(self, directory: str):
+        # scp does not create directories; only ask once per directory
+        with self._dirs_lock:
+            if directory in self._known_dirs:
+                return
+        run_command(["ssh", *self.ssh_options, self.target, f"mkdir -p {shlex.quote(directory)}"])
+        with self._dirs_lock:
+            self._known_dirs.add(directory)
+
+    @_timed("upload", _file_size)
+    def upload(self, local_path: Path, registry_path: str, progress: ProgressCallback | None = None):
+        self._ensure_remote_dir(posixpath.dirname(registry_path))
+        run_command(["scp", *self.ssh_options, str(local_path), f"{self.target}:{registry_path}"])
+        # scp does not report progress when it is not attached to a terminal
+        if progress:
+            size = os.path.getsize(local_path)
+            progress(size, size)
+
+    @_timed("upload", _result)
+    def upload_stream(self, blocks: Iterable[bytes], registry_path: str) -> int:
+        self._ensure_remote_dir(posixpath.dirname(registry_path))
+        # Written under a temporary name and renamed, so readers never see a partial object
+        tmp_path = f"{registry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        remote = f"cat > {shlex.quote(tmp_path)} && mv -f {shlex.quote(tmp_path)} {shlex.quote(registry_path)}"
+        command = ["ssh", *self.ssh_options, self.target, remote]
+        written = 0
+        with metrics.span("command", program="ssh"), tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=stderr)
+            try:
+                for block in blocks:
+                    process.stdin.write(block)
+                    written += len(block)
+                process.stdin.close()
+            except BrokenPipeError:
+                # The remote side gave up; its error is reported below
+                pass
+            except BaseException:
+                process.kill()
+                process.wait()
+                raise
+            if process.wait() != 0:
+                stderr.seek(0)
+                raise RuntimeError(
+                    f"Command failed: {' '.join(command)}\nError: {stderr.read().decode(errors='replace').strip()}"
+                )
+        return written
+
+    @_timed("download", _downloaded_size)
+    def download(self, registry_path: str, local_path: Path):
+        run_command(["scp", *self.ssh_options, f"{self.target}:{registry_path}", str(local_path)])
+
+    @_timed("delete")
+    def delete(self, registry_path: str):
+        run_command(["ssh", *self.ssh_options, self.target, f"rm {shlex.quote(registry_path)}"])
+
+    def size(self, registry_path: str) -> int:
+        return int(run_command(["ssh", *self.ssh_options, self.target, f"wc -c < {shlex.quote(registry_path)}"]))
+
+    @_timed("read_range", _result_size)
+    def read_range(self, registry_path: str, offset: int, length: int) -> bytes:
+        # tail/head are available on every POSIX host, unlike dd's byte flags.
+        # The remote side runs this through a shell, so the path is quoted.
+        command = f"tail -c +{offset + 1} {shlex.quote(registry_path)} | head -c {int(length)}"
+        data = run_command(["ssh", *self.ssh_options, self.target, command], binary=True)
+        if len(data) != length:
+            raise RuntimeError(f"Short read from {registry_path} at offset {offset}: {len(data)} of {length} bytes.")
+        return data
+
+    def close(self):
+        # Ask the master connection to exit instead of waiting for ControlPersist
+        subprocess.run(["ssh", *self.ssh_options, "-O", "exit", self.target], capture_output=True)
+
+
+class LocalStorage(StorageBackend):
+    name = "local"
+
+    def __init__(self, root: str | Path = LOCAL_STORAGE_PATH):
+        self.root = str(Path(root).resolve())
+        Path(self.root).mkdir(parents=True, exist_ok=True)
+
+    @_timed("upload", _file_size)
+    def upload(self, local_path: Path, registry_path: str, progress: ProgressCallback | None = None):
+        destination = Path(registry_path)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        # Copy to a temporary name first so readers never see a partial object
+        tmp_path = destination.with_name(f".{destination.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        if progress is None:
+            shutil.copyfile(local_path, tmp_path)
+        else:
+            total, done = os.path.getsize(local_path), 0
+            with open(local_path, "rb") as src, open(tmp_path, "wb") as dst:
+                while block := src.read(COPY_BLOCK_SIZE):
+                    dst.write(block)
+                    done += len(block)
+                    progress(done, total)
+        os.replace(tmp_path, destination)
+
+    @_timed("upload", _result)
+    def upload_stream(self, blocks: Iterable[bytes], registry_path: str) -> int:
+        destination = Path(registry_path)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = destination.with_name(f".{destination.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        written = 0
+        try:
+            with open(tmp_path, "wb") as dst:
+                for block in blocks:
+                    dst.write(block)
+                    written += len(block)
+            os.replace(tmp_path, destination)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        return written
+
+    def local_path(self, registry_path: str) -> Path | None:
+        path = Path(registry_path)
+        return path if path.exists() else None
+
+    @_timed("put", lambda args, result: len(args[0]))
+    def put_bytes(self, data: bytes, registry_path: str):
+        destination = Path(registry_path)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = destination.with_name(f".{destination.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, destination)
+
+    @_timed("get", _result_size)
+    def get_bytes(self, registry_path: str) -> bytes:
+        try:
+            return Path(registry_path).read_bytes()
+        except FileNotFoundError:
+            raise RuntimeError(f"Object not found in local storage: {registry_path}")
+
+    @_timed("download", _downloaded_size)
+    def download(self, registry_path: str, local_path: Path):
+        source = Path(registry_path)
+        if not source.exists():
+            raise RuntimeError(f"Object not found in local storage: {registry_path}")
+        shutil.copyfile(source, local_path)
+
+    @_timed("delete")
+    def delete(self, registry_path: str):
+        try:
+            Path(registry_path).unlink()
+        except FileNotFoundError:
+            raise RuntimeError(f"Object not found in local storage: {registry_path}")
+
+    def size(self, registry_path: str) -> int:
+        try:
+            return os.path.getsize(registry_path)
+        except FileNotFoundError:
+            raise RuntimeError(f"Object not found in local storage: {registry_path}")
+
+    @_timed("read_range", _result_size)
+    def read_range(self, registry_path: str, offset: int, length: int) -> bytes:
+        try:
+            with open(registry_path, "rb") as f:
+                f.seek(offset)
+                data = f.read(length)
+        except FileNotFoundError:
+            raise RuntimeError(f"Object not found in local storage: {registry_path}")
+        if len(data) != length:
+            raise RuntimeError(f"Short read from {registry_path} at offset {offset}: {len(data)} of {length} bytes.")
+        return data
+
+
+BACKENDS = {
+    "ssh": SSHStorage,
+    "local": LocalStorage,
+}
+
+_backend: StorageBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def get_storage_backend() -> StorageBackend:
+    """Returns the process-wide backend selected by DATATRAC_STORAGE."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            try:
+                backend_cls = BACKENDS[STORAGE_BACKEND]
+            except KeyError:
+                raise ValueError(
+                    f"Unknown storage backend '{STORAGE_BACKEND}'. Choose one of: {', '.join(BACKENDS)}"
+                )
+            _backend = backend_cls()
+    return _backend
@@ -0,0 +1,70 @@
+# datatrac/migrations/env.py
+"""
+Alembic environment. There is no alembic.ini: `datatrac.core.schema` builds
+the configuration in code, so migrations run from an installed package.
+Every change to core/models.py needs a new revision in versions/.
+"""
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+from datatrac.core import models  # noqa: F401  (registers the tables)
+from datatrac.core.db import Base
+from datatrac.core.search import FTS_TABLE
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # The SQLite search table (0006) and its FTS5 shadow tables are not models
+    if type_ == "table" and reflected and name.startswith(FTS_TABLE):
+        return False
+    # Indexes declared with .ddl_if(dialect=...) only exist on that backend
+    ddl_if = getattr(obj, "_ddl_if", None)
+    if ddl_if is not None and ddl_if.dialect and context.get_context().dialect.name != ddl_if.dialect:
+        return False
+    return True
+
+
+def run_migrations_offline():
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        render_as_batch=config.get_main_option("sqlalchemy.url", "").startswith("sqlite"),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is None:
+        connectable = engine_from_config(
+            config.get_section(config.config_ini_section, {}),
+            prefix="sqlalchemy.",
+            poolclass=pool.NullPool,
+        )
+        with connectable.connect() as connection:
+            _run(connection)
+    else:
+        _run(connection)
+
+
+def _run(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        # SQLite cannot ALTER most things in place; batch mode rebuilds tables
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
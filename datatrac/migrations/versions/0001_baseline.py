@@ -0,0 +1,55 @@
+"""Baseline schema: datasets, local copies and lineage
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "datasets",
+        sa.Column("hash", sa.String(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("source", sa.String(), nullable=True),
+        sa.Column("registry_path", sa.String(), unique=True),
+        sa.Column("created_at", sa.DateTime(timezone=True)),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("size_bytes", sa.BigInteger(), nullable=True),
+        sa.Column("download_count", sa.BigInteger(), nullable=False),
+        sa.Column("last_downloaded_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_datasets_hash", "datasets", ["hash"])
+    op.create_index("ix_datasets_name", "datasets", ["name"])
+
+    op.create_table(
+        "local_copies",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("dataset_hash", sa.String(), sa.ForeignKey("datasets.hash"), nullable=False),
+        sa.Column("user_identifier", sa.String(), nullable=False),
+        sa.Column("local_path", sa.String(), nullable=False),
+    )
+    op.create_index("ix_local_copies_user_identifier", "local_copies", ["user_identifier"])
+
+    op.create_table(
+        "lineage",
+        sa.Column("parent_hash", sa.String(), sa.ForeignKey("datasets.hash"), primary_key=True),
+        sa.Column("child_hash", sa.String(), sa.ForeignKey("datasets.hash"), primary_key=True),
+    )
+
+
+def downgrade():
+    op.drop_table("lineage")
+    op.drop_index("ix_local_copies_user_identifier", table_name="local_copies")
+    op.drop_table("local_copies")
+    op.drop_index("ix_datasets_name", table_name="datasets")
+    op.drop_index("ix_datasets_hash", table_name="datasets")
+    op.drop_table("datasets")
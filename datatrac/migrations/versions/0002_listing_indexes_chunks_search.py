@@ -0,0 +1,63 @@
+"""Listing indexes, chunked storage and search indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset pagination and listing filters
+    op.create_index("ix_datasets_created_at_hash", "datasets", ["created_at", "hash"])
+    op.create_index("ix_datasets_source", "datasets", ["source"])
+    op.create_index("ix_datasets_size_bytes", "datasets", ["size_bytes"])
+
+    # Chunked storage
+    with op.batch_alter_table("datasets") as batch:
+        batch.add_column(sa.Column("storage_format", sa.String(), server_default="file", nullable=False))
+    op.create_table(
+        "chunks",
+        sa.Column("hash", sa.String(), primary_key=True),
+        sa.Column("size_bytes", sa.BigInteger(), nullable=False),
+        sa.Column("registry_path", sa.String(), nullable=False),
+    )
+    op.create_table(
+        "dataset_chunks",
+        sa.Column("dataset_hash", sa.String(), sa.ForeignKey("datasets.hash"), primary_key=True),
+        sa.Column("seq", sa.Integer(), primary_key=True),
+        sa.Column("chunk_hash", sa.String(), sa.ForeignKey("chunks.hash"), nullable=False),
+    )
+    op.create_index("ix_dataset_chunks_chunk_hash", "dataset_chunks", ["chunk_hash"])
+
+    # Hash-prefix lookups and name/source search (PostgreSQL only)
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index("ix_datasets_hash_pattern", "datasets", ["hash"],
+                        postgresql_ops={"hash": "text_pattern_ops"})
+        op.create_index("ix_datasets_name_trgm", "datasets", ["name"],
+                        postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"})
+        op.create_index("ix_datasets_source_trgm", "datasets", ["source"],
+                        postgresql_using="gin", postgresql_ops={"source": "gin_trgm_ops"})
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_datasets_source_trgm", table_name="datasets")
+        op.drop_index("ix_datasets_name_trgm", table_name="datasets")
+        op.drop_index("ix_datasets_hash_pattern", table_name="datasets")
+    op.drop_index("ix_dataset_chunks_chunk_hash", table_name="dataset_chunks")
+    op.drop_table("dataset_chunks")
+    op.drop_table("chunks")
+    with op.batch_alter_table("datasets") as batch:
+        batch.drop_column("storage_format")
+    op.drop_index("ix_datasets_size_bytes", table_name="datasets")
+    op.drop_index("ix_datasets_source", table_name="datasets")
+    op.drop_index("ix_datasets_created_at_hash", table_name="datasets")
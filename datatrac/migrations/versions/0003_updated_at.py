@@ -0,0 +1,37 @@
+"""updated_at watermarks for incremental replica sync
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+TABLES = ("datasets", "lineage", "local_copies")
+
+
+def upgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch:
+            batch.add_column(sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True))
+    # Existing datasets changed last when they were created, as far as we know
+    op.execute("UPDATE datasets SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)")
+    op.execute("UPDATE lineage SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL")
+    op.execute("UPDATE local_copies SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL")
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column("updated_at", existing_type=sa.DateTime(timezone=True), nullable=False)
+        op.create_index(f"ix_{table}_updated_at", table, ["updated_at"])
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_index(f"ix_{table}_updated_at", table_name=table)
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("updated_at")
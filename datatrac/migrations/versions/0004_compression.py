@@ -0,0 +1,28 @@
+"""codec and stored size of compressed objects
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("datasets") as batch:
+        batch.add_column(sa.Column("codec", sa.String(), server_default="none", nullable=False))
+        batch.add_column(sa.Column("stored_size_bytes", sa.BigInteger(), nullable=True))
+    # Everything stored so far is uncompressed
+    op.execute("UPDATE datasets SET stored_size_bytes = size_bytes WHERE storage_format = 'file'")
+
+
+def downgrade():
+    with op.batch_alter_table("datasets") as batch:
+        batch.drop_column("stored_size_bytes")
+        batch.drop_column("codec")
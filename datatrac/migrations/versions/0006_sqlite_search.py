@@ -0,0 +1,29 @@
+"""Persisted trigram search table for SQLite
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+from datatrac.core.search import FTS_TABLE, SQLITE_FTS_DDL
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # PostgreSQL already searches from the pg_trgm indexes of 0002
+    if op.get_bind().dialect.name == "sqlite":
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        for trigger in ("insert", "update", "delete"):
+            op.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{trigger}")
+        op.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
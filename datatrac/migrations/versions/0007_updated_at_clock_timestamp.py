@@ -0,0 +1,30 @@
+"""updated_at defaults to the statement time on PostgreSQL
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+TABLES = ("datasets", "lineage", "local_copies")
+
+
+def upgrade():
+    # now() is the transaction start; SQLite's CURRENT_TIMESTAMP already is
+    # the statement time
+    if op.get_bind().dialect.name == "postgresql":
+        for table in TABLES:
+            op.alter_column(table, "updated_at", server_default=sa.text("clock_timestamp()"))
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        for table in TABLES:
+            op.alter_column(table, "updated_at", server_default=sa.func.now())
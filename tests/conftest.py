@@ -0,0 +1,35 @@
+# tests/conftest.py
+import os
+import tempfile
+
+import pytest
+
+# Config is read at import time: keep the app directory (hash cache,
+# replica, object cache) out of the real ~/.datatrac
+os.environ.setdefault("DATATRAC_HOME", tempfile.mkdtemp(prefix="datatrac-test-"))
+
+from sqlalchemy import create_engine  # noqa: E402
+
+from datatrac.core import models  # noqa: E402,F401  (registers the tables)
+from datatrac.core.db import Base  # noqa: E402
+
+POSTGRES_URL = os.getenv("DATATRAC_TEST_POSTGRES_URL")
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def central_engine(request, tmp_path):
+    """
+    An empty registry database. The PostgreSQL variant runs against
+    DATATRAC_TEST_POSTGRES_URL (a scratch database: its tables are dropped).
+    """
+    if request.param == "sqlite":
+        engine = create_engine(f"sqlite:///{tmp_path / 'registry.db'}")
+    elif POSTGRES_URL:
+        engine = create_engine(POSTGRES_URL)
+    else:
+        pytest.skip("DATATRAC_TEST_POSTGRES_URL is not set")
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+    engine.dispose()
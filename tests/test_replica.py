@@ -0,0 +1,64 @@
+# tests/test_replica.py
+import time
+from datetime import timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from datatrac.core import models, replica
+from datatrac.core.replica import Replica
+
+
+def _dataset(file_hash: str) -> models.Dataset:
+    return models.Dataset(hash=file_hash, name=f"{file_hash}.csv", registry_path=f"/registry/{file_hash}.csv")
+
+
+def _sync(replica_db: Replica, Session):
+    with Session() as central:
+        replica_db.sync(central)
+
+
+def test_sync_picks_up_row_committed_after_watermark(central_engine, tmp_path, monkeypatch):
+    # A push keeps its transaction open while it uploads; its rows must still
+    # reach the replica even though a sync ran (and moved the watermark)
+    # before the push committed
+    monkeypatch.setattr(replica, "SYNC_OVERLAP", timedelta(seconds=1))
+    Session = sessionmaker(bind=central_engine, autoflush=False)
+    replica_db = Replica(tmp_path / "replica.db")
+
+    slow = Session()
+    # Starts the transaction (on PostgreSQL, now() is frozen from here on)
+    slow.execute(select(models.Dataset.hash)).all()
+    time.sleep(2.5)
+
+    with Session() as fast:
+        fast.add(_dataset("fast"))
+        fast.commit()
+    _sync(replica_db, Session)
+
+    slow.add(_dataset("slow"))
+    slow.commit()
+    slow.close()
+    _sync(replica_db, Session)
+
+    with replica_db.Session() as local:
+        assert set(local.scalars(select(models.Dataset.hash))) == {"fast", "slow"}
+    replica_db.engine.dispose()
+
+
+def test_sync_copies_updates(central_engine, tmp_path):
+    Session = sessionmaker(bind=central_engine, autoflush=False)
+    replica_db = Replica(tmp_path / "replica.db")
+    with Session() as central:
+        central.add(_dataset("a"))
+        central.commit()
+    _sync(replica_db, Session)
+
+    with Session() as central:
+        central.get(models.Dataset, "a").is_active = False
+        central.commit()
+    _sync(replica_db, Session)
+
+    with replica_db.Session() as local:
+        assert local.get(models.Dataset, "a").is_active is False
+    replica_db.engine.dispose()